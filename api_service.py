@@ -1,48 +1,238 @@
+import json
+import logging
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import config
+import metrics
+from recipe_model import Recipe
+from response_cache import CachedResponse, ResponseCache
 
-def fetch_categories(limit: int = 5) -> list[str]:
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+class CacheOnlyMiss(requests.exceptions.RequestException):
     """
-    Fetches a limited number of food categories from TheMealDB API.
+    Raised in cache-only mode for a request whose response is not cached.
+    """
+
+def endpoint_name(url: str) -> str:
+    """
+    Returns the name under which requests to a URL are reported in the metrics,
+    i.e. the last path segment without the query string (e.g. "lookup.php").
+    """
+    return url.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1] or url
+
+def _retry_endpoint(path: str) -> str:
+    """
+    Returns the metrics name for a retried request path: the endpoint name for
+    the MealDB and CalorieNinjas APIs, and "other" for anything else sent through
+    the shared session (e.g. image downloads), so one label is not created per file.
+    """
+    for api_url in (config.MEALDB_API_BASE_URL, config.CALORIENINJAS_API_URL):
+        if path.startswith(urlsplit(api_url).path):
+            return endpoint_name(path)
+    return "other"
+
+class _CountingRetry(Retry):
+    """
+    A urllib3 retry policy that counts every retry it performs in the metrics.
+    """
+
+    def increment(self, method=None, url=None, *args, **kwargs):
+        retry = super().increment(method, url, *args, **kwargs) # Raises once the retries are used up
+        metrics.increment("http_retries_total", endpoint=_retry_endpoint(url or ""))
+        return retry
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared keep-alive session used for all outbound API calls.
+
+    The session is created on first use with a connection pool sized by
+    config.HTTP_POOL_SIZE and automatic retries with exponential backoff for
+    connection errors and 429/5xx responses.
+
+    Returns:
+        The shared requests.Session object.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = _CountingRetry(
+                total=config.HTTP_MAX_RETRIES,
+                backoff_factor=config.HTTP_BACKOFF_FACTOR,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+            )
+            adapter = HTTPAdapter(
+                pool_connections=config.HTTP_POOL_SIZE,
+                pool_maxsize=config.HTTP_POOL_SIZE,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+def close_session():
+    """
+    Closes the shared session and its pooled connections, if one was created.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def get_response_cache() -> ResponseCache | None:
+    """
+    Returns the persistent response cache for TheMealDB requests, opening it on first use.
+
+    Returns:
+        The shared ResponseCache, or None if config.HTTP_CACHE_DB is not set.
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None and config.HTTP_CACHE_DB:
+            _response_cache = ResponseCache(config.HTTP_CACHE_DB)
+        return _response_cache
+
+def close_response_cache():
+    """
+    Closes the persistent response cache, if it was opened.
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is not None:
+            _response_cache.close()
+            _response_cache = None
+
+def _cache_ttl(name: str) -> float:
+    """
+    Returns the seconds a cached response of an endpoint is used without revalidation.
+    """
+    return config.HTTP_CACHE_TTLS.get(name, config.HTTP_CACHE_DEFAULT_TTL)
+
+def _fetch(url: str, name: str, cached: CachedResponse | None) -> requests.Response:
+    """
+    Sends a GET request, conditional on the validators of a cached response if there is one.
+    """
+    headers = {}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+    try:
+        with metrics.timer("http_request_seconds", endpoint=name):
+            response = get_session().get(url, headers=headers, timeout=config.HTTP_TIMEOUT)
+    except requests.exceptions.RequestException:
+        metrics.increment("http_errors_total", endpoint=name)
+        raise
+    metrics.increment("http_requests_total", endpoint=name, status=response.status_code)
+    return response
+
+def _get_json(endpoint: str) -> dict | None:
+    """
+    Performs a GET request against TheMealDB API using the shared session.
+
+    Responses are kept in the persistent response cache. A cached response
+    younger than its endpoint's TTL (config.HTTP_CACHE_TTLS) is used without
+    a request; an older one is revalidated with If-None-Match/If-Modified-Since
+    and reused if the server answers 304 Not Modified, or if the request fails.
+    With config.HTTP_CACHE_ONLY set, no request is ever sent.
 
     Args:
-        limit: The maximum number of categories to fetch.
+        endpoint: The path and query string relative to config.MEALDB_API_BASE_URL.
 
     Returns:
-        A list of category names (strings). Returns an empty list on failure.
+        The decoded JSON response body.
+
+    Raises:
+        CacheOnlyMiss: In cache-only mode, if the response is not cached.
     """
+    url = f"{config.MEALDB_API_BASE_URL}{endpoint}"
+    name = endpoint_name(endpoint)
+    cache = get_response_cache()
+    cached = cache.get(url) if cache else None
+
+    if cached and (config.HTTP_CACHE_ONLY or cached.age() < _cache_ttl(name)):
+        metrics.increment("http_cache_hits_total", endpoint=name, result="fresh")
+        return json.loads(cached.body)
+    if config.HTTP_CACHE_ONLY:
+        metrics.increment("http_cache_misses_total", endpoint=name)
+        raise CacheOnlyMiss(f"{url} is not cached and HTTP_CACHE_ONLY is set")
+
     try:
-        response = requests.get(f"{config.MEALDB_API_BASE_URL}list.php?c=list")
+        response = _fetch(url, name, cached)
+        if cached and response.status_code == 304:
+            cache.touch(url)
+            metrics.increment("http_cache_hits_total", endpoint=name, result="revalidated")
+            return json.loads(cached.body)
         response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
         data = response.json()
-        if data and 'meals' in data:
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if not cached:
+            raise
+        # Serve the outdated copy rather than nothing
+        logger.warning(f"Using a cached response for {url} fetched {cached.age():.0f}s ago: {e}")
+        metrics.increment("http_cache_hits_total", endpoint=name, result="stale")
+        return json.loads(cached.body)
+
+    metrics.increment("http_cache_misses_total", endpoint=name)
+    if cache:
+        cache.put(url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return data
+
+def fetch_categories(limit: int | None = 5) -> list[str]:
+    """
+    Fetches a limited number of food categories from TheMealDB API.
+
+    Args:
+        limit: The maximum number of categories to fetch, or None for all of them.
+
+    Returns:
+        A list of category names (strings). Returns an empty list on failure.
+    """
+    try:
+        data = _get_json("list.php?c=list")
+        if data and data.get('meals'):
             return [category['strCategory'] for category in data['meals'][:limit]]
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching categories from TheMealDB API: {e}")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.error(f"Error fetching categories from TheMealDB API: {e}")
     return []
 
-def fetch_recipes_by_category(category: str, limit: int = 2) -> list[dict]:
+def fetch_recipes_by_category(category: str, limit: int | None = 2) -> list[dict] | None:
     """
     Fetches a limited number of recipes within a specific category from TheMealDB API.
 
     Args:
         category: The category name to filter recipes by.
-        limit: The maximum number of recipes to fetch for the category.
+        limit: The maximum number of recipes to fetch for the category, or None for all of them.
 
     Returns:
-        A list of recipe dictionaries. Returns an empty list on failure.
+        A list of recipe dictionaries, empty if the category has no recipes.
+        Returns None if the listing could not be fetched.
     """
     try:
-        response = requests.get(f"{config.MEALDB_API_BASE_URL}filter.php?c={category}")
-        response.raise_for_status()
-        data = response.json()
-        if data and 'meals' in data:
-            return data['meals'][:limit]
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching recipes for category '{category}' from TheMealDB API: {e}")
+        data = _get_json(f"filter.php?c={category}")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.error(f"Error fetching recipes for category '{category}' from TheMealDB API: {e}")
+        return None
+    if data and data.get('meals'):
+        return data['meals'][:limit]
     return []
 
-def fetch_recipe_details(recipe_id: str) -> dict | None:
+def fetch_recipe_details(recipe_id: str) -> Recipe | None:
     """
     Fetches detailed information for a specific recipe from TheMealDB API.
 
@@ -50,14 +240,70 @@ def fetch_recipe_details(recipe_id: str) -> dict | None:
         recipe_id: The ID of the recipe to fetch details for.
 
     Returns:
-        A dictionary containing recipe details, or None if not found or on error.
+        The recipe, or None if not found or on error.
     """
     try:
-        response = requests.get(f"{config.MEALDB_API_BASE_URL}lookup.php?i={recipe_id}")
-        response.raise_for_status()
-        data = response.json()
-        if data and 'meals' in data and data['meals']:
-            return data['meals'][0]
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching details for recipe ID {recipe_id} from TheMealDB API: {e}")
-    return None
\ No newline at end of file
+        data = _get_json(f"lookup.php?i={recipe_id}")
+        if data and data.get('meals'):
+            return Recipe.from_mealdb(data['meals'][0])
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        logger.error(f"Error fetching details for recipe ID {recipe_id} from TheMealDB API: {e}")
+    return None
+
+def _fetch_recipe_details_logged(recipe_id: str) -> Recipe | None:
+    """
+    Fetches one recipe for fetch_recipe_details_many, turning any error into None.
+    """
+    try:
+        return fetch_recipe_details(recipe_id)
+    except Exception as e:
+        logger.error(f"Error fetching details for recipe ID {recipe_id}: {e}")
+        return None
+
+def fetch_recipe_details_many(recipe_ids: Iterable[str], max_in_flight: int | None = None) -> Iterator[Recipe | None]:
+    """
+    Fetches detailed information for many recipes through a bounded pool of requests.
+
+    The IDs are read lazily, from a background thread, so they may come from
+    a stream that is still being produced. At most max_in_flight requests are
+    in flight at any time; a slow request holds back the results after it,
+    but not the requests. Every request shares the keep-alive session and its
+    timeout and retries.
+
+    Args:
+        recipe_ids: The IDs of the recipes to fetch details for.
+        max_in_flight: Maximum number of requests in flight. Defaults to config.MAX_CONCURRENT_REQUESTS.
+
+    Yields:
+        Each recipe, or None if it could not be fetched, in the same order as the input.
+    """
+    max_in_flight = max_in_flight or config.MAX_CONCURRENT_REQUESTS
+    slots = threading.Semaphore(max_in_flight)
+    futures = queue.Queue()
+    stopped = threading.Event()
+    input_errors = []
+
+    def submit_all(executor: ThreadPoolExecutor):
+        try:
+            for recipe_id in recipe_ids:
+                slots.acquire()
+                if stopped.is_set():
+                    break
+                future = executor.submit(_fetch_recipe_details_logged, recipe_id)
+                future.add_done_callback(lambda _: slots.release())
+                futures.put(future)
+        except BaseException as e:
+            input_errors.append(e) # Re-raised to the caller after the results before it
+        finally:
+            futures.put(None)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        threading.Thread(target=submit_all, args=(executor,), name="details-submit", daemon=True).start()
+        try:
+            while (future := futures.get()) is not None:
+                yield future.result()
+        finally:
+            stopped.set()
+            slots.release() # Wakes the submitting thread if it waits for a slot
+    if input_errors:
+        raise input_errors[0]
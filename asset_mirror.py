@@ -0,0 +1,219 @@
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from urllib.parse import urlsplit
+from atomic_file import atomic_write
+import config
+import database_manager
+import metrics
+
+try:
+    from PIL import Image # Optional, only needed to generate thumbnails
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = "thumbs" # Subdirectory of the asset directory holding the thumbnails
+
+class MirroredImage(NamedTuple):
+    """
+    A downloaded image, stored in the asset directory.
+    """
+    url: str
+    sha256: str
+    path: str # Relative to the asset directory, with forward slashes
+    thumbnail_path: str | None
+    content_type: str | None
+    size: int
+
+def _extension(url: str, content_type: str | None) -> str:
+    """
+    Returns the file extension for an image, from its content type or else its URL.
+    """
+    extension = mimetypes.guess_extension(content_type or "") if content_type else None
+    if extension == ".jpe": # Older mimetypes tables map image/jpeg to .jpe
+        extension = ".jpg"
+    return extension or os.path.splitext(urlsplit(url).path)[1].lower() or ".img"
+
+def _write_file(asset_dir: str, path: str, data: bytes):
+    """
+    Writes a file below the asset directory unless it exists, via a temporary
+    file so an interrupted run never leaves a truncated image behind.
+    """
+    full_path = os.path.join(asset_dir, *path.split("/"))
+    if os.path.exists(full_path):
+        return
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with atomic_write(full_path) as f:
+        f.write(data)
+
+def make_thumbnail(asset_dir: str, sha256: str, data: bytes) -> str | None:
+    """
+    Stores a JPEG thumbnail of an image, fitted into config.ASSET_THUMBNAIL_SIZE.
+
+    Args:
+        asset_dir: The asset directory.
+        sha256: The content hash of the image, which names the thumbnail.
+        data: The image file content.
+
+    Returns:
+        The thumbnail path relative to the asset directory, or None if
+        thumbnails are disabled, Pillow is not installed, or the image cannot
+        be decoded.
+    """
+    if Image is None or not config.ASSET_THUMBNAIL_SIZE:
+        return None
+    width, height = config.ASSET_THUMBNAIL_SIZE
+    path = f"{THUMBNAIL_DIR}/{sha256[:2]}/{sha256}-{width}x{height}.jpg"
+    if os.path.exists(os.path.join(asset_dir, *path.split("/"))):
+        return path
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((width, height))
+            thumbnail = io.BytesIO()
+            image.convert("RGB").save(thumbnail, "JPEG", quality=80, optimize=True)
+    except (OSError, ValueError) as e: # Pillow raises OSError subclasses for undecodable images
+        logger.warning(f"Cannot create a thumbnail of image {sha256}: {e}")
+        return None
+    _write_file(asset_dir, path, thumbnail.getvalue())
+    return path
+
+def _mirror_image(asset_dir: str, url: str) -> MirroredImage | None:
+    """
+    Downloads one image into the asset directory, named by its content hash.
+    Runs in a worker thread of mirror_images.
+
+    Returns:
+        The mirrored image, or None if it could not be downloaded.
+    """
+    import api_service # Imported on first use, so exporting needs neither requests nor the API client
+    import requests
+    try:
+        with metrics.timer("asset_download_seconds"):
+            response = api_service.get_session().get(url, timeout=config.HTTP_TIMEOUT)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Could not download image {url}: {e}")
+        metrics.increment("asset_errors_total", reason="download")
+        return None
+    content_type = response.headers.get("Content-Type", "").split(";", 1)[0].strip() or None
+    if content_type and not content_type.startswith("image/"):
+        logger.warning(f"Not mirroring {url}: the server returned {content_type}, not an image.")
+        metrics.increment("asset_errors_total", reason="content_type")
+        return None
+    data = response.content
+    if len(data) > config.ASSET_MAX_BYTES:
+        logger.warning(f"Not mirroring {url}: {len(data)} bytes exceed ASSET_MAX_BYTES.")
+        metrics.increment("asset_errors_total", reason="size")
+        return None
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = f"{sha256[:2]}/{sha256}{_extension(url, content_type)}"
+    try:
+        _write_file(asset_dir, path, data) # Identical images from different URLs share the file
+        thumbnail_path = make_thumbnail(asset_dir, sha256, data)
+    except OSError as e:
+        logger.error(f"Error writing image {url} to '{asset_dir}': {e}")
+        metrics.increment("asset_errors_total", reason="write")
+        return None
+    metrics.increment("assets_downloaded_total")
+    metrics.increment("asset_bytes_total", len(data))
+    return MirroredImage(url, sha256, path, thumbnail_path, content_type, len(data))
+
+def _complete_thumbnail(asset_dir: str, url: str, sha256: str, path: str) -> MirroredImage | None:
+    """
+    Creates the missing thumbnail of an already mirrored image from its local copy.
+
+    Returns:
+        The mirrored image with its thumbnail, or None if none could be created.
+    """
+    try:
+        with open(os.path.join(asset_dir, *path.split("/")), 'rb') as f:
+            data = f.read()
+        thumbnail_path = make_thumbnail(asset_dir, sha256, data)
+    except OSError as e:
+        logger.warning(f"Cannot create a thumbnail of {url}: {e}")
+        return None
+    if thumbnail_path is None:
+        return None
+    return MirroredImage(url, sha256, path, thumbnail_path, mimetypes.guess_type(path)[0], len(data))
+
+@metrics.timed("asset_mirror_seconds")
+def mirror_images(conn: sqlite3.Connection, asset_dir: str | None = None, workers: int | None = None) -> int:
+    """
+    Mirrors the images of all stored recipes into a content-addressed local
+    directory, so the exported XML and HTML can reference local copies.
+
+    Only images not mirrored yet (or whose file was deleted) are downloaded,
+    at most `workers` at a time through the shared HTTP session. Each image
+    is stored as <sha256[:2]>/<sha256>.<ext>, so identical images served
+    under different URLs are stored once. If Pillow is installed, a JPEG
+    thumbnail is stored next to it under thumbs/. The local copies are
+    recorded in the 'assets' table.
+
+    Args:
+        conn: The SQLite database connection. Only used by the calling thread.
+        asset_dir: The directory to store images in. Defaults to config.ASSET_DIR.
+        workers: Downloads in flight at once. Defaults to config.ASSET_DOWNLOAD_WORKERS.
+
+    Returns:
+        The number of images newly mirrored or given a thumbnail.
+    """
+    asset_dir = asset_dir or config.ASSET_DIR
+    workers = workers or config.ASSET_DOWNLOAD_WORKERS
+    if not asset_dir:
+        return 0
+
+    mirrored = database_manager.get_assets(conn)
+    pending = []
+    missing_thumbnails = []
+    for url in database_manager.get_image_urls(conn):
+        if url not in mirrored or not os.path.exists(os.path.join(asset_dir, *mirrored[url][1].split("/"))):
+            pending.append(url)
+        elif mirrored[url][2] is None and Image is not None and config.ASSET_THUMBNAIL_SIZE:
+            missing_thumbnails.append((url, *mirrored[url][:2]))
+    if config.HTTP_CACHE_ONLY:
+        # Working offline: keep the images mirrored so far, the others stay remote
+        if pending:
+            logger.info(f"Not downloading {len(pending)} images in cache-only mode.")
+        pending = []
+    if not pending and not missing_thumbnails:
+        logger.info(f"All {len(mirrored)} images are mirrored in {asset_dir}.")
+        return 0
+
+    logger.info(f"Mirroring {len(pending)} images into {asset_dir}...")
+    os.makedirs(asset_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda url: _mirror_image(asset_dir, url), pending))
+        results += executor.map(lambda args: _complete_thumbnail(asset_dir, *args), missing_thumbnails)
+    images = [image for image in results if image]
+    database_manager.record_assets(conn, [
+        (image.url, image.sha256, image.path, image.thumbnail_path, image.content_type, image.size) for image in images
+    ])
+    failed = len(pending) - sum(1 for image in results[:len(pending)] if image)
+    logger.info(f"Mirrored {len(images)} images into {asset_dir}" + (f"; {failed} failed." if failed else "."))
+    return len(images)
+
+def get_asset_href_base(output_html: str, asset_dir: str | None = None) -> str:
+    """
+    Returns the relative URL prefix under which an HTML file written to
+    output_html reaches the asset directory, e.g. "../assets/".
+
+    Args:
+        output_html: The path of the HTML file.
+        asset_dir: The asset directory. Defaults to config.ASSET_DIR.
+
+    Returns:
+        The prefix, ending with a slash, or "" if mirroring is disabled.
+    """
+    asset_dir = asset_dir or config.ASSET_DIR
+    if not asset_dir:
+        return ""
+    relative = os.path.relpath(os.path.abspath(asset_dir), os.path.dirname(os.path.abspath(output_html)))
+    return relative.replace(os.sep, "/").rstrip("/") + "/"
@@ -0,0 +1,29 @@
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import BinaryIO
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[BinaryIO]:
+    """
+    Opens a temporary file next to `path` for binary writing and moves it over
+    `path` only once it was written completely, so readers (e.g. a web server)
+    never see a half-written file. On error the temporary file is removed.
+
+    Args:
+        path: The final path of the file.
+
+    Yields:
+        The open temporary file.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
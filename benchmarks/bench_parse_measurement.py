@@ -0,0 +1,75 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_processor
+
+QUANTITIES = ["", "1", "2", "1/2", "1 1/2", "2.5", "200", "½", "1½", "3"]
+UNITS = ["", "cup", "cups", "tbs", "tsp", "ml", "g", "kg", "oz", "lb", "cloves", "pinch", "slices"]
+ITEMS = [
+    "flour", "salt", "olive oil", "garlic", "chicken breast", "butter", "sugar", "milk",
+    "onion", "black pepper", "rice", "lemon juice", "parsley", "beef stock", "tomatoes"
+]
+
+def generate_corpus(lines: int, distinct: int, seed: int = 0) -> list[str]:
+    """
+    Generates ingredient lines drawn from a pool of `distinct` unique lines,
+    mimicking how the same lines repeat across a catalog.
+    """
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        quantity, unit, item = rng.choice(QUANTITIES), rng.choice(UNITS), rng.choice(ITEMS)
+        separator = "" if quantity.isdigit() and unit in ("ml", "g", "kg") and rng.random() < 0.5 else " "
+        pool.append(" ".join(filter(None, [f"{quantity}{separator}{unit}".strip(), item])))
+    return [rng.choice(pool) for _ in range(lines)]
+
+def run(lines: int = 1_000_000, distinct: int = 2000) -> dict[str, float]:
+    """
+    Measures parse_measurement throughput on a synthetic ingredient corpus,
+    without the memo, with the memo, and through the parse_measurements batch API.
+
+    Returns:
+        The elapsed seconds of each variant.
+    """
+    corpus = generate_corpus(lines, distinct)
+    uncached = data_processor._parse_measurement_cached.__wrapped__
+
+    start = time.perf_counter()
+    for line in corpus:
+        uncached(line.strip())
+    results = {"uncached": time.perf_counter() - start}
+
+    data_processor._parse_measurement_cached.cache_clear()
+    start = time.perf_counter()
+    for line in corpus:
+        data_processor.parse_measurement(line)
+    results["memoized"] = time.perf_counter() - start
+
+    data_processor._parse_measurement_cached.cache_clear()
+    start = time.perf_counter()
+    data_processor.parse_measurements(corpus)
+    results["batch"] = time.perf_counter() - start
+    return results
+
+def main():
+    """
+    Prints the parse_measurement throughput of each variant.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark ingredient measurement parsing.")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Number of ingredient lines.")
+    parser.add_argument("--distinct", type=int, default=2000, help="Number of distinct ingredient lines.")
+    args = parser.parse_args()
+
+    results = run(args.lines, args.distinct)
+    print(f"Parsed {args.lines} lines ({args.distinct} distinct):")
+    for name, elapsed in results.items():
+        print(f"  {name:<9} {elapsed:.3f}s ({args.lines / elapsed:,.0f} lines/sec)")
+    print(f"  cache: {data_processor._parse_measurement_cached.cache_info()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import data_processor
+from recipe_model import Recipe
+from stub_server import SyntheticCatalog
+
+def _parse_ingredients_dict(recipe_data: dict) -> str:
+    """
+    parse_ingredients as it worked on raw MealDB dictionaries, for comparison.
+    """
+    ingredients = []
+    for i in range(1, 21):
+        ingredient = recipe_data.get(f'strIngredient{i}', '').strip()
+        measure = recipe_data.get(f'strMeasure{i}', '').strip()
+        if ingredient and measure:
+            ingredients.append(f"{measure} {ingredient}")
+        elif ingredient:
+            ingredients.append(ingredient)
+    return ", ".join(ingredients)
+
+def _measure(build) -> tuple[list, int, float]:
+    """
+    Builds a list of recipes and returns it with the bytes it holds and the seconds it took.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    recipes = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return recipes, size, elapsed
+
+def run(recipes: int = 100_000, ingredients: int = 10) -> dict:
+    """
+    Compares raw MealDB dictionaries with Recipe objects: memory held per
+    recipe, and the time parse_ingredients takes over all recipes.
+
+    Returns:
+        The bytes per recipe and parse seconds of each representation.
+    """
+    catalog = SyntheticCatalog(10, max(recipes // 10, 1), ingredients)
+    recipe_ids = [recipe_id for category in catalog.categories for recipe_id in catalog.recipe_ids(category)]
+    dicts, dict_bytes, _ = _measure(lambda: [catalog.recipe(recipe_id) for recipe_id in recipe_ids])
+    # Each dictionary is freed once its Recipe is built, as after a fetch
+    models, model_bytes, build_seconds = _measure(
+        lambda: [Recipe.from_mealdb(catalog.recipe(recipe_id)) for recipe_id in recipe_ids]
+    )
+
+    start = time.perf_counter()
+    for recipe_data in dicts:
+        _parse_ingredients_dict(recipe_data)
+    dict_parse = time.perf_counter() - start
+    start = time.perf_counter()
+    for recipe in models:
+        data_processor.parse_ingredients(recipe)
+    model_parse = time.perf_counter() - start
+
+    return {
+        "recipes": len(recipe_ids),
+        "dict_bytes_per_recipe": dict_bytes / len(recipe_ids),
+        "recipe_bytes_per_recipe": model_bytes / len(recipe_ids),
+        "dict_parse_seconds": dict_parse,
+        "recipe_parse_seconds": model_parse,
+        "recipe_build_seconds": build_seconds,
+    }
+
+def main():
+    """
+    Prints the memory and parse time of raw dictionaries and Recipe objects.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Recipe model against raw MealDB dictionaries.")
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--ingredients", type=int, default=10, help="Ingredients per recipe (at most 20).")
+    args = parser.parse_args()
+
+    results = run(args.recipes, args.ingredients)
+    print(f"{results['recipes']} recipes with {args.ingredients} ingredients each:")
+    print(f"  memory  dict {results['dict_bytes_per_recipe']:,.0f} B/recipe, "
+          f"Recipe {results['recipe_bytes_per_recipe']:,.0f} B/recipe")
+    print(f"  parse_ingredients  dict {results['dict_parse_seconds']:.3f}s, "
+          f"Recipe {results['recipe_parse_seconds']:.3f}s")
+
+if __name__ == "__main__":
+    main()
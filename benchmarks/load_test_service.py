@@ -0,0 +1,167 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+import database_manager
+import metrics
+import query_service
+from recipe_model import Recipe
+from stub_server import SyntheticCatalog
+
+def request_mix(db_file: str) -> list[str]:
+    """
+    Builds the request targets of a load test from the contents of a database:
+    every recipe by ID, every category and tag, ingredient prefixes and searches.
+    """
+    conn = sqlite3.connect(db_file)
+    targets = [f"/recipes/{quote(recipe_id)}" for (recipe_id,) in conn.execute("SELECT id FROM recipes")]
+    targets += [f"/recipes?category={quote(name)}" for (name,) in conn.execute("SELECT name FROM categories")]
+    targets += [f"/recipes?tag={quote(name)}" for (name,) in conn.execute("SELECT name FROM tags")]
+    items = [item for (item,) in conn.execute("SELECT DISTINCT item FROM recipe_ingredients LIMIT 50")]
+    targets += [f"/recipes?ingredient={quote(item.split()[0])}" for item in items if item]
+    targets += [f"/search?q={quote(item)}" for item in items if item]
+    conn.close()
+    return targets
+
+def _client(base_url: str, targets: list[str], deadline: float, seed: int, revalidate: bool,
+            latencies: list[float], statuses: dict):
+    """
+    Sends requests over one keep-alive connection until the deadline.
+    """
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+    rng = random.Random(seed)
+    etags = {}
+    while time.perf_counter() < deadline:
+        target = rng.choice(targets)
+        headers = {"If-None-Match": etags[target]} if revalidate and target in etags else {}
+        start = time.perf_counter()
+        conn.request("GET", target, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        if response.getheader("ETag"):
+            etags[target] = response.getheader("ETag")
+    conn.close()
+
+def load_test(base_url: str, targets: list[str], clients: int, seconds: float, revalidate: bool = False) -> dict:
+    """
+    Runs concurrent keep-alive clients against a query service.
+
+    Args:
+        base_url: The service URL, e.g. "http://127.0.0.1:8080".
+        targets: The request targets to pick from at random.
+        clients: Concurrent connections.
+        seconds: Duration of the test.
+        revalidate: Send If-None-Match with the ETag of earlier responses, as a caching client would.
+
+    Returns:
+        The request count, throughput, latency percentiles and status counts.
+    """
+    deadline = time.perf_counter() + seconds
+    results = [([], {}) for _ in range(clients)]
+    threads = [
+        threading.Thread(target=_client, args=(base_url, targets, deadline, i, revalidate, *results[i]))
+        for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    statuses = {}
+    for _, client_statuses in results:
+        for status, count in client_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {"p50": percentile(0.50), "p90": percentile(0.90), "p99": percentile(0.99),
+                       "max": latencies[-1] * 1000 if latencies else 0.0},
+        "statuses": statuses,
+    }
+
+def build_database(db_file: str, catalog: SyntheticCatalog):
+    """
+    Stores a synthetic catalog in a fresh database, without calorie lookups.
+    """
+    settings = ("NUTRITION_TABLE_DB", "NUTRITION_CACHE_DB", "NUTRITION_API_FALLBACK")
+    saved = {name: getattr(config, name) for name in settings}
+    config.NUTRITION_TABLE_DB = config.NUTRITION_CACHE_DB = None
+    config.NUTRITION_API_FALLBACK = False
+    try:
+        conn = database_manager.create_connection(db_file)
+        database_manager.create_table(conn)
+        database_manager.insert_recipes(conn, (
+            Recipe.from_mealdb(catalog.recipe(recipe_id))
+            for category in catalog.categories for recipe_id in catalog.recipe_ids(category)
+        ))
+        conn.close()
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+def run(recipes: int = 1000, clients: int = 8, seconds: float = 5.0, revalidate: bool = False) -> dict:
+    """
+    Serves a synthetic catalog of `recipes` recipes in-process and load-tests it.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        db_file = os.path.join(workdir, "recipes.db")
+        build_database(db_file, SyntheticCatalog(10, max(recipes // 10, 1)))
+        service = query_service.QueryService(db_file, clients)
+        server = query_service.create_server(service, "127.0.0.1", 0, clients)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            return load_test(f"http://127.0.0.1:{server.server_port}", request_mix(db_file), clients, seconds, revalidate)
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+
+def main():
+    """
+    Load-tests a running query service, or an in-process one over a synthetic catalog.
+    """
+    parser = argparse.ArgumentParser(description="Load-test the recipe query service.")
+    parser.add_argument("--url", default=None,
+                        help="URL of a running service (default: serve a synthetic catalog in-process).")
+    parser.add_argument("--db", default=config.DATABASE_NAME,
+                        help="Database the running service serves, used to build the request mix.")
+    parser.add_argument("--recipes", type=int, default=1000, help="Size of the synthetic catalog.")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent keep-alive connections.")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--revalidate", action="store_true", help="Send If-None-Match like a caching client.")
+    args = parser.parse_args()
+
+    metrics.configure_logging("WARNING")
+    if args.url:
+        results = load_test(args.url, request_mix(args.db), args.clients, args.seconds, args.revalidate)
+    else:
+        results = run(args.recipes, args.clients, args.seconds, args.revalidate)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+import api_service
+import data_processor
+import database_manager
+import export_transformer
+import metrics
+import script
+from recipe_model import Recipe
+import bench_highlight_actions
+import bench_parse_measurement
+import bench_recipe_model
+import load_test_service
+from stub_server import StubServer, SyntheticCatalog
+
+SCENARIOS = (
+    "end_to_end", "end_to_end_cached", "ingest", "export_xml", "transform_html", "parse_measurement",
+    "highlight_actions", "query_service", "recipe_model"
+)
+
+def _reset_run_state():
+    """
+    Clears the in-process caches and connections a previous run left behind.
+    """
+    data_processor.close_nutrition_cache()
+    data_processor.close_nutrition_table()
+    api_service.close_response_cache()
+    api_service.close_session()
+    data_processor.reset_caches()
+    metrics.reset()
+
+def _configure(server: StubServer, workdir: str):
+    """
+    Points config.py at the stub server and at fresh output files in `workdir`.
+    """
+    config.MEALDB_API_BASE_URL = server.mealdb_url
+    config.CALORIENINJAS_API_URL = server.nutrition_url
+    config.CATEGORIES_LIMIT = None
+    config.RECIPES_PER_CATEGORY = None
+    for name in ("DATABASE_NAME", "XML_OUTPUT_FILENAME", "HTML_OUTPUT_FILENAME", "NUTRITION_CACHE_DB",
+                 "NUTRITION_TABLE_DB", "FRAGMENT_CACHE_DB", "HTTP_CACHE_DB", "ASSET_DIR"):
+        if getattr(config, name):
+            setattr(config, name, os.path.join(workdir, os.path.basename(getattr(config, name))))
+    config.JSON_OUTPUT_FILENAME_PREFIX = os.path.join(workdir, "recipes_")
+    config.HTML_OUTPUT_DIR = os.path.join(workdir, "recipes_html")
+    config.NUTRITION_TABLE_CSV = os.path.join(REPO_ROOT, "nutrition_table.csv")
+    config.XSLT_FILENAME = os.path.join(REPO_ROOT, config.XSLT_FILENAME)
+
+class _ErrorRecorder(logging.Handler):
+    """
+    Keeps the error records logged while a scenario runs, so a run that only
+    got through by logging its failures is not reported as a result.
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.records = []
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record)
+
+def bench_end_to_end(catalog: SyntheticCatalog, server: StubServer) -> dict:
+    """
+    Runs script.main against the stub server: crawl, enrich, store, export and render.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure(server, workdir)
+        _reset_run_state()
+        server.requests.clear()
+        start = time.perf_counter()
+        script.main(["--metrics-file", "", "--log-level", "WARNING"])
+        elapsed = time.perf_counter() - start
+        return {"seconds": elapsed, "items": catalog.size, "http_requests": dict(server.requests),
+                "metrics": metrics.snapshot()}
+
+def bench_end_to_end_cached(catalog: SyntheticCatalog, server: StubServer) -> dict:
+    """
+    Runs script.main twice in the same directory and measures the second run,
+    which is answered from the HTTP response cache and the nutrition cache.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure(server, workdir)
+        _reset_run_state()
+        script.main(["--metrics-file", "", "--log-level", "WARNING"])
+        _reset_run_state()
+        server.requests.clear()
+        start = time.perf_counter()
+        script.main(["--metrics-file", "", "--log-level", "WARNING"])
+        elapsed = time.perf_counter() - start
+        return {"seconds": elapsed, "items": catalog.size, "http_requests": dict(server.requests),
+                "metrics": metrics.snapshot()}
+
+def _ingest(catalog: SyntheticCatalog, db_file: str) -> float:
+    """
+    Stores the whole catalog in a fresh database with a warm nutrition cache,
+    and returns the seconds spent in insert_recipes.
+    """
+    recipes = [
+        Recipe.from_mealdb(catalog.recipe(recipe_id))
+        for category in catalog.categories for recipe_id in catalog.recipe_ids(category)
+    ]
+    data_processor.prefetch_calories([data_processor.parse_ingredients(recipe) for recipe in recipes])
+    conn = database_manager.create_connection(db_file)
+    database_manager.create_table(conn)
+    start = time.perf_counter()
+    database_manager.insert_recipes(conn, recipes)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+def bench_ingest(catalog: SyntheticCatalog, server: StubServer) -> dict:
+    """
+    Measures insert_recipes alone: row building, hashing and batched SQLite writes.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure(server, workdir)
+        _reset_run_state()
+        return {"seconds": _ingest(catalog, config.DATABASE_NAME), "items": catalog.size}
+
+def bench_export_xml(catalog: SyntheticCatalog, server: StubServer) -> dict:
+    """
+    Measures export_to_xml on a database holding the whole catalog.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure(server, workdir)
+        _reset_run_state()
+        _ingest(catalog, config.DATABASE_NAME)
+        start = time.perf_counter()
+        export_transformer.export_to_xml(config.DATABASE_NAME, config.XML_OUTPUT_FILENAME)
+        elapsed = time.perf_counter() - start
+        return {"seconds": elapsed, "items": catalog.size, "bytes": os.path.getsize(config.XML_OUTPUT_FILENAME)}
+
+def bench_transform_html(catalog: SyntheticCatalog, server: StubServer) -> dict:
+    """
+    Measures transform_to_html on the exported XML of the whole catalog.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure(server, workdir)
+        _reset_run_state()
+        _ingest(catalog, config.DATABASE_NAME)
+        export_transformer.export_to_xml(config.DATABASE_NAME, config.XML_OUTPUT_FILENAME)
+        export_transformer.get_compiled_xslt(config.XSLT_FILENAME) # Compiling the stylesheet is not part of the transform
+        start = time.perf_counter()
+        export_transformer.transform_to_html(config.XML_OUTPUT_FILENAME, config.XSLT_FILENAME, config.HTML_OUTPUT_FILENAME)
+        elapsed = time.perf_counter() - start
+        return {"seconds": elapsed, "items": catalog.size, "bytes": os.path.getsize(config.HTML_OUTPUT_FILENAME)}
+
+def bench_parse_measurement_scenario(catalog: SyntheticCatalog, server: StubServer) -> dict:
+    """
+    Runs the parse_measurement micro-benchmark with 50 lines per catalog recipe.
+    """
+    lines = max(catalog.size * 50, 10000)
+    results = bench_parse_measurement.run(lines, 2000)
+    return {"seconds": results["memoized"], "items": lines, "variants": results}
+
+def bench_highlight_actions_scenario(catalog: SyntheticCatalog, server: StubServer) -> dict:
+    """
+    Runs the highlight_actions micro-benchmark with one instruction text per catalog recipe.
+    """
+    results = bench_highlight_actions.run(max(catalog.size, 1000), 150)
+    return {"seconds": results["action_highlighter"], "items": max(catalog.size, 1000), "variants": results}
+
+def bench_query_service_scenario(catalog: SyntheticCatalog, server: StubServer) -> dict:
+    """
+    Load-tests the query service over a catalog of the same size for a few seconds.
+    """
+    results = load_test_service.run(catalog.size, clients=8, seconds=3.0)
+    return {"seconds": results["seconds"], "items": results["requests"], "load_test": results}
+
+def bench_recipe_model_scenario(catalog: SyntheticCatalog, server: StubServer) -> dict:
+    """
+    Runs the Recipe model micro-benchmark with at least 100k recipes.
+    """
+    results = bench_recipe_model.run(max(catalog.size, 100_000))
+    return {"seconds": results["recipe_parse_seconds"], "items": results["recipes"], "variants": results}
+
+_SCENARIO_FUNCTIONS = {
+    "end_to_end": bench_end_to_end,
+    "end_to_end_cached": bench_end_to_end_cached,
+    "ingest": bench_ingest,
+    "export_xml": bench_export_xml,
+    "transform_html": bench_transform_html,
+    "parse_measurement": bench_parse_measurement_scenario,
+    "highlight_actions": bench_highlight_actions_scenario,
+    "query_service": bench_query_service_scenario,
+    "recipe_model": bench_recipe_model_scenario,
+}
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Prints the change of every scenario against a previous results file.
+
+    Args:
+        results: The results of this run.
+        baseline: The results of an earlier run.
+        threshold: Relative increase in time per item (e.g. 0.1 for 10%) reported as a regression.
+
+    Returns:
+        The names of the scenarios that regressed.
+    """
+    regressions = []
+    print(f"\nCompared with {baseline.get('git_commit') or 'baseline'} ({baseline.get('timestamp')}):")
+    for name, result in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            print(f"  {name:<18} {result['seconds']:.3f}s (new)")
+            continue
+        # Compare throughput, so runs over catalogs of different sizes stay comparable
+        change = previous["items_per_second"] / result["items_per_second"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  <-- REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<18} {previous['items_per_second']:,.0f} -> {result['items_per_second']:,.0f} items/sec "
+              f"({change:+.1%} time per item){flag}")
+    return regressions
+
+def main():
+    """
+    Runs the benchmark scenarios against a local stub of TheMealDB and
+    CalorieNinjas, and records the results as JSON.
+    """
+    parser = argparse.ArgumentParser(description="Run the recipe pipeline benchmarks against a local stub server.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--categories", type=int, default=5, help="Categories in the synthetic catalog.")
+    parser.add_argument("--recipes-per-category", type=int, default=40, help="Recipes per category.")
+    parser.add_argument("--ingredients", type=int, default=10, help="Ingredients per recipe (at most 20).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every MealDB response.")
+    parser.add_argument("--nutrition-latency", type=float, default=None, help="Seconds added to every nutrition response.")
+    parser.add_argument("--nutrition-rate", type=float, default=None,
+                        help="CalorieNinjas requests per second (default: unthrottled against the stub).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; the fastest one is reported.")
+    parser.add_argument("--output", default=None,
+                        help="Results file (default: benchmarks/results/<timestamp>.json).")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown reported as a regression.")
+    args = parser.parse_args()
+
+    metrics.configure_logging("WARNING")
+    errors = _ErrorRecorder()
+    logging.getLogger().addHandler(errors)
+    if args.nutrition_rate:
+        data_processor._nutrition_rate_limiter = data_processor.TokenBucket(args.nutrition_rate, config.CALORIENINJAS_BURST)
+    else:
+        data_processor._nutrition_rate_limiter = data_processor.TokenBucket(float("inf"), 1)
+
+    catalog = SyntheticCatalog(args.categories, args.recipes_per_category, args.ingredients)
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "scenarios": {},
+    }
+    original_cwd = os.getcwd()
+    failed = []
+    with StubServer(catalog, args.latency, args.nutrition_latency) as server:
+        for name in args.scenarios:
+            runs = []
+            errors.records.clear()
+            for _ in range(args.repeat):
+                runs.append(_SCENARIO_FUNCTIONS[name](catalog, server))
+                os.chdir(original_cwd)
+            if errors.records:
+                print(f"{name:<18} FAILED: {len(errors.records)} errors logged, "
+                      f"first: {errors.records[0].getMessage()}")
+                failed.append(name)
+                continue
+            best = min(runs, key=lambda run: run["seconds"])
+            best["runs"] = [run["seconds"] for run in runs]
+            best["items_per_second"] = best["items"] / best["seconds"] if best["seconds"] else None
+            results["scenarios"][name] = best
+            print(f"{name:<18} {best['seconds']:.3f}s ({best['items_per_second']:,.0f} items/sec)")
+
+    output = args.output or os.path.join(REPO_ROOT, "benchmarks", "results",
+                                         f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+    if failed or regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CATEGORY_NAMES = [
+    "Beef", "Chicken", "Dessert", "Lamb", "Miscellaneous", "Pasta", "Pork", "Seafood",
+    "Side", "Starter", "Vegan", "Vegetarian", "Breakfast", "Goat"
+]
+AREAS = ["British", "Italian", "Indian", "Mexican", "Japanese", "French", "Moroccan"]
+TAGS = ["Meat", "Casserole", "Curry", "Spicy", "Baking", "Soup", "Streetfood", "Vegetarian", "Pie"]
+MEASURES = ["1 cup", "2 tbs", "1 tsp", "200ml", "500g", "1/2 cup", "3 cloves", "pinch", "2", "1½ cups", "1 lb", ""]
+INGREDIENTS = [
+    "flour", "salt", "olive oil", "garlic", "chicken breast", "butter", "sugar", "milk", "onion",
+    "black pepper", "rice", "lemon juice", "parsley", "beef stock", "tomatoes", "eggs", "cumin", "ginger"
+]
+INSTRUCTION_SENTENCES = [
+    "Preheat the oven to 200C.", "In a large bowl, mix the flour and sugar.", "Stir-fry the onions until golden.",
+    "Drain and set aside.", "Season with salt and pepper.", "Bring to a boil and simmer for 20 minutes.",
+    "Whisk the eggs and fold into the batter.", "Serve hot with rice and garnish with chopped parsley."
+]
+
+class SyntheticCatalog:
+    """
+    A deterministic catalog of recipes in TheMealDB JSON format.
+
+    Recipes are generated on demand from their ID, so even very large
+    catalogs take no memory beyond the category listings. Image URLs point
+    below `image_base_url`.
+    """
+
+    def __init__(self, categories: int = 5, recipes_per_category: int = 20,
+                 ingredients_per_recipe: int = 10, seed: int = 0, image_base_url: str = "https://example.com/"):
+        self.categories = [
+            CATEGORY_NAMES[i] if i < len(CATEGORY_NAMES) else f"Category{i}" for i in range(categories)
+        ]
+        self.recipes_per_category = recipes_per_category
+        self.ingredients_per_recipe = min(ingredients_per_recipe, 20)
+        self.seed = seed
+        self.image_base_url = image_base_url
+
+    @property
+    def size(self) -> int:
+        return len(self.categories) * self.recipes_per_category
+
+    def recipe_ids(self, category: str) -> list[str]:
+        index = self.categories.index(category)
+        return [str(100000 + index * self.recipes_per_category + i) for i in range(self.recipes_per_category)]
+
+    def listing(self, category: str) -> list[dict]:
+        """
+        Returns the filter.php entries of a category.
+        """
+        if category not in self.categories:
+            return []
+        return [
+            {"strMeal": f"Recipe {recipe_id}", "strMealThumb": f"{self.image_base_url}{recipe_id}.jpg",
+             "idMeal": recipe_id}
+            for recipe_id in self.recipe_ids(category)
+        ]
+
+    def recipe(self, recipe_id: str) -> dict | None:
+        """
+        Returns the lookup.php details of a recipe, or None if it does not exist.
+        """
+        if not recipe_id.isdigit():
+            return None
+        offset = int(recipe_id) - 100000
+        if not 0 <= offset < self.size:
+            return None
+        rng = random.Random(f"{self.seed}:{recipe_id}")
+        recipe = {
+            "idMeal": recipe_id,
+            "strMeal": f"Recipe {recipe_id}",
+            "strCategory": self.categories[offset // self.recipes_per_category],
+            "strArea": rng.choice(AREAS),
+            "strInstructions": " ".join(rng.choices(INSTRUCTION_SENTENCES, k=rng.randint(4, 12))),
+            "strMealThumb": f"{self.image_base_url}{recipe_id}.jpg",
+            "strTags": ",".join(rng.sample(TAGS, rng.randint(0, 3))) or None,
+            "strYoutube": f"https://www.youtube.com/watch?v={recipe_id}" if rng.random() < 0.8 else "",
+        }
+        for i in range(1, 21):
+            has_ingredient = i <= self.ingredients_per_recipe
+            recipe[f"strIngredient{i}"] = rng.choice(INGREDIENTS) if has_ingredient else ""
+            recipe[f"strMeasure{i}"] = rng.choice(MEASURES) if has_ingredient else ""
+        return recipe
+
+def image_bytes(name: str, distinct: int = 50) -> bytes:
+    """
+    Returns the content of a synthetic JPEG image. Only `distinct` different
+    images exist, so recipes share images as real catalogs do.
+    """
+    variant = sum(map(ord, name)) % distinct
+    return b"\xff\xd8\xff\xe0" + hashlib.sha256(str(variant).encode()).digest() * 512 + b"\xff\xd9"
+
+def _nutrition_items(query: str) -> list[dict]:
+    """
+    Answers a CalorieNinjas query with one item per comma-separated food,
+    named after the last word of the line as the real API does.
+    """
+    items = []
+    for line in query.split(","):
+        words = line.split()
+        if words:
+            name = words[-1].lower()
+            items.append({"name": name, "calories": float(sum(map(ord, name)) % 400), "serving_size_g": 100.0})
+    return items
+
+class StubServer:
+    """
+    A local HTTP server that mimics TheMealDB (list.php, filter.php, lookup.php),
+    its recipe images (/images/) and CalorieNinjas (/v1/nutrition) on a
+    SyntheticCatalog, with optional artificial latency per request. The
+    catalog's image URLs are pointed at the server.
+
+    MealDB responses carry an ETag and Last-Modified, and conditional requests
+    for unchanged responses are answered with 304 Not Modified (counted in
+    `not_modified`). Set `validators` to False to mimic a server without them.
+
+    Set `fault` to a function of (endpoint, query) to inject failures: a
+    (status, body) it returns is sent instead of the normal response, while
+    None lets the request through. The request is counted either way.
+    """
+
+    def __init__(self, catalog: SyntheticCatalog, latency: float = 0.0,
+                 nutrition_latency: float | None = None, port: int = 0):
+        self.catalog = catalog
+        self.latency = latency
+        self.nutrition_latency = latency if nutrition_latency is None else nutrition_latency
+        self.requests = Counter()
+        self.not_modified = Counter()
+        self.validators = True
+        self.fault = None
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+        catalog.image_base_url = f"{self.base_url}/images/"
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def mealdb_url(self) -> str:
+        return f"{self.base_url}/api/json/v1/1/"
+
+    @property
+    def nutrition_url(self) -> str:
+        return f"{self.base_url}/v1/nutrition"
+
+    def _respond(self, path: str, query: dict) -> tuple[int, dict | None]:
+        endpoint = path.rsplit("/", 1)[-1]
+        with self._lock:
+            self.requests[endpoint] += 1
+        if self.fault and (response := self.fault(endpoint, query)) is not None:
+            return response
+        if endpoint == "nutrition":
+            time.sleep(self.nutrition_latency)
+            return 200, {"items": _nutrition_items(query.get("query", [""])[0])}
+        time.sleep(self.latency)
+        if endpoint == "list.php":
+            return 200, {"meals": [{"strCategory": category} for category in self.catalog.categories]}
+        if endpoint == "filter.php":
+            return 200, {"meals": self.catalog.listing(query.get("c", [""])[0]) or None}
+        if endpoint == "lookup.php":
+            recipe = self.catalog.recipe(query.get("i", [""])[0])
+            return 200, {"meals": [recipe] if recipe else None}
+        return 404, None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive, like the real APIs
+            disable_nagle_algorithm = True # Headers and body are separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.startswith("/images/"):
+                    self._send_image(url.path.rsplit("/", 1)[-1])
+                    return
+                status, body = server._respond(url.path, parse_qs(url.query))
+                payload = json.dumps(body).encode() if body is not None else b""
+                if status == 200 and server.validators and not url.path.endswith("/nutrition"):
+                    etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        with server._lock:
+                            server.not_modified[url.path.rsplit("/", 1)[-1]] += 1
+                        status, payload = 304, b""
+                    self.send_response(status)
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", server.last_modified)
+                else:
+                    self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_image(self, name: str):
+                with server._lock:
+                    server.requests["images"] += 1
+                payload = image_bytes(name)
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    """
+    Serves a synthetic catalog until interrupted, e.g. to point config.py at it by hand.
+    """
+    parser = argparse.ArgumentParser(description="Serve a synthetic TheMealDB/CalorieNinjas catalog locally.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--categories", type=int, default=5)
+    parser.add_argument("--recipes-per-category", type=int, default=20)
+    parser.add_argument("--ingredients", type=int, default=10, help="Ingredients per recipe (at most 20).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every MealDB response.")
+    parser.add_argument("--nutrition-latency", type=float, default=None, help="Seconds added to every nutrition response.")
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(args.categories, args.recipes_per_category, args.ingredients)
+    server = StubServer(catalog, args.latency, args.nutrition_latency, args.port)
+    print(f"Serving {catalog.size} recipes.")
+    print(f"  MEALDB_API_BASE_URL = \"{server.mealdb_url}\"")
+    print(f"  CALORIENINJAS_API_URL = \"{server.nutrition_url}\"")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
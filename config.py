@@ -7,16 +7,101 @@ CALORIENINJAS_API_URL = "https://api.calorieninjas.com/v1/nutrition"
 # API Keys (Replace "YOUR_API_KEY" with your actual key if needed)
 CALORIENINJAS_API_KEY = ""
 
-# Data Limits for Fetching
+# Data Limits for Fetching (set to None to fetch everything)
 CATEGORIES_LIMIT = 5
 RECIPES_PER_CATEGORY = 2
 
 # Output File Names
 DATABASE_NAME = "recipes.db"
 JSON_OUTPUT_FILENAME_PREFIX = "limited_themealdb_recipes_"
+JSON_OUTPUT_COMPRESSION = None # JSON Lines output compression: None, "gzip" or "zstd" (needs the zstandard package)
 XML_OUTPUT_FILENAME = "recipes.xml"
 XSLT_FILENAME = "recipes.xslt"
 HTML_OUTPUT_FILENAME = "recipes.html"
+HTML_OUTPUT_DIR = "recipes_html" # Used instead of HTML_OUTPUT_FILENAME when HTML_PAGE_SIZE is set
 
-# API Rate Limiting (seconds) - Be gentle with free APIs
-CALORIENINJAS_API_DELAY = 0.5 # Delay for CalorieNinjas API calls
\ No newline at end of file
+# HTML Rendering
+HTML_PAGE_SIZE = None # Recipes per HTML page; None renders a single HTML_OUTPUT_FILENAME
+RENDER_WORKERS = None # Render processes for paginated output; None uses all CPUs
+FRAGMENT_CACHE_DB = "fragment_cache.db" # Rendered per-recipe fragments; None re-renders everything each run
+CATALOG_SUMMARY_TOP = 5 # Categories, areas and ingredients listed in the HTML summary header; 0 omits the header
+
+# XML Export
+XML_EXPORT_CHUNK_SIZE = 500 # Recipes read from the database at a time during XML export
+
+# Ingredient Parsing
+MEASUREMENT_CACHE_SIZE = 65536 # Distinct ingredient lines whose parse results are memoized
+
+# Instruction Highlighting (None uses data_processor.DEFAULT_ACTION_VERBS)
+ACTION_VERBS = None
+
+# API Rate Limiting - Be gentle with free APIs
+CALORIENINJAS_RATE_LIMIT = 2.0 # Sustained CalorieNinjas requests per second
+CALORIENINJAS_BURST = 5 # Requests allowed back-to-back before throttling kicks in
+CALORIENINJAS_BATCH_SIZE = 20 # Ingredients packed into a single nutrition query
+CALORIENINJAS_MAX_QUERY_CHARS = 1500 # Query length limit of the CalorieNinjas API
+
+# Persistent Nutrition Cache (set NUTRITION_CACHE_DB to None to disable)
+NUTRITION_CACHE_DB = "nutrition_cache.db"
+NUTRITION_CACHE_TTL = 30 * 24 * 60 * 60 # Seconds before a cached calorie value is fetched again
+NUTRITION_CACHE_NEGATIVE_TTL = None # Seconds before a line the API had no data for is asked again; None uses the TTL above
+NUTRITION_CACHE_MAX_ENTRIES = 100000 # Least recently used entries are evicted beyond this
+
+# Offline Nutrition Table (set NUTRITION_TABLE_DB to None to disable)
+NUTRITION_TABLE_CSV = "nutrition_table.csv" # Calories per 100 g; re-imported whenever the file changes
+NUTRITION_TABLE_DB = "nutrition_table.db"
+NUTRITION_FUZZY_CUTOFF = 0.85 # Similarity (0-1) needed to correct a misspelled food word; 1 disables fuzzy matching
+NUTRITION_API_FALLBACK = True # Query CalorieNinjas for foods missing from the table; False runs fully offline
+
+# Crawl Checkpointing
+CHECKPOINT_INTERVAL = 100 # Recipes fetched and stored between checkpoints of a resumable crawl
+
+# Crawl Pipeline (listing -> details -> enrichment stages feeding a single database writer)
+PIPELINE_LISTING_WORKERS = 4 # Category listings fetched concurrently
+PIPELINE_DETAIL_WORKERS = 8 # Recipe detail requests in flight at once
+PIPELINE_ENRICH_WORKERS = 2 # Concurrent nutrition lookups
+PIPELINE_ENRICH_BATCH_SIZE = 50 # Recipes whose ingredients are looked up together
+PIPELINE_QUEUE_SIZE = 200 # Items buffered between two stages before the earlier one waits
+PIPELINE_REORDER_WINDOW = 1000 # Recipes the listing stage may run ahead of the oldest one not yet handed to the writer
+
+# Database Write Settings
+DB_BATCH_SIZE = 500 # Recipes written per transaction
+SQLITE_CACHE_SIZE_KB = 65536 # Page cache size per connection
+
+# Logging and Metrics
+LOG_LEVEL = "INFO" # Minimum level of log messages: DEBUG, INFO, WARNING or ERROR
+LOG_FORMAT = "text" # "text" for readable lines, "json" for one JSON object per line
+METRICS_REPORT_FILE = "run_metrics.json" # JSON report of timings and counters per run; None disables it
+METRICS_PROMETHEUS_FILE = None # Prometheus textfile (e.g. for node_exporter); None disables it
+
+# Query Service (python query_service.py)
+QUERY_SERVICE_HOST = "127.0.0.1"
+QUERY_SERVICE_PORT = 8080
+QUERY_SERVICE_WORKERS = 16 # Connections served at once, each with its own read-only database connection
+QUERY_SERVICE_CACHE_SIZE = 4096 # Encoded responses kept in memory (least recently used are evicted)
+QUERY_SERVICE_IDLE_TIMEOUT = 15 # Seconds before an idle keep-alive connection is closed, freeing its worker
+QUERY_SERVICE_VERSION_CHECK_INTERVAL = 0.5 # Seconds between checks for writes by an ingest run
+QUERY_SERVICE_MAX_RESULTS = 100 # Largest 'limit' accepted by /search and 'top' by /stats
+
+# HTTP Response Cache for TheMealDB (set HTTP_CACHE_DB to None to disable)
+HTTP_CACHE_DB = "http_cache.db"
+HTTP_CACHE_TTLS = { # Seconds a cached response is used before it is revalidated, per endpoint
+    "list.php": 7 * 24 * 60 * 60,
+    "filter.php": 24 * 60 * 60,
+    "lookup.php": 30 * 24 * 60 * 60,
+}
+HTTP_CACHE_DEFAULT_TTL = 24 * 60 * 60 # For endpoints missing from HTTP_CACHE_TTLS
+HTTP_CACHE_ONLY = False # Answer only from the cache and never touch the network (script.py --cache-only)
+
+# Image Mirroring (set ASSET_DIR to None to link the remote images instead)
+ASSET_DIR = "assets" # Content-addressed local copies of the recipe images, referenced by the XML/HTML export
+ASSET_DOWNLOAD_WORKERS = 8 # Image downloads in flight at once
+ASSET_MAX_BYTES = 10 * 1024 * 1024 # Larger images are not mirrored
+ASSET_THUMBNAIL_SIZE = (320, 320) # Bounding box of the generated thumbnails (needs Pillow); None disables them
+
+# HTTP Client Settings for TheMealDB
+HTTP_TIMEOUT = 10 # Seconds to wait for a connection or response before giving up
+HTTP_MAX_RETRIES = 3 # Retries for connection errors and 429/5xx responses
+HTTP_BACKOFF_FACTOR = 0.5 # Sleeps 0.5s, 1s, 2s, ... between retries
+HTTP_POOL_SIZE = 16 # Keep-alive connections kept open per host
+MAX_CONCURRENT_REQUESTS = 8 # Default for requests in flight at once in fetch_recipe_details_many
@@ -1,82 +1,115 @@
-import json
+import hashlib
+import logging
 import re
-import requests
-import urllib.parse
+import threading
 import time
-import config # Import config for CalorieNinjas API key and delay
-
-def save_to_json(data: dict, filename: str):
+from collections.abc import Iterable
+from functools import lru_cache
+from operator import itemgetter
+from typing import NamedTuple
+import config # Import config for CalorieNinjas API key and rate limits
+import metrics
+from nutrition_cache import NutritionCache
+from nutrition_table import NutritionTable
+from recipe_model import Recipe
+
+logger = logging.getLogger(__name__)
+
+def parse_ingredients(recipe: Recipe) -> str:
     """
-    Saves data to a JSON file.
+    Formats the ingredients of a recipe with their measurements.
 
     Args:
-        data: The dictionary data to save.
-        filename: The name of the JSON file.
+        recipe: The recipe.
+
+    Returns:
+        A comma-separated string of ingredients and their measurements.
+        Returns an empty string if the recipe has no ingredients.
     """
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"Data saved to {filename}")
-    except IOError as e:
-        print(f"Error saving data to JSON file '{filename}': {e}")
+    return ", ".join(
+        f"{measure} {ingredient}" if measure else ingredient # Just the ingredient if measure is missing
+        for measure, ingredient in zip(recipe.measures, recipe.ingredients)
+    )
 
-def parse_ingredients(recipe_data: dict) -> str:
+def hash_ingredients(ingredients_str: str) -> str:
     """
-    Extracts and formats ingredients with measurements from recipe data.
+    Computes a content hash of an ingredients string, used to detect whether a
+    recipe's ingredients (and therefore its calories) changed.
 
     Args:
-        recipe_data: A dictionary containing recipe details from TheMealDB API.
+        ingredients_str: A comma-separated string of ingredients.
 
     Returns:
-        A comma-separated string of ingredients and their measurements.
-        Returns an empty string if recipe_data is invalid or no ingredients found.
+        The hex SHA-256 digest of the ingredients string.
     """
-    if not isinstance(recipe_data, dict):
-        return ""
-
-    ingredients = []
-    for i in range(1, 21): # TheMealDB API provides up to 20 ingredients
-        ingredient = recipe_data.get(f'strIngredient{i}', '').strip()
-        measure = recipe_data.get(f'strMeasure{i}', '').strip()
-        if ingredient and measure:
-            ingredients.append(f"{measure} {ingredient}")
-        elif ingredient: # Just the ingredient if measure is missing
-            ingredients.append(ingredient)
-    return ", ".join(ingredients)
+    return hashlib.sha256(ingredients_str.encode('utf-8')).hexdigest()
 
-def parse_measurement(measure_str: str) -> tuple[str, str, str]:
+def hash_content(*values) -> str:
     """
-    Separates quantity, unit, and item from a raw measurement string.
+    Computes a content hash over several values, used to detect whether a
+    recipe's rendered content changed.
 
     Args:
-        measure_str: The full measurement string (e.g., "1 cup flour", "2 large eggs").
+        *values: The values to hash; None and numbers are hashed by their string form.
 
     Returns:
-        A tuple containing (quantity, unit, item).
+        The hex SHA-256 digest of the values.
+    """
+    return hashlib.sha256("\x1f".join(map(str, values)).encode('utf-8')).hexdigest()
+
+# Common unit abbreviations and their full forms
+UNIT_MAPPING = {
+    'tbs': 'tablespoon', 'tbsp': 'tablespoon', 'tablespoons': 'tablespoon',
+    'tsp': 'teaspoon', 'teaspoons': 'teaspoon',
+    'ml': 'milliliter', 'l': 'liter', 'g': 'gram', 'kg': 'kilogram',
+    'cup': 'cup', 'cups': 'cup', 'pinch': 'pinch', 'dash': 'dash',
+    'oz': 'ounce', 'lb': 'pound', 'clove': 'clove', 'head': 'head',
+    'sprig': 'sprig', 'stalk': 'stalk', 'can': 'can', 'packet': 'packet',
+    'slice': 'slice', 'slices': 'slice', 'piece': 'piece', 'pieces': 'piece',
+    'sheet': 'sheet', 'sheets': 'sheet', 'bottle': 'bottle'
+}
+
+# Version of the parse_measurement output, part of the key of cached rendered
+# fragments. Bump it whenever the parsing changes.
+PARSER_VERSION = 2
+
+_UNICODE_FRACTIONS = "\u00bc\u00bd\u00be\u2150-\u215e" # ¼ ½ ¾ ⅐ ... ⅞
+
+# Quantity at the beginning: "1 1/2", "1/2", "2.5", "1½", "½" or "200" (also when a unit
+# follows without a space, as in "200ml"). Unicode fractions are listed before plain
+# integers so "1½" is kept whole.
+_QUANTITY_PATTERN = re.compile(
+    rf'^(\d+\s*\d*/\d*|\d+\.\d+|\d*\s?[{_UNICODE_FRACTIONS}]|\d+)\s*(.*)$',
+    re.DOTALL
+)
+
+class ParsedMeasurements(NamedTuple):
+    """
+    Columnar result of parse_measurements: one tuple per field, aligned by line.
+    """
+    quantities: tuple[str, ...]
+    units: tuple[str, ...]
+    items: tuple[str, ...]
+
+def _lookup_unit(part: str) -> str | None:
+    """
+    Returns the full unit name for a word, or None if it is not a known unit.
+    """
+    lower_part = part.lower()
+    # Remove 's' to match singular units, then check for an exact match (e.g., "cups")
+    return UNIT_MAPPING.get(lower_part.rstrip('s')) or UNIT_MAPPING.get(lower_part)
+
+@lru_cache(maxsize=config.MEASUREMENT_CACHE_SIZE)
+def _parse_measurement_cached(measure_str: str) -> tuple[str, str, str]:
+    """
+    Parses an already stripped measurement string; memoized by the raw string.
     """
-    measure_str = measure_str.strip()
     if not measure_str:
         return "", "", ""
 
-    # Common unit abbreviations and their full forms
-    unit_mapping = {
-        'tbs': 'tablespoon', 'tbsp': 'tablespoon', 'tablespoons': 'tablespoon',
-        'tsp': 'teaspoon', 'teaspoons': 'teaspoon',
-        'ml': 'milliliter', 'l': 'liter', 'g': 'gram', 'kg': 'kilogram',
-        'cup': 'cup', 'cups': 'cup', 'pinch': 'pinch', 'dash': 'dash',
-        'oz': 'ounce', 'lb': 'pound', 'clove': 'clove', 'head': 'head',
-        'sprig': 'sprig', 'stalk': 'stalk', 'can': 'can', 'packet': 'packet',
-        'slice': 'slice', 'slices': 'slice', 'piece': 'piece', 'pieces': 'piece',
-        'sheet': 'sheet', 'sheets': 'sheet', 'bottle': 'bottle'
-    }
-
-    # Regex to find quantity at the beginning (e.g., "1", "1/2", "2.5")
-    # It handles whole numbers, fractions, and decimals.
-    quantity_match = re.match(r'^(\d+\s*\d*/\d*|\d+\.\d+|\d+)\s*(.*)$', measure_str)
-
     quantity = ""
     remainder = measure_str
-
+    quantity_match = _QUANTITY_PATTERN.match(measure_str)
     if quantity_match:
         quantity = quantity_match.group(1).strip()
         remainder = quantity_match.group(2).strip()
@@ -85,100 +118,538 @@ def parse_measurement(measure_str: str) -> tuple[str, str, str]:
     remainder_parts = remainder.split()
 
     unit = ""
-    item_parts = []
-    found_unit = False
-
+    item_parts = remainder_parts
     for i, part in enumerate(remainder_parts):
-        lower_part = part.lower().rstrip('s') # Remove 's' to match singular units
-        if lower_part in unit_mapping:
-            unit = unit_mapping[lower_part] # Use the full form from mapping
+        full_unit = _lookup_unit(part)
+        if full_unit:
+            unit = full_unit # Use the full form from mapping
             item_parts = remainder_parts[i+1:]
-            found_unit = True
             break
-        elif part.lower() in unit_mapping: # Check for exact match first (e.g., "cups")
-            unit = unit_mapping[part.lower()]
-            item_parts = remainder_parts[i+1:]
-            found_unit = True
-            break
-        else:
-            item_parts.append(part)
 
-    item = " ".join(item_parts).strip()
+    return quantity, unit, " ".join(item_parts)
 
-    # Edge case: If quantity was extracted but no clear unit, and the remainder looks like an item
-    # This also helps if the "unit" was actually part of the item, like "large" or "small"
-    if not found_unit and remainder_parts and item == "":
-        # If no unit was found, the whole remainder is the item
-        item = remainder
+def parse_measurement(measure_str: str) -> tuple[str, str, str]:
+    """
+    Separates quantity, unit, and item from a raw measurement string.
+    Results are memoized, since the same lines repeat across recipes.
 
-    # Another edge case: If the original string was just a quantity and unit like "200ml"
-    if not item and quantity and unit and measure_str.lower().startswith(f"{quantity.lower()}{unit.lower()}"):
-        item = unit
-        unit = ""
+    Args:
+        measure_str: The full measurement string (e.g., "1 cup flour", "2 large eggs",
+            "200ml milk", "½ tsp salt").
 
+    Returns:
+        A tuple containing (quantity, unit, item).
+    """
+    return _parse_measurement_cached(measure_str.strip())
 
-    return quantity, unit, item
+def _publish_parse_cache_stats():
+    info = _parse_measurement_cached.cache_info()
+    metrics.set_gauge("parse_measurement_cache_hits", info.hits)
+    metrics.set_gauge("parse_measurement_cache_misses", info.misses)
+    metrics.set_gauge("parse_measurement_cache_entries", info.currsize)
 
+metrics.register_collector(_publish_parse_cache_stats)
 
-def calculate_calories(ingredients_str: str) -> str | int:
+def parse_measurements(measure_strs: Iterable[str]) -> ParsedMeasurements:
     """
-    Calculates total calories by querying a nutrition API for each ingredient.
+    Parses many measurement strings at once.
 
     Args:
-        ingredients_str: A comma-separated string of ingredients.
+        measure_strs: The measurement strings to parse.
 
     Returns:
-        The total calculated calories as an integer, or a descriptive string if
-        API queries fail.
+        A ParsedMeasurements with the quantities, units and items of all lines,
+        in input order.
+    """
+    parsed = list(map(_parse_measurement_cached, map(str.strip, measure_strs)))
+    return ParsedMeasurements(
+        tuple(map(itemgetter(0), parsed)),
+        tuple(map(itemgetter(1), parsed)),
+        tuple(map(itemgetter(2), parsed)),
+    )
+
+class TokenBucket:
     """
-    if not ingredients_str:
-        return "N/A"
+    A thread-safe token-bucket rate limiter.
 
-    ingredients = [ing.strip() for ing in ingredients_str.split(",") if ing.strip()]
-    if not ingredients:
-        return "N/A"
+    Up to `capacity` calls may proceed back-to-back; after that, callers are
+    throttled to `rate` calls per second. Callers only sleep when the bucket is
+    actually empty.
+    """
 
-    total_calories = 0
-    failed_queries = 0
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes one token from the bucket, sleeping until one is available.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            metrics.increment("rate_limit_wait_seconds_total", wait)
+            time.sleep(wait)
+
+_nutrition_rate_limiter = TokenBucket(config.CALORIENINJAS_RATE_LIMIT, config.CALORIENINJAS_BURST)
+
+# Calories per normalized ingredient line for the current run (None means the API knows no such food)
+_calorie_cache: dict[str, float | None] = {}
+_calorie_cache_lock = threading.Lock()
+
+_nutrition_cache = None
+_nutrition_cache_lock = threading.Lock()
+
+def get_nutrition_cache() -> NutritionCache | None:
+    """
+    Returns the persistent nutrition cache, opening it on first use.
 
+    Returns:
+        The shared NutritionCache, or None if config.NUTRITION_CACHE_DB is not set.
+    """
+    global _nutrition_cache
+    with _nutrition_cache_lock:
+        if _nutrition_cache is None and config.NUTRITION_CACHE_DB:
+            _nutrition_cache = NutritionCache(
+                config.NUTRITION_CACHE_DB,
+                config.NUTRITION_CACHE_TTL,
+                config.NUTRITION_CACHE_MAX_ENTRIES,
+                config.NUTRITION_CACHE_NEGATIVE_TTL,
+            )
+        return _nutrition_cache
+
+def close_nutrition_cache():
+    """
+    Closes the persistent nutrition cache, if it was opened.
+    """
+    global _nutrition_cache
+    with _nutrition_cache_lock:
+        if _nutrition_cache is not None:
+            _nutrition_cache.close()
+            _nutrition_cache = None
+
+_nutrition_table = None
+_nutrition_table_lock = threading.Lock()
+
+def get_nutrition_table() -> NutritionTable | None:
+    """
+    Returns the offline nutrition table, opening it on first use and importing
+    config.NUTRITION_TABLE_CSV if it is new or changed.
+
+    Returns:
+        The shared NutritionTable, or None if config.NUTRITION_TABLE_DB is not set.
+    """
+    global _nutrition_table
+    with _nutrition_table_lock:
+        if _nutrition_table is None and config.NUTRITION_TABLE_DB:
+            _nutrition_table = NutritionTable(config.NUTRITION_TABLE_DB, config.NUTRITION_FUZZY_CUTOFF)
+            if config.NUTRITION_TABLE_CSV:
+                _nutrition_table.import_csv_if_changed(config.NUTRITION_TABLE_CSV)
+        return _nutrition_table
+
+def close_nutrition_table():
+    """
+    Closes the offline nutrition table, if it was opened.
+    """
+    global _nutrition_table
+    with _nutrition_table_lock:
+        if _nutrition_table is not None:
+            _nutrition_table.close()
+            _nutrition_table = None
+
+def reset_caches():
+    """
+    Forgets the in-memory state kept between calls: the calories looked up in
+    this run, the memoized measurement parses and the action highlighter, which
+    is rebuilt from config.ACTION_VERBS on next use.
+    """
+    global _action_highlighter
+    with _calorie_cache_lock:
+        _calorie_cache.clear()
+    _parse_measurement_cached.cache_clear()
+    _action_highlighter = None
+
+def estimate_calories_offline(ingredients: list[str]) -> list[float | None]:
+    """
+    Estimates the calories of raw ingredient lines from the offline nutrition
+    table, parsing all lines in one columnar pass.
+
+    Args:
+        ingredients: Raw ingredient lines (e.g. "2 tbsp olive oil"). Normalized
+            lines do not work here, as parse_measurement only knows unit abbreviations.
+
+    Returns:
+        The estimated calories of each line, or None where its food is not in the table.
+    """
+    nutrition_table = get_nutrition_table()
+    if not nutrition_table or not ingredients:
+        return [None] * len(ingredients)
+    return nutrition_table.estimate_many(*parse_measurements(ingredients))
+
+def split_ingredients(ingredients_str: str) -> list[str]:
+    """
+    Splits a comma-separated ingredients string into individual, non-empty lines.
+
+    Args:
+        ingredients_str: A comma-separated string of ingredients.
+
+    Returns:
+        A list of stripped ingredient lines.
+    """
+    return [ing.strip() for ing in ingredients_str.split(",") if ing.strip()]
+
+def _normalize_ingredient(ingredient: str) -> str:
+    """
+    Normalizes an ingredient line so equivalent lines share one nutrition lookup,
+    e.g. "2 Tbs  Olive Oil" and "2 tablespoons olive oil" both become
+    "2 tablespoon olive oil".
+    """
+    quantity, unit, item = parse_measurement(ingredient)
+    return " ".join(" ".join(filter(None, (quantity, unit, item))).lower().split())
+
+def _chunk_ingredients(ingredients: list[str]) -> list[list[str]]:
+    """
+    Packs ingredient lines into batches that respect the per-query item and length limits.
+    """
+    batches = []
+    batch = []
+    length = 0
     for ingredient in ingredients:
+        added_length = len(ingredient) + (2 if batch else 0)
+        if batch and (len(batch) >= config.CALORIENINJAS_BATCH_SIZE
+                      or length + added_length > config.CALORIENINJAS_MAX_QUERY_CHARS):
+            batches.append(batch)
+            batch = []
+            length = 0
+            added_length = len(ingredient)
+        batch.append(ingredient)
+        length += added_length
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _assign_items_to_ingredients(batch: list[str], items: list[dict]) -> dict[str, float | None]:
+    """
+    Maps the food items returned for a multi-item query back to the queried (raw) ingredient lines.
+
+    CalorieNinjas returns items in query order, each named after the food it
+    recognised (e.g. "olive oil" for "2 tbsp olive oil"). Every item is
+    credited to a line whose parsed food is exactly its name, else to a line
+    mentioning the name as whole words, and only failing both to a line
+    containing the name anywhere, so "salt" is not credited to "unsalted
+    butter". Among equally good lines, the next one in query order that has
+    no calories yet is preferred.
+    """
+    calories: dict[str, float | None] = dict.fromkeys(batch)
+    lines = [line.lower() for line in batch]
+    foods = [parse_measurement(line)[2].lower() for line in batch]
+    position = 0
+    for item in items:
+        name = str(item.get("name", "")).strip().lower()
+        if not name:
+            continue
+        word = re.compile(rf"\b{re.escape(name)}\b")
+        order = list(range(position, len(batch))) + list(range(position))
+        for matches in (
+            lambda index: foods[index] == name,
+            lambda index: word.search(lines[index]) is not None,
+            lambda index: name in lines[index],
+        ):
+            candidates = [index for index in order if matches(index)]
+            if candidates:
+                index = next((index for index in candidates if calories[batch[index]] is None), candidates[0])
+                calories[batch[index]] = (calories[batch[index]] or 0) + item["calories"]
+                position = index
+                break
+    return calories
+
+def _query_nutrition(batch: list[str]) -> dict[str, float | None]:
+    """
+    Looks up the calories of a batch of raw ingredient lines with one API request.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails.
+        ValueError: If the response is not valid JSON.
+    """
+    import api_service # Imported on first use, so stages that never query the API start without requests
+    import requests
+    headers = {"X-Api-Key": config.CALORIENINJAS_API_KEY} if config.CALORIENINJAS_API_KEY != "YOUR_API_KEY" else {}
+    _nutrition_rate_limiter.acquire()
+    name = api_service.endpoint_name(config.CALORIENINJAS_API_URL)
+    try:
+        # Share the keep-alive connection pool used for TheMealDB
+        with metrics.timer("http_request_seconds", endpoint=name):
+            response = api_service.get_session().get(
+                config.CALORIENINJAS_API_URL,
+                params={"query": ", ".join(batch)},
+                headers=headers,
+                timeout=config.HTTP_TIMEOUT,
+            )
+    except requests.exceptions.RequestException:
+        metrics.increment("http_errors_total", endpoint=name)
+        raise
+    metrics.increment("http_requests_total", endpoint=name, status=response.status_code)
+    response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+    return _assign_items_to_ingredients(batch, response.json().get("items", []))
+
+def lookup_calories(ingredients: list[str]) -> dict[str, float | None]:
+    """
+    Looks up calories for many ingredient lines, deduplicated across the whole run.
+
+    Lines that were already looked up are answered from the run cache. The rest
+    are estimated from the offline nutrition table, and only lines whose food
+    is not in the table are answered from the persistent nutrition cache or,
+    unless config.NUTRITION_API_FALLBACK is off, packed into multi-item
+    queries to the CalorieNinjas API.
+
+    Args:
+        ingredients: Raw ingredient lines (e.g. "2 tbsp olive oil").
+
+    Returns:
+        A dictionary mapping each normalized ingredient line to its calories,
+        or None if no nutrition data was found. Lines whose query failed are
+        left out so they are retried on the next lookup.
+    """
+    wanted = {} # Normalized line -> first raw line seen with it
+    for ing in ingredients:
+        if ing.strip():
+            wanted.setdefault(_normalize_ingredient(ing), ing)
+    with _calorie_cache_lock:
+        missing = [ing for ing in wanted if ing not in _calorie_cache]
+    metrics.increment("nutrition_cache_hits_total", len(wanted) - len(missing), cache="run")
+
+    # Estimate locally whatever the offline nutrition table knows
+    if missing:
+        estimates = estimate_calories_offline([wanted[ing] for ing in missing])
+        estimated = {ing: calories for ing, calories in zip(missing, estimates) if calories is not None}
+        with _calorie_cache_lock:
+            _calorie_cache.update(estimated)
+        missing = [ing for ing in missing if ing not in estimated]
+        metrics.increment("nutrition_table_hits_total", len(estimated))
+
+    # Lines not seen in this run may still be in the persistent cache
+    nutrition_cache = get_nutrition_cache()
+    if nutrition_cache and missing:
+        cached = nutrition_cache.get_many(missing)
+        with _calorie_cache_lock:
+            _calorie_cache.update(cached)
+        missing = [ing for ing in missing if ing not in cached]
+        metrics.increment("nutrition_cache_hits_total", len(cached), cache="persistent")
+    metrics.increment("nutrition_cache_misses_total", len(missing))
+    if not config.NUTRITION_API_FALLBACK:
+        missing = []
+    if missing:
+        import requests # Only needed once the API is queried
+
+    # Query the raw lines, which keep what normalizing drops (e.g. "large cans"); the normalized line stays the key
+    keys = {wanted[ing]: ing for ing in missing}
+    for batch in _chunk_ingredients(list(keys)):
         try:
-            url = f"{config.CALORIENINJAS_API_URL}?query={urllib.parse.quote(ingredient)}"
-            headers = {"X-Api-Key": config.CALORIENINJAS_API_KEY} if config.CALORIENINJAS_API_KEY != "YOUR_API_KEY" else {}
-
-            response = requests.get(url, headers=headers)
-            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-
-            items = response.json().get("items", [])
-            if items:
-                total_calories += sum(item["calories"] for item in items)
-            else:
-                failed_queries += 1
-                # print(f"  No nutrition data found for '{ingredient}'") # Optional: debug output
+            found = {keys[line]: calories for line, calories in _query_nutrition(batch).items()}
         except requests.exceptions.RequestException as e:
-            print(f"  API error for '{ingredient}': {e}")
-            failed_queries += 1
-        except json.JSONDecodeError as e:
-            print(f"  JSON decode error for '{ingredient}': {e}")
-            failed_queries += 1
-        except Exception as e:
-            print(f"  Unexpected error processing '{ingredient}': {str(e)}")
-            failed_queries += 1
-
-        # Be gentle with the API to avoid hitting rate limits
-        time.sleep(config.CALORIENINJAS_API_DELAY)
-
-    if failed_queries == len(ingredients):
-        return "N/A (all queries failed)"
-    elif failed_queries > 0:
-        # Return approximate calories if some queries failed
-        return f"{round(total_calories)} (partial)"
-    return round(total_calories)
+            logger.warning(f"API error for {len(batch)} ingredients ({', '.join(batch)}): {e}")
+            continue
+        except ValueError as e:
+            logger.warning(f"JSON decode error for {len(batch)} ingredients ({', '.join(batch)}): {e}")
+            continue
+        with _calorie_cache_lock:
+            _calorie_cache.update(found)
+        if nutrition_cache:
+            nutrition_cache.put_many(found)
+
+    with _calorie_cache_lock:
+        return {ing: _calorie_cache[ing] for ing in wanted if ing in _calorie_cache}
+
+def prefetch_calories(ingredients_strs: list[str]):
+    """
+    Looks up the ingredients of many recipes at once so that later
+    calculate_calories calls are answered from the run cache.
+
+    Args:
+        ingredients_strs: Comma-separated ingredient strings, one per recipe.
+    """
+    lookup_calories([ing for ingredients_str in ingredients_strs for ing in split_ingredients(ingredients_str)])
+
+def calculate_calories_many(ingredients_strs: list[str]) -> list[str | int]:
+    """
+    Calculates the total calories of many recipes with one lookup for all
+    their ingredient lines, then sums the lines of each recipe.
+
+    Args:
+        ingredients_strs: Comma-separated ingredient strings, one per recipe.
+
+    Returns:
+        The total calories of each recipe as an integer, or a descriptive
+        string if some or all lookups failed, in input order.
+    """
+    lines_per_recipe = [split_ingredients(ingredients_str) if ingredients_str else [] for ingredients_str in ingredients_strs]
+    all_lines = [ing for lines in lines_per_recipe for ing in lines]
+    calories = lookup_calories(all_lines)
+    line_calories = [calories.get(_normalize_ingredient(ing)) for ing in all_lines]
+
+    results = []
+    end = 0
+    for lines in lines_per_recipe:
+        start, end = end, end + len(lines)
+        if not lines:
+            results.append("N/A")
+            continue
+        known = [value for value in line_calories[start:end] if value is not None]
+        total_calories = sum(known)
+        if not known:
+            results.append("N/A (all queries failed)")
+        elif len(known) < len(lines):
+            # Return approximate calories if some queries failed
+            results.append(f"{round(total_calories)} (partial)")
+        else:
+            results.append(round(total_calories))
+    return results
+
+def calculate_calories(ingredients_str: str) -> str | int:
+    """
+    Calculates total calories from the offline nutrition table, falling back
+    to the nutrition API for ingredients it does not know.
+
+    Args:
+        ingredients_str: A comma-separated string of ingredients.
+
+    Returns:
+        The total calculated calories as an integer, or a descriptive string if
+        lookups fail.
+    """
+    return calculate_calories_many([ingredients_str])[0]
+
+# Common cooking action verbs highlighted in recipe instructions
+DEFAULT_ACTION_VERBS = (
+    # Heat-related
+    "preheat", "heat", "reheat", "warm", "toast", "bake", "broil", "grill",
+    "roast", "sear", "fry", "deep-fry", "pan-fry", "saute", "sizzle",
+    "simmer", "boil", "steam", "poach", "blanch", "scald", "reduce", "stir-fry",
+
+    # Mixing/Prep
+    "mix", "stir", "whisk", "beat", "fold", "blend", "combine", "knead",
+    "massage", "toss", "shake", "whip", "cream", "emulsify", "incorporate",
+
+    # Cutting
+    "chop", "dice", "mince", "slice", "cut", "julienne", "cube", "shred",
+    "grate", "peel", "zest", "segment", "trim", "butterfly", "fillet",
+    "core", "pit", "devein",
+
+    # Adding/Applying
+    "add", "pour", "drizzle", "sprinkle", "dust", "coat", "layer", "top",
+    "garnish", "decorate", "stuff", "fill", "insert", "inject", "apply", "spread",
+
+    # Cooking processes
+    "cook", "caramelize", "glaze", "thicken", "render", "smoke", "infuse", "steep",
+    "marinate", "brine", "cure", "ferment", "proof", "rise", "rest", "chill",
+    "freeze", "thaw", "drain", "strain", "sieve", "filter", "press", "mash",
+    "puree", "blitz", "process", "grind", "crush", "pound", "tenderize", "juice",
+
+    # Serving
+    "plate", "serve", "portion", "divide", "share", "arrange", "present",
+
+    # Specific techniques/actions from varied recipes
+    "spray", "cover", "remove", "reserve", "break", "pick", "rinse", "set",
+    "bloom", "taste", "tear", "store", "keep", "wait", "go", "settle", "jog",
+    "place", "transfer", "check", "cool", "assemble", "crimp", "bring", "allow",
+    "sit", "melt", "form", "flatten", "char", "repeat", "finish", "return", "let", "enjoy",
+    "pat", "dry", "skewer", "thread", "wrap", "roll", "brush", "baste", "scoop", "scrape",
+    "sift", "season", "salt", "pepper", "flour", "grease", "line",
+    "squeeze", "extract", "dip", "dredge", "bread", "crumb", "shape",
+    "refrigerate", "defrost", "defoliate"
+)
+
+class ActionHighlighter:
+    """
+    Wraps action verbs in instruction text with <action> tags.
+
+    The verb set is built once. Instead of trying a large regex alternation at
+    every character, the text is scanned once for words (including hyphenated
+    ones such as "stir-fry") and each word is looked up in the set.
+    """
+
+    _WORD_PATTERN = re.compile(r'\w+(?:-\w+)*')
+
+    def __init__(self, verbs: Iterable[str] = DEFAULT_ACTION_VERBS):
+        self.verbs = frozenset(verb.lower() for verb in verbs)
+
+    def _wrap_word(self, match: re.Match) -> str:
+        word = match.group(0)
+        if word.lower() in self.verbs:
+            return f"<action>{word}</action>"
+        if '-' in word:
+            # Highlight verbs inside hyphenated words, e.g. "heat" in "pre-heat", preferring
+            # the longest hyphenated verb at each part, so "stir-fry-pan" keeps "stir-fry" whole
+            parts = word.split('-')
+            highlighted = []
+            start = 0
+            while start < len(parts):
+                for end in range(len(parts), start, -1):
+                    candidate = '-'.join(parts[start:end])
+                    if candidate.lower() in self.verbs:
+                        highlighted.append(f"<action>{candidate}</action>")
+                        start = end
+                        break
+                else:
+                    highlighted.append(parts[start])
+                    start += 1
+            return '-'.join(highlighted)
+        return word
+
+    def highlight(self, instruction_text: str) -> str:
+        """
+        Highlights the action verbs of a single instruction text.
+
+        Args:
+            instruction_text: The raw instruction string.
+
+        Returns:
+            The instruction string with action verbs highlighted within <action> tags.
+        """
+        return self._WORD_PATTERN.sub(self._wrap_word, instruction_text)
+
+    def highlight_many(self, instruction_texts: Iterable[str]) -> list[str]:
+        """
+        Highlights the action verbs of many instruction texts.
+
+        Args:
+            instruction_texts: The raw instruction strings.
+
+        Returns:
+            The highlighted instruction strings, in the same order.
+        """
+        sub = self._WORD_PATTERN.sub
+        wrap_word = self._wrap_word
+        return [sub(wrap_word, text) for text in instruction_texts]
+
+_action_highlighter = None
+
+def get_action_highlighter() -> ActionHighlighter:
+    """
+    Returns the shared highlighter, built on first use from config.ACTION_VERBS
+    (or DEFAULT_ACTION_VERBS if that is not set).
+
+    Returns:
+        The shared ActionHighlighter.
+    """
+    global _action_highlighter
+    if _action_highlighter is None:
+        _action_highlighter = ActionHighlighter(config.ACTION_VERBS or DEFAULT_ACTION_VERBS)
+    return _action_highlighter
 
 def highlight_actions(instruction_text: str) -> str:
     """
     Wraps common action verbs in the instruction text with <action> tags for highlighting.
-    This uses a regex pattern to find whole words matching the action verbs.
+    Only whole words matching the action verbs are highlighted, case-insensitively.
 
     Args:
         instruction_text: The raw instruction string.
@@ -186,52 +657,4 @@ def highlight_actions(instruction_text: str) -> str:
     Returns:
         The instruction string with action verbs highlighted within <action> tags.
     """
-    action_verbs = [
-        # Heat-related
-        "preheat", "heat", "reheat", "warm", "toast", "bake", "broil", "grill",
-        "roast", "sear", "fry", "deep-fry", "pan-fry", "saute", "sizzle",
-        "simmer", "boil", "steam", "poach", "blanch", "scald", "reduce", "stir-fry",
-
-        # Mixing/Prep
-        "mix", "stir", "whisk", "beat", "fold", "blend", "combine", "knead",
-        "massage", "toss", "shake", "whip", "cream", "emulsify", "incorporate",
-
-        # Cutting
-        "chop", "dice", "mince", "slice", "cut", "julienne", "cube", "shred",
-        "grate", "peel", "zest", "segment", "trim", "butterfly", "fillet",
-        "core", "pit", "devein",
-
-        # Adding/Applying
-        "add", "pour", "drizzle", "sprinkle", "dust", "coat", "layer", "top",
-        "garnish", "decorate", "stuff", "fill", "insert", "inject", "apply", "spread",
-
-        # Cooking processes
-        "cook", "caramelize", "glaze", "thicken", "render", "smoke", "infuse", "steep",
-        "marinate", "brine", "cure", "ferment", "proof", "rise", "rest", "chill",
-        "freeze", "thaw", "drain", "strain", "sieve", "filter", "press", "mash",
-        "puree", "blitz", "process", "grind", "crush", "pound", "tenderize", "juice",
-
-        # Serving
-        "plate", "serve", "portion", "divide", "share", "arrange", "present",
-
-        # Specific techniques/actions from varied recipes
-        "spray", "cover", "remove", "reserve", "break", "pick", "rinse", "set",
-        "bloom", "taste", "tear", "store", "keep", "wait", "go", "settle", "jog",
-        "place", "transfer", "check", "cool", "assemble", "crimp", "bring", "allow",
-        "sit", "melt", "form", "flatten", "char", "repeat", "finish", "return", "let", "enjoy",
-        "pat", "dry", "skewer", "thread", "wrap", "roll", "brush", "baste", "scoop", "scrape",
-        "sift", "season", "salt", "pepper", "flour", "grease", "line", "drain", "whisk",
-        "reduce", "simmer", "boil", "fry", "bake", "roast", "grill", "steam", "stir",
-        "serve", "garnish", "chop", "dice", "mince", "slice", "cut", "peel", "grate",
-        "squeeze", "extract", "dip", "dredge", "bread", "crumb", "press", "shape", "form",
-        "refrigerate", "chill", "freeze", "thaw", "defrost", "defoliate"
-    ]
-
-    # Create a regex pattern that matches whole words only, case-insensitively
-    pattern = re.compile(r'\b(' + '|'.join(action_verbs) + r')\b', re.IGNORECASE)
-
-    # Replace matches while preserving original capitalization
-    def wrap_match(match):
-        return f"<action>{match.group(0)}</action>"
-
-    return pattern.sub(wrap_match, instruction_text)
\ No newline at end of file
+    return get_action_highlighter().highlight(instruction_text)
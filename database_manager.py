@@ -1,7 +1,17 @@
+import html
+import logging
 import sqlite3
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from itertools import islice
 from sqlite3 import Error
 import data_processor # Import data_processor for calorie calculation and ingredient parsing
 import config # Import config for database name
+import metrics
+from recipe_model import Recipe
+
+logger = logging.getLogger(__name__)
 
 def create_connection(db_file: str) -> sqlite3.Connection | None:
     """
@@ -16,12 +26,30 @@ def create_connection(db_file: str) -> sqlite3.Connection | None:
     conn = None
     try:
         conn = sqlite3.connect(db_file)
-        print(f"Connected to SQLite database: {db_file}")
+        configure_connection(conn)
+        logger.info(f"Connected to SQLite database: {db_file}")
         return conn
     except Error as e:
-        print(f"Error connecting to database '{db_file}': {e}")
+        logger.error(f"Error connecting to database '{db_file}': {e}")
     return conn
 
+def configure_connection(conn: sqlite3.Connection):
+    """
+    Tunes a connection for bulk ingest: WAL journaling so readers never block
+    the writer, NORMAL synchronous mode (safe with WAL, no fsync per commit)
+    and a larger page cache.
+
+    Args:
+        conn: The SQLite database connection object.
+    """
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(config.SQLITE_CACHE_SIZE_KB)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+    except Error as e:
+        logger.error(f"Error configuring database connection: {e}")
+
 def create_table(conn: sqlite3.Connection):
     """
     Creates the 'recipes' table in the database if it doesn't already exist.
@@ -41,65 +69,1131 @@ def create_table(conn: sqlite3.Connection):
                 image_url TEXT,
                 thumbnail_url TEXT,
                 video_url TEXT,
-                tags TEXT
+                tags TEXT,
+                ingredients_hash TEXT,
+                content_hash TEXT,
+                area TEXT
             )
         """)
+        # Databases created before content hashing was introduced lack the columns
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(recipes)")]
+        if 'ingredients_hash' not in columns:
+            cursor.execute("ALTER TABLE recipes ADD COLUMN ingredients_hash TEXT")
+        if 'content_hash' not in columns:
+            cursor.execute("ALTER TABLE recipes ADD COLUMN content_hash TEXT")
+            rows = cursor.execute(
+                "SELECT id, title, ingredients, instructions, calories, image_url, video_url FROM recipes"
+            ).fetchall()
+            cursor.executemany(
+                "UPDATE recipes SET content_hash = ? WHERE id = ?",
+                [(data_processor.hash_content(*row[1:]), row[0]) for row in rows]
+            )
+        if 'area' not in columns:
+            cursor.execute("ALTER TABLE recipes ADD COLUMN area TEXT") # Filled in by migrate_recipes
         conn.commit()
-        print("Created 'recipes' table (if it didn't exist).")
+        logger.info("Created 'recipes' table (if it didn't exist).")
+        create_normalized_tables(conn)
+        create_search_index(conn)
+        create_stats_tables(conn)
+        create_checkpoint_tables(conn)
+        create_version_table(conn)
+        create_asset_table(conn)
+        migrate_recipes(conn)
     except Error as e:
-        print(f"Error creating table: {e}")
+        logger.error(f"Error creating table: {e}")
 
-def insert_recipe(conn: sqlite3.Connection, recipe_data: dict) -> int | None:
+def create_normalized_tables(conn: sqlite3.Connection):
     """
-    Inserts or replaces recipe data into the 'recipes' table.
+    Creates the normalized ingredient, tag and category tables and their indexes.
+
+    Ingredients are stored pre-parsed into quantity, unit and item, one row per
+    ingredient line. Tags hold every entry of the comma-separated 'tags' column
+    (area, category and TheMealDB tags); categories hold the recipe category.
+    Recipe groups hold the groups the aggregate statistics are kept for (see
+    create_stats_tables).
+
+    Args:
+        conn: The SQLite database connection object.
+    """
+    try:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS recipe_ingredients (
+                recipe_id TEXT NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                quantity TEXT NOT NULL,
+                unit TEXT NOT NULL,
+                item TEXT NOT NULL COLLATE NOCASE,
+                PRIMARY KEY (recipe_id, position)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_item
+                ON recipe_ingredients(item);
+
+            CREATE TABLE IF NOT EXISTS tags (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE COLLATE NOCASE
+            );
+            CREATE TABLE IF NOT EXISTS recipe_tags (
+                recipe_id TEXT NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+                tag_id INTEGER NOT NULL REFERENCES tags(id),
+                PRIMARY KEY (recipe_id, tag_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_recipe_tags_tag ON recipe_tags(tag_id);
+
+            CREATE TABLE IF NOT EXISTS categories (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE COLLATE NOCASE
+            );
+            CREATE TABLE IF NOT EXISTS recipe_categories (
+                recipe_id TEXT NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+                category_id INTEGER NOT NULL REFERENCES categories(id),
+                PRIMARY KEY (recipe_id, category_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_recipe_categories_category ON recipe_categories(category_id);
+
+            CREATE TABLE IF NOT EXISTS recipe_groups (
+                dimension TEXT NOT NULL,
+                name TEXT NOT NULL COLLATE NOCASE,
+                recipe_id TEXT NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+                PRIMARY KEY (dimension, name, recipe_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_recipe_groups_recipe ON recipe_groups(recipe_id);
+        """)
+    except Error as e:
+        logger.error(f"Error creating normalized tables: {e}")
+
+def migrate_recipes(conn: sqlite3.Connection):
+    """
+    Migrates a database written before the normalized tables, the search
+    index, the 'area' column and the statistics existed, filling them from the
+    recipes already stored. Runs once, guarded by the schema's user_version.
+
+    Args:
+        conn: The SQLite database connection object.
+    """
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+            return
+        with conn:
+            rows = conn.execute("SELECT id, ingredients, tags FROM recipes").fetchall()
+            relations = []
+            areas = []
+            for recipe_id, ingredients_str, tags_str in rows:
+                # The tags column is "area,category,tags"; TheMealDB gives every recipe
+                # an area ("Unknown" when it has none), so the category is the second entry
+                tag_parts = (tags_str or '').split(',')
+                category = tag_parts[1] if len(tag_parts) > 1 else ''
+                relations.append((recipe_id, ingredients_str, tags_str, category, tag_parts[0]))
+                areas.append((tag_parts[0], recipe_id))
+            conn.executemany("UPDATE recipes SET area = ? WHERE id = ?", areas)
+            _write_recipe_relations(conn, relations)
+            rebuild_stats(conn)
+            conn.execute("PRAGMA user_version = 1")
+        if rows:
+            logger.info(f"Migrated {len(rows)} recipes to the normalized ingredient, tag and category tables.")
+    except Error as e:
+        logger.error(f"Error migrating recipes: {e}")
+
+def create_search_index(conn: sqlite3.Connection):
+    """
+    Creates the FTS5 full-text index over recipe titles, instructions,
+    ingredient items and tags. The index row of a recipe shares the recipe's
+    rowid.
+
+    Args:
+        conn: The SQLite database connection object.
+    """
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+                title, instructions, ingredients, tags,
+                tokenize = 'porter unicode61'
+            )
+        """)
+    except Error as e:
+        logger.error(f"Error creating search index: {e}")
+
+def _write_search_index(conn: sqlite3.Connection, recipe_ids: list[str]):
+    """
+    Rebuilds the full-text index rows of the given recipes from the stored
+    recipe, ingredient and tag data. Must be called inside the transaction that
+    writes the recipes themselves.
+
+    Args:
+        conn: The SQLite database connection object.
+        recipe_ids: The IDs of the recipes to (re)index.
+    """
+    params = [(recipe_id,) for recipe_id in recipe_ids]
+    conn.executemany(
+        "DELETE FROM recipes_fts WHERE rowid = (SELECT rowid FROM recipes WHERE id = ?)",
+        params
+    )
+    conn.executemany("""
+        INSERT INTO recipes_fts(rowid, title, instructions, ingredients, tags)
+        SELECT r.rowid, r.title, r.instructions,
+               (SELECT group_concat(item, ' ') FROM recipe_ingredients WHERE recipe_id = r.id),
+               replace(r.tags, ',', ' ')
+        FROM recipes r WHERE r.id = ?
+    """, params)
+
+def create_stats_tables(conn: sqlite3.Connection):
+    """
+    Creates the precomputed aggregate statistics. Every write of recipes
+    updates them incrementally, so they can be read without scanning the
+    recipes.
+
+    'recipe_stats' holds recipe counts, calorie sums, minimums and maximums
+    and the number of recipes without a video for the whole catalog
+    (dimension 'all') and per category, area and TheMealDB tag.
+    'ingredient_stats' holds the number of recipes using each ingredient item.
+
+    Args:
+        conn: The SQLite database connection object.
+    """
+    try:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS recipe_stats (
+                dimension TEXT NOT NULL,
+                name TEXT NOT NULL COLLATE NOCASE,
+                recipes INTEGER NOT NULL,
+                with_calories INTEGER NOT NULL,
+                calories_sum REAL NOT NULL,
+                calories_min REAL,
+                calories_max REAL,
+                without_video INTEGER NOT NULL,
+                PRIMARY KEY (dimension, name)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS ingredient_stats (
+                item TEXT PRIMARY KEY COLLATE NOCASE,
+                recipes INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_recipe_stats_recipes ON recipe_stats(dimension, recipes);
+            CREATE INDEX IF NOT EXISTS idx_ingredient_stats_recipes ON ingredient_stats(recipes);
+        """)
+    except Error as e:
+        logger.error(f"Error creating statistics tables: {e}")
+
+def _stat_groups(tags_str: str, category: str, area: str) -> list[tuple[str, str]]:
+    """
+    Returns the (dimension, name) statistics groups of a recipe: the whole
+    catalog, its category, its area and its TheMealDB tags, i.e. the entries
+    of the tags column other than the area and category.
+    """
+    groups = [("all", "")]
+    if category:
+        groups.append(("category", category))
+    if area:
+        groups.append(("area", area))
+    tags = [tag.strip() for tag in (tags_str or '').split(',') if tag.strip()]
+    for name in (area, category):
+        if name in tags:
+            tags.remove(name)
+    groups.extend(("tag", tag) for tag in dict.fromkeys(tags))
+    return groups
+
+def rebuild_stats(conn: sqlite3.Connection):
+    """
+    Recomputes all aggregate statistics from the stored recipes. Only needed
+    once per database; afterwards every write updates them incrementally.
+    Must be called inside a transaction.
+
+    Args:
+        conn: The SQLite database connection object.
+    """
+    conn.execute("DELETE FROM recipe_stats")
+    conn.execute("""
+        INSERT INTO recipe_stats(
+            dimension, name, recipes, with_calories, calories_sum, calories_min, calories_max, without_video
+        )
+        SELECT g.dimension, g.name, COUNT(*), COUNT(r.calories), TOTAL(r.calories), MIN(r.calories),
+               MAX(r.calories), SUM(COALESCE(r.video_url, '') = '')
+        FROM recipe_groups g JOIN recipes r ON r.id = g.recipe_id
+        GROUP BY g.dimension, g.name
+    """)
+    conn.execute("DELETE FROM ingredient_stats")
+    conn.execute("""
+        INSERT INTO ingredient_stats(item, recipes)
+        SELECT item, COUNT(DISTINCT recipe_id) FROM recipe_ingredients GROUP BY item
+    """)
+
+def _read_stat_contributions(conn: sqlite3.Connection, recipe_ids: list[str]) -> dict[str, tuple]:
+    """
+    Returns what each of the given recipes currently contributes to the
+    aggregate statistics: a (calories, has_video, groups, items) tuple per
+    stored recipe.
+    """
+    contributions = {}
+    for start in range(0, len(recipe_ids), 500): # Stay below SQLite's bound-parameter limit
+        chunk = recipe_ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        groups = defaultdict(set)
+        for recipe_id, dimension, name in conn.execute(
+            f"SELECT recipe_id, dimension, name FROM recipe_groups WHERE recipe_id IN ({placeholders})", chunk
+        ):
+            groups[recipe_id].add((dimension, name))
+        items = defaultdict(set)
+        for recipe_id, item in conn.execute(
+            f"SELECT DISTINCT recipe_id, item FROM recipe_ingredients WHERE recipe_id IN ({placeholders})", chunk
+        ):
+            items[recipe_id].add(item)
+        for recipe_id, calories, video_url in conn.execute(
+            f"SELECT id, calories, video_url FROM recipes WHERE id IN ({placeholders})", chunk
+        ):
+            contributions[recipe_id] = (
+                calories, bool(video_url), frozenset(groups[recipe_id]), frozenset(items[recipe_id])
+            )
+    return contributions
+
+def _update_stats(conn: sqlite3.Connection, before: dict[str, tuple], after: dict[str, tuple]):
+    """
+    Applies the change between two _read_stat_contributions results of the
+    same recipes to the aggregate statistics. Must be called inside the
+    transaction that writes the recipes.
+
+    Counts and sums are adjusted by the difference. Minimums and maximums
+    only need recomputing from the group's recipes when a removed calorie
+    value was the group's extreme.
+    """
+    group_deltas = {} # (dimension, name) -> [recipes, with_calories, calories_sum, without_video]
+    added_calories = defaultdict(list)
+    removed_calories = defaultdict(list)
+    item_deltas = Counter()
+    for recipe_id in before.keys() | after.keys():
+        old, new = before.get(recipe_id), after.get(recipe_id)
+        if old == new:
+            continue # Re-stored unchanged, as on most re-crawls
+        for contribution, sign in ((old, -1), (new, 1)):
+            if contribution is None:
+                continue
+            calories, has_video, groups, items = contribution
+            for group in groups:
+                delta = group_deltas.setdefault(group, [0, 0, 0.0, 0])
+                delta[0] += sign
+                delta[3] += 0 if has_video else sign
+                if calories is not None:
+                    delta[1] += sign
+                    delta[2] += sign * calories
+                    (added_calories if sign > 0 else removed_calories)[group].append(calories)
+            for item in items:
+                item_deltas[item] += sign
+    if not group_deltas:
+        return
+
+    conn.executemany("""
+        INSERT INTO recipe_stats(
+            dimension, name, recipes, with_calories, calories_sum, calories_min, calories_max, without_video
+        ) VALUES(?,?,?,?,?,?,?,?)
+        ON CONFLICT(dimension, name) DO UPDATE SET
+            recipes = recipes + excluded.recipes,
+            with_calories = with_calories + excluded.with_calories,
+            calories_sum = calories_sum + excluded.calories_sum,
+            calories_min = coalesce(min(calories_min, excluded.calories_min), calories_min, excluded.calories_min),
+            calories_max = coalesce(max(calories_max, excluded.calories_max), calories_max, excluded.calories_max),
+            without_video = without_video + excluded.without_video
+    """, [
+        (*group, delta[0], delta[1], delta[2], min(added_calories[group], default=None),
+         max(added_calories[group], default=None), delta[3])
+        for group, delta in group_deltas.items()
+    ])
+    for group, removed in removed_calories.items():
+        calories_min, calories_max = conn.execute(
+            "SELECT calories_min, calories_max FROM recipe_stats WHERE dimension = ? AND name = ?", group
+        ).fetchone()
+        if any(calories <= calories_min or calories >= calories_max for calories in removed):
+            conn.execute("""
+                UPDATE recipe_stats SET (calories_min, calories_max, calories_sum) = (
+                    SELECT MIN(r.calories), MAX(r.calories), TOTAL(r.calories)
+                    FROM recipe_groups g JOIN recipes r ON r.id = g.recipe_id
+                    WHERE g.dimension = ?1 AND g.name = ?2
+                )
+                WHERE dimension = ?1 AND name = ?2
+            """, group)
+    conn.executemany(
+        "DELETE FROM recipe_stats WHERE dimension = ? AND name = ? AND recipes <= 0",
+        [group for group, delta in group_deltas.items() if delta[0] < 0]
+    )
+
+    conn.executemany("""
+        INSERT INTO ingredient_stats(item, recipes) VALUES(?,?)
+        ON CONFLICT(item) DO UPDATE SET recipes = recipes + excluded.recipes
+    """, [(item, delta) for item, delta in item_deltas.items() if delta])
+    conn.executemany(
+        "DELETE FROM ingredient_stats WHERE item = ? AND recipes <= 0",
+        [(item,) for item, delta in item_deltas.items() if delta < 0]
+    )
+
+def _group_summary(row: tuple) -> dict:
+    """
+    Converts a 'recipe_stats' row (without its dimension) to a summary dictionary.
+    """
+    name, recipes, with_calories, calories_sum, calories_min, calories_max, without_video = row
+    return {
+        "name": name,
+        "recipes": recipes,
+        "average_calories": round(calories_sum / with_calories, 1) if with_calories else None,
+        "min_calories": calories_min,
+        "max_calories": calories_max,
+        "without_video": without_video,
+    }
+
+def get_catalog_stats(conn: sqlite3.Connection, top: int = 10) -> dict:
+    """
+    Reads the precomputed catalog statistics. Only the requested rows of the
+    statistics tables are read, so the cost does not grow with the number of recipes.
 
     Args:
         conn: The SQLite database connection object.
-        recipe_data: A dictionary containing recipe details fetched from the API.
+        top: The number of categories, areas, tags and ingredients to list,
+            the ones with the most recipes first.
 
     Returns:
-        The row ID of the inserted or replaced record, or None if insertion fails.
+        A dictionary with the catalog totals ("recipes", "average_calories",
+        "min_calories", "max_calories", "without_video") and lists of the top
+        "categories", "areas" and "tags" with the same figures, and of the top
+        "ingredients" with their number of recipes. Returns the totals of an
+        empty catalog on failure.
+    """
+    columns = "name, recipes, with_calories, calories_sum, calories_min, calories_max, without_video"
+    stats = {"name": "", "recipes": 0, "average_calories": None, "min_calories": None, "max_calories": None,
+             "without_video": 0}
+    try:
+        row = conn.execute(f"SELECT {columns} FROM recipe_stats WHERE dimension = 'all'").fetchone()
+        if row:
+            stats = _group_summary(row)
+        del stats["name"]
+        for dimension, key in (("category", "categories"), ("area", "areas"), ("tag", "tags")):
+            stats[key] = [_group_summary(row) for row in conn.execute(
+                f"SELECT {columns} FROM recipe_stats WHERE dimension = ? ORDER BY recipes DESC, name LIMIT ?",
+                (dimension, top)
+            )]
+        stats["ingredients"] = [{"name": item, "recipes": recipes} for item, recipes in conn.execute(
+            "SELECT item, recipes FROM ingredient_stats ORDER BY recipes DESC, item LIMIT ?", (top,)
+        )]
+    except Error as e:
+        logger.error(f"Error reading catalog statistics: {e}")
+        stats.pop("name", None)
+        stats.update({"categories": [], "areas": [], "tags": [], "ingredients": []})
+    return stats
+
+def create_checkpoint_tables(conn: sqlite3.Connection):
+    """
+    Creates the crawl journal tables used to resume an interrupted crawl:
+    one row per crawl run, plus the recipes and categories it completed.
+
+    Args:
+        conn: The SQLite database connection object.
+    """
+    try:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawl_runs (
+                id INTEGER PRIMARY KEY,
+                started_on TEXT NOT NULL,
+                json_file TEXT NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS crawl_recipes (
+                run_id INTEGER NOT NULL REFERENCES crawl_runs(id) ON DELETE CASCADE,
+                recipe_id TEXT NOT NULL,
+                category TEXT NOT NULL,
+                PRIMARY KEY (run_id, recipe_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS crawl_categories (
+                run_id INTEGER NOT NULL REFERENCES crawl_runs(id) ON DELETE CASCADE,
+                category TEXT NOT NULL,
+                PRIMARY KEY (run_id, category)
+            ) WITHOUT ROWID;
+        """)
+    except Error as e:
+        logger.error(f"Error creating checkpoint tables: {e}")
+
+def create_version_table(conn: sqlite3.Connection):
+    """
+    Creates the single-row table holding the store version: a counter bumped
+    by every recipe write and the time of that write. Readers such as the
+    query service compare it to tell whether their cached responses are stale.
+
+    Args:
+        conn: The SQLite database connection object.
+    """
+    try:
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS store_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL,
+                    modified_at REAL NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO store_version(id, version, modified_at) VALUES(1, 0, ?)", (time.time(),))
+    except Error as e:
+        logger.error(f"Error creating store version table: {e}")
+
+def create_asset_table(conn: sqlite3.Connection):
+    """
+    Creates the table of mirrored images: the local copy of every downloaded
+    image URL, as a path relative to config.ASSET_DIR. Identical images share
+    one file, named after the SHA-256 of their content.
+
+    Args:
+        conn: The SQLite database connection object.
+    """
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS assets (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                path TEXT NOT NULL,
+                thumbnail_path TEXT,
+                content_type TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+    except Error as e:
+        logger.error(f"Error creating asset table: {e}")
+
+def _bump_store_version(conn: sqlite3.Connection):
+    """
+    Marks the store as modified. Must be called inside the transaction that
+    writes the recipes themselves.
+    """
+    conn.execute("UPDATE store_version SET version = version + 1, modified_at = ? WHERE id = 1", (time.time(),))
+
+def get_store_version(conn: sqlite3.Connection) -> tuple[int, float] | None:
+    """
+    Returns the store version and the time of the last recipe write.
+
+    Args:
+        conn: The SQLite database connection object.
+
+    Returns:
+        A (version, modified_at) tuple, or None if the database predates the
+        store version table.
+    """
+    try:
+        return conn.execute("SELECT version, modified_at FROM store_version WHERE id = 1").fetchone()
+    except Error:
+        return None
+
+def _write_recipe_relations(conn: sqlite3.Connection, relations: list[tuple[str, str, str, str, str]]):
+    """
+    Replaces the parsed ingredients, tags, categories, statistics groups and
+    full-text index rows of the given recipes. Must be called inside the
+    transaction that writes the recipes themselves.
+
+    Args:
+        conn: The SQLite database connection object.
+        relations: Tuples of (recipe_id, ingredients_str, tags_str, category, area).
+    """
+    recipe_ids = [(relation[0],) for relation in relations]
+    for table in ("recipe_ingredients", "recipe_tags", "recipe_categories", "recipe_groups"):
+        conn.executemany(f"DELETE FROM {table} WHERE recipe_id = ?", recipe_ids)
+
+    ingredient_rows = []
+    tag_rows = []
+    category_rows = []
+    group_rows = []
+    for recipe_id, ingredients_str, tags_str, category, area in relations:
+        parsed = data_processor.parse_measurements(data_processor.split_ingredients(ingredients_str or ''))
+        for position, (quantity, unit, item) in enumerate(zip(*parsed)):
+            ingredient_rows.append((recipe_id, position, quantity, unit, item))
+        for tag in dict.fromkeys(tag.strip() for tag in (tags_str or '').split(',')):
+            if tag:
+                tag_rows.append((recipe_id, tag))
+        if category:
+            category_rows.append((recipe_id, category))
+        group_rows.extend((dimension, name, recipe_id) for dimension, name in _stat_groups(tags_str, category, area))
+
+    conn.executemany(
+        "INSERT INTO recipe_ingredients(recipe_id, position, quantity, unit, item) VALUES(?,?,?,?,?)",
+        ingredient_rows
+    )
+    conn.executemany("INSERT OR IGNORE INTO tags(name) VALUES(?)", [(tag,) for _, tag in tag_rows])
+    conn.executemany(
+        "INSERT OR IGNORE INTO recipe_tags(recipe_id, tag_id) SELECT ?, id FROM tags WHERE name = ?",
+        tag_rows
+    )
+    conn.executemany("INSERT OR IGNORE INTO categories(name) VALUES(?)", [(name,) for _, name in category_rows])
+    conn.executemany(
+        "INSERT OR IGNORE INTO recipe_categories(recipe_id, category_id) SELECT ?, id FROM categories WHERE name = ?",
+        category_rows
+    )
+    conn.executemany("INSERT OR IGNORE INTO recipe_groups(dimension, name, recipe_id) VALUES(?,?,?)", group_rows)
+    _write_search_index(conn, [relation[0] for relation in relations])
+
+def _relations_for(row: tuple, recipe: Recipe) -> tuple[str, str, str, str, str]:
+    """
+    Returns the (recipe_id, ingredients_str, tags_str, category, area) relations of a recipe row.
+    """
+    return row[0], row[2], row[8], recipe.category, recipe.area
+
+# The category of a recipe in a query on the 'recipes' table
+_CATEGORY_COLUMN = """(SELECT c.name FROM recipe_categories rc JOIN categories c ON c.id = rc.category_id
+                      WHERE rc.recipe_id = recipes.id)"""
+
+# Columns selected to build a Recipe with Recipe.from_row
+RECIPE_COLUMNS = (
+    "recipes.id, title, ingredients, instructions, calories, image_url, thumbnail_url, video_url, tags, area, "
+    + _CATEGORY_COLUMN
+)
+
+# An upsert rather than INSERT OR REPLACE keeps each recipe's rowid stable,
+# which the full-text index uses as its key
+_INSERT_RECIPE_SQL = """INSERT INTO recipes(
+                id, title, ingredients, instructions,
+                calories, image_url, thumbnail_url, video_url, tags,
+                ingredients_hash, content_hash, area
+              ) VALUES(?,?,?,?,?,?,?,?,?,?,?,?)
+              ON CONFLICT(id) DO UPDATE SET
+                title = excluded.title,
+                ingredients = excluded.ingredients,
+                instructions = excluded.instructions,
+                calories = excluded.calories,
+                image_url = excluded.image_url,
+                thumbnail_url = excluded.thumbnail_url,
+                video_url = excluded.video_url,
+                tags = excluded.tags,
+                ingredients_hash = excluded.ingredients_hash,
+                content_hash = excluded.content_hash,
+                area = excluded.area"""
+
+def _get_stored_calories(conn: sqlite3.Connection, recipe_ids: list[str]) -> dict[str, tuple[str, float]]:
+    """
+    Returns the stored ingredients hash and calories of the given recipes.
+
+    Args:
+        conn: The SQLite database connection object.
+        recipe_ids: The IDs of the recipes to look up.
+
+    Returns:
+        A dictionary mapping recipe IDs to (ingredients_hash, calories) for
+        recipes that have calories stored.
     """
-    ingredients_str = data_processor.parse_ingredients(recipe_data)
-    calories_val = data_processor.calculate_calories(ingredients_str)
+    stored = {}
+    try:
+        for start in range(0, len(recipe_ids), 500): # Stay below SQLite's bound-parameter limit
+            chunk = recipe_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for recipe_id, ingredients_hash, calories in conn.execute(
+                f"SELECT id, ingredients_hash, calories FROM recipes "
+                f"WHERE id IN ({placeholders}) AND calories IS NOT NULL",
+                chunk
+            ):
+                stored[recipe_id] = (ingredients_hash, calories)
+    except Error as e:
+        logger.error(f"Error reading stored calories from database: {e}")
+    return stored
 
-    # Convert calories to a suitable type for DB (None if "N/A" or string)
+def _calories_for_db(calories_val: str | int | float) -> float | None:
+    """
+    Converts a calorie value from data_processor.calculate_calories to the stored value.
+    """
+    # None if "N/A" or string
     if isinstance(calories_val, str) and "N/A" in calories_val:
-        calories_for_db = None
+        return None
+    try:
+        return float(calories_val)
+    except (ValueError, TypeError):
+        return None # Handle cases where calorie calculation might return non-numeric string
+
+def _content_hash(title: str, ingredients_str: str, instructions: str, calories: float | None,
+                  image_url: str, video_url: str) -> str:
+    """
+    Hashes everything the XML/HTML export renders, so unchanged recipes are not re-rendered.
+    """
+    return data_processor.hash_content(title, ingredients_str, instructions, calories, image_url, video_url)
+
+def _build_recipe_row(recipe: Recipe, stored: tuple[str, float] | None) -> tuple[tuple, str | int | float]:
+    """
+    Converts a recipe fetched from the API into a row of the 'recipes' table.
+
+    Args:
+        recipe: The recipe.
+        stored: The (ingredients_hash, calories) currently stored for the recipe, if any.
+
+    Returns:
+        A tuple of the row values and the calorie value reported for the recipe.
+    """
+    ingredients_str = data_processor.parse_ingredients(recipe)
+    ingredients_hash = data_processor.hash_ingredients(ingredients_str)
+
+    # Reuse the stored calories if the ingredients have not changed since the last insert
+    if stored and stored[0] == ingredients_hash:
+        calories_val = stored[1]
     else:
-        try:
-            calories_for_db = float(calories_val)
-        except (ValueError, TypeError):
-            calories_for_db = None # Handle cases where calorie calculation might return non-numeric string
+        calories_val = data_processor.calculate_calories(ingredients_str)
 
-    sql = """INSERT OR REPLACE INTO recipes(
-                id, title, ingredients, instructions,
-                calories, image_url, thumbnail_url, video_url, tags
-              ) VALUES(?,?,?,?,?,?,?,?,?)"""
+    # Convert calories to a suitable type for DB
+    calories_for_db = _calories_for_db(calories_val)
+    content_hash = _content_hash(
+        recipe.title, ingredients_str, recipe.instructions, calories_for_db, recipe.thumbnail_url, recipe.video_url
+    )
+
+    row = (
+        recipe.id,
+        recipe.title,
+        ingredients_str,
+        recipe.instructions,
+        calories_for_db,
+        recipe.thumbnail_url,
+        recipe.thumbnail_url,
+        recipe.video_url,
+        ','.join(filter(None, [recipe.area, recipe.category, recipe.tags])),
+        ingredients_hash,
+        content_hash,
+        recipe.area
+    )
+    return row, calories_val
+
+def insert_recipe(conn: sqlite3.Connection, recipe: Recipe) -> int | None:
+    """
+    Inserts or replaces recipe data into the 'recipes' table.
+
+    Args:
+        conn: The SQLite database connection object.
+        recipe: The recipe fetched from the API.
+
+    Returns:
+        The row ID of the inserted or replaced record, or None if insertion fails.
+    """
+    stored = _get_stored_calories(conn, [recipe.id]).get(recipe.id)
+    row, calories_val = _build_recipe_row(recipe, stored)
     try:
-        cursor = conn.cursor()
-        cursor.execute(sql, (
-            recipe_data['idMeal'],
-            recipe_data['strMeal'],
-            ingredients_str,
-            recipe_data['strInstructions'],
-            calories_for_db,
-            recipe_data.get('strMealThumb', ''),
-            recipe_data.get('strMealThumb', ''),
-            recipe_data.get('strYoutube', ''),
-            ','.join(filter(None, [
-                recipe_data.get('strArea', ''),
-                recipe_data.get('strCategory', ''),
-                recipe_data.get('strTags', '')
-            ]))
-        ))
-        conn.commit()
-        print(f"  Inserted/Updated recipe: {recipe_data['strMeal']} (Calories: {calories_val})")
+        with conn:
+            before = _read_stat_contributions(conn, [recipe.id])
+            cursor = conn.cursor()
+            cursor.execute(_INSERT_RECIPE_SQL, row)
+            _write_recipe_relations(conn, [_relations_for(row, recipe)])
+            _update_stats(conn, before, _read_stat_contributions(conn, [recipe.id]))
+            _bump_store_version(conn)
+        logger.debug(f"Inserted/Updated recipe: {recipe.title} (Calories: {calories_val})")
         return cursor.lastrowid
     except Error as e:
-        print(f"Error inserting recipe {recipe_data['idMeal']}: {e}")
+        logger.error(f"Error inserting recipe {recipe.id}: {e}")
     return None
 
+def insert_recipes(conn: sqlite3.Connection, recipes: Iterable[Recipe], batch_size: int | None = None) -> int:
+    """
+    Inserts or replaces many recipes using one transaction per batch.
+
+    Each batch is written with a single executemany() and committed once, so
+    the cost of syncing to disk is paid per batch instead of per row.
+
+    Args:
+        conn: The SQLite database connection object.
+        recipes: The recipes fetched from the API.
+        batch_size: Number of recipes per transaction. Defaults to config.DB_BATCH_SIZE.
+
+    Returns:
+        The number of recipes written.
+    """
+    batch_size = batch_size or config.DB_BATCH_SIZE
+    written = 0
+    start_time = time.perf_counter()
+    iterator = iter(recipes)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+        # A recipe listed twice in one batch is written once, as its last occurrence
+        batch = list({recipe.id: recipe for recipe in batch}.values())
+        stored = _get_stored_calories(conn, [recipe.id for recipe in batch])
+        with metrics.timer("recipe_parse_seconds"): # Ingredient parsing, hashing and calorie totals
+            rows = [_build_recipe_row(recipe, stored.get(recipe.id))[0] for recipe in batch]
+        try:
+            with metrics.timer("db_write_seconds"), conn: # Commits the batch on success, rolls it back on error
+                recipe_ids = [row[0] for row in rows]
+                before = _read_stat_contributions(conn, recipe_ids)
+                conn.executemany(_INSERT_RECIPE_SQL, rows)
+                _write_recipe_relations(conn, [
+                    _relations_for(row, recipe) for row, recipe in zip(rows, batch)
+                ])
+                _update_stats(conn, before, _read_stat_contributions(conn, recipe_ids))
+                _bump_store_version(conn)
+            written += len(rows)
+            metrics.increment("db_rows_written_total", len(rows))
+        except Error as e:
+            metrics.increment("db_write_errors_total")
+            logger.error(f"Error inserting batch of {len(rows)} recipes: {e}")
+
+    elapsed = time.perf_counter() - start_time
+    rate = written / elapsed if elapsed > 0 else 0
+    logger.info(f"Inserted/Updated {written} recipes in {elapsed:.2f}s ({rate:.0f} rows/sec)")
+    return written
+
+def recalculate_calories(conn: sqlite3.Connection, missing_only: bool = False, batch_size: int | None = None) -> int:
+    """
+    Recalculates the calories of stored recipes from their stored ingredients,
+    e.g. after the offline nutrition table was extended.
+
+    Args:
+        conn: The SQLite database connection object.
+        missing_only: Only recalculate recipes that have no calories stored.
+        batch_size: Number of recipes looked up and updated per transaction.
+            Defaults to config.DB_BATCH_SIZE.
+
+    Returns:
+        The number of recipes whose calories changed.
+    """
+    batch_size = batch_size or config.DB_BATCH_SIZE
+    query = "SELECT id, title, ingredients, instructions, calories, image_url, video_url FROM recipes"
+    if missing_only:
+        query += " WHERE calories IS NULL"
+    updated = 0
+    try:
+        rows = conn.execute(query).fetchall()
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            with metrics.timer("recipe_parse_seconds"):
+                totals = data_processor.calculate_calories_many([row[2] for row in batch])
+            changes = []
+            for (recipe_id, title, ingredients_str, instructions, calories, image_url, video_url), total in zip(batch, totals):
+                calories_for_db = _calories_for_db(total)
+                if calories_for_db != calories:
+                    content_hash = _content_hash(title, ingredients_str, instructions, calories_for_db, image_url, video_url)
+                    changes.append((calories_for_db, content_hash, recipe_id))
+            if changes:
+                with metrics.timer("db_write_seconds"), conn:
+                    recipe_ids = [recipe_id for _, _, recipe_id in changes]
+                    before = _read_stat_contributions(conn, recipe_ids)
+                    conn.executemany("UPDATE recipes SET calories = ?, content_hash = ? WHERE id = ?", changes)
+                    _update_stats(conn, before, _read_stat_contributions(conn, recipe_ids))
+                    _bump_store_version(conn)
+                updated += len(changes)
+                metrics.increment("db_rows_written_total", len(changes))
+    except Error as e:
+        metrics.increment("db_write_errors_total")
+        logger.error(f"Error recalculating calories: {e}")
+    logger.info(f"Recalculated calories: {updated} recipes changed.")
+    return updated
+
+def get_image_urls(conn: sqlite3.Connection) -> list[str]:
+    """
+    Returns the distinct image URLs of all stored recipes.
+
+    Args:
+        conn: The SQLite database connection object.
+
+    Returns:
+        A list of image URLs. Returns an empty list on failure.
+    """
+    try:
+        return [row[0] for row in conn.execute("SELECT DISTINCT image_url FROM recipes WHERE image_url != ''")]
+    except Error as e:
+        logger.error(f"Error reading image URLs from database: {e}")
+    return []
+
+def get_assets(conn: sqlite3.Connection) -> dict[str, tuple[str, str, str | None]]:
+    """
+    Returns every mirrored image.
+
+    Args:
+        conn: The SQLite database connection object.
+
+    Returns:
+        A dictionary mapping image URLs to their (sha256, path, thumbnail_path).
+        Returns an empty dictionary on failure.
+    """
+    try:
+        return {url: (sha256, path, thumbnail_path) for url, sha256, path, thumbnail_path in conn.execute(
+            "SELECT url, sha256, path, thumbnail_path FROM assets"
+        )}
+    except Error as e:
+        logger.error(f"Error reading mirrored images from database: {e}")
+    return {}
+
+def record_assets(conn: sqlite3.Connection, assets: list[tuple[str, str, str, str | None, str | None, int]]):
+    """
+    Stores mirrored images, replacing earlier entries for the same URLs.
+
+    Args:
+        conn: The SQLite database connection object.
+        assets: Tuples of (url, sha256, path, thumbnail_path, content_type, size).
+    """
+    now = time.time()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO assets(url, sha256, path, thumbnail_path, content_type, size, fetched_at) "
+                "VALUES(?,?,?,?,?,?,?)",
+                [(*asset, now) for asset in assets]
+            )
+            if assets:
+                _bump_store_version(conn) # The export output references the local copies
+    except Error as e:
+        logger.error(f"Error recording mirrored images: {e}")
+
+def get_recipe_ids(conn: sqlite3.Connection) -> set[str]:
+    """
+    Returns the IDs of all recipes currently stored in the database.
+
+    Args:
+        conn: The SQLite database connection object.
+
+    Returns:
+        A set of recipe IDs. Returns an empty set on failure.
+    """
+    try:
+        return {row[0] for row in conn.execute("SELECT id FROM recipes")}
+    except Error as e:
+        logger.error(f"Error reading recipe IDs from database: {e}")
+    return set()
+
+def get_ingredient_hashes(conn: sqlite3.Connection) -> dict[str, str]:
+    """
+    Returns the stored ingredients hash of every recipe that has calories.
+
+    Args:
+        conn: The SQLite database connection object.
+
+    Returns:
+        A dictionary mapping recipe IDs to ingredient hashes. Returns an empty
+        dictionary on failure.
+    """
+    try:
+        return dict(conn.execute(
+            "SELECT id, ingredients_hash FROM recipes WHERE ingredients_hash IS NOT NULL AND calories IS NOT NULL"
+        ))
+    except Error as e:
+        logger.error(f"Error reading ingredient hashes from database: {e}")
+    return {}
+
+def start_crawl_run(conn: sqlite3.Connection, started_on: str, json_file: str) -> int:
+    """
+    Records the start of a new crawl run.
+
+    Args:
+        conn: The SQLite database connection object.
+        started_on: ISO timestamp of the start of the run.
+        json_file: The JSON file the run writes its output to.
+
+    Returns:
+        The ID of the new run.
+    """
+    with conn:
+        return conn.execute(
+            "INSERT INTO crawl_runs(started_on, json_file) VALUES(?,?)", (started_on, json_file)
+        ).lastrowid
+
+def get_unfinished_crawl_run(conn: sqlite3.Connection) -> tuple[int, str, str] | None:
+    """
+    Returns the most recent crawl run that did not complete.
+
+    Args:
+        conn: The SQLite database connection object.
+
+    Returns:
+        A (run_id, started_on, json_file) tuple, or None if the last run completed.
+    """
+    return conn.execute(
+        "SELECT id, started_on, json_file FROM crawl_runs WHERE completed = 0 ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+
+def get_crawl_checkpoint(conn: sqlite3.Connection, run_id: int) -> tuple[set[str], set[str]]:
+    """
+    Returns what a crawl run already completed.
+
+    Args:
+        conn: The SQLite database connection object.
+        run_id: The ID of the crawl run.
+
+    Returns:
+        A tuple of (completed categories, completed recipe IDs).
+    """
+    categories = {row[0] for row in conn.execute("SELECT category FROM crawl_categories WHERE run_id = ?", (run_id,))}
+    recipe_ids = {row[0] for row in conn.execute("SELECT recipe_id FROM crawl_recipes WHERE run_id = ?", (run_id,))}
+    return categories, recipe_ids
+
+def record_crawl_checkpoint(conn: sqlite3.Connection, run_id: int, recipes: list[tuple[str, str]],
+                            completed_categories: list[str]):
+    """
+    Records recipes and categories a crawl run has finished, in one transaction.
+
+    Args:
+        conn: The SQLite database connection object.
+        run_id: The ID of the crawl run.
+        recipes: (category, recipe_id) pairs stored by the run.
+        completed_categories: Categories whose recipes were all stored.
+    """
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO crawl_recipes(run_id, category, recipe_id) VALUES(?,?,?)",
+            [(run_id, category, recipe_id) for category, recipe_id in recipes]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO crawl_categories(run_id, category) VALUES(?,?)",
+            [(run_id, category) for category in completed_categories]
+        )
+
+def finish_crawl_run(conn: sqlite3.Connection, run_id: int):
+    """
+    Marks a crawl run as completed and drops its per-recipe journal.
+
+    Args:
+        conn: The SQLite database connection object.
+        run_id: The ID of the crawl run.
+    """
+    with conn:
+        conn.execute("UPDATE crawl_runs SET completed = 1 WHERE id = ?", (run_id,))
+        conn.execute("DELETE FROM crawl_recipes WHERE run_id = ?", (run_id,))
+        conn.execute("DELETE FROM crawl_categories WHERE run_id = ?", (run_id,))
+
+def get_recipe(conn: sqlite3.Connection, recipe_id: str) -> Recipe | None:
+    """
+    Returns a stored recipe.
+
+    Args:
+        conn: The SQLite database connection object.
+        recipe_id: The ID of the recipe.
+
+    Returns:
+        The recipe with its stored calories, or None if there is no such recipe.
+    """
+    row = conn.execute(f"SELECT {RECIPE_COLUMNS} FROM recipes WHERE id = ?", (recipe_id,)).fetchone()
+    return Recipe.from_row(row) if row else None
+
+def get_recipe_ingredients(conn: sqlite3.Connection, recipe_id: str) -> list[tuple[str, str, str]]:
+    """
+    Returns the pre-parsed ingredients of a recipe in their original order.
+
+    Args:
+        conn: The SQLite database connection object.
+        recipe_id: The ID of the recipe.
+
+    Returns:
+        A list of (quantity, unit, item) tuples.
+    """
+    return conn.execute(
+        "SELECT quantity, unit, item FROM recipe_ingredients WHERE recipe_id = ? ORDER BY position",
+        (recipe_id,)
+    ).fetchall()
+
+def find_recipes_by_ingredient(conn: sqlite3.Connection, item: str) -> list[tuple[str, str]]:
+    """
+    Finds recipes with an ingredient whose item starts with the given text,
+    e.g. "chicken" matches "Chicken Breast" and "chicken stock".
+
+    Args:
+        conn: The SQLite database connection object.
+        item: The ingredient item to search for (case-insensitive).
+
+    Returns:
+        A list of (id, title) tuples. Returns an empty list on failure.
+    """
+    pattern = item.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    try:
+        return conn.execute("""
+            SELECT r.id, r.title FROM recipes r
+            WHERE r.id IN (
+                SELECT recipe_id FROM recipe_ingredients WHERE item LIKE ? ESCAPE '\\'
+            )
+            ORDER BY r.title
+        """, (pattern,)).fetchall()
+    except Error as e:
+        logger.error(f"Error searching recipes by ingredient '{item}': {e}")
+    return []
+
+def find_recipes_by_tag(conn: sqlite3.Connection, tag: str) -> list[tuple[str, str]]:
+    """
+    Finds recipes carrying the given tag (area, category or TheMealDB tag).
+
+    Args:
+        conn: The SQLite database connection object.
+        tag: The tag name (case-insensitive).
+
+    Returns:
+        A list of (id, title) tuples. Returns an empty list on failure.
+    """
+    try:
+        return conn.execute("""
+            SELECT r.id, r.title FROM recipes r
+            JOIN recipe_tags rt ON rt.recipe_id = r.id
+            JOIN tags t ON t.id = rt.tag_id
+            WHERE t.name = ?
+            ORDER BY r.title
+        """, (tag,)).fetchall()
+    except Error as e:
+        logger.error(f"Error searching recipes by tag '{tag}': {e}")
+    return []
+
+def find_recipes_by_category(conn: sqlite3.Connection, category: str) -> list[tuple[str, str]]:
+    """
+    Finds recipes in the given category.
+
+    Args:
+        conn: The SQLite database connection object.
+        category: The category name (case-insensitive).
+
+    Returns:
+        A list of (id, title) tuples. Returns an empty list on failure.
+    """
+    try:
+        return conn.execute("""
+            SELECT r.id, r.title FROM recipes r
+            JOIN recipe_categories rc ON rc.recipe_id = r.id
+            JOIN categories c ON c.id = rc.category_id
+            WHERE c.name = ?
+            ORDER BY r.title
+        """, (category,)).fetchall()
+    except Error as e:
+        logger.error(f"Error searching recipes by category '{category}': {e}")
+    return []
+
+def _quote_search_terms(query: str) -> str:
+    """
+    Turns free text into an FTS5 query that matches all of its words literally.
+    """
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+# Control characters that mark matches in FTS snippets until the text is escaped
+_MATCH_START, _MATCH_END = "\x02", "\x03"
+
+def _snippet_html(snippet: str) -> str:
+    """
+    Escapes a snippet's text as HTML and wraps its matches in <b> tags.
+    """
+    return html.escape(snippet).replace(_MATCH_START, "<b>").replace(_MATCH_END, "</b>")
+
+def search_recipes(conn: sqlite3.Connection, query: str, limit: int = 20, offset: int = 0) -> list[tuple[str, str, str]]:
+    """
+    Searches recipes through the full-text index, best matches first.
+
+    Title matches weigh most, followed by ingredients, tags and instructions.
+    The query may use FTS5 syntax (e.g. "chicken AND curry", "bake*"); if it is
+    not valid FTS5 syntax, its words are matched literally instead.
+
+    Args:
+        conn: The SQLite database connection object.
+        query: The search text.
+        limit: The maximum number of results to return.
+        offset: The number of results to skip, for paging.
+
+    Returns:
+        A list of (id, title, snippet) tuples, where the snippet shows the best
+        matching passage as escaped HTML with matches wrapped in <b> tags.
+        Returns an empty list on failure.
+    """
+    sql = """
+        SELECT r.id, r.title, snippet(recipes_fts, -1, char(2), char(3), '...', 12)
+        FROM recipes_fts
+        JOIN recipes r ON r.rowid = recipes_fts.rowid
+        WHERE recipes_fts MATCH ?
+        ORDER BY bm25(recipes_fts, 10.0, 1.0, 5.0, 3.0)
+        LIMIT ? OFFSET ?
+    """
+    if not query.strip():
+        return []
+    try:
+        rows = conn.execute(sql, (query, limit, offset)).fetchall()
+    except sqlite3.OperationalError:
+        try:
+            rows = conn.execute(sql, (_quote_search_terms(query), limit, offset)).fetchall()
+        except Error as e:
+            logger.error(f"Error searching recipes for '{query}': {e}")
+            return []
+    return [(recipe_id, title, _snippet_html(snippet)) for recipe_id, title, snippet in rows]
+
 def print_recipes(db_file: str):
     """
     Prints the IDs and titles of all recipes currently stored in the database.
@@ -121,7 +1215,7 @@ def print_recipes(db_file: str):
         else:
             print("No recipes found in the database.")
     except Error as e:
-        print(f"Error reading recipes from database: {e}")
+        logger.error(f"Error reading recipes from database: {e}")
     finally:
         if conn:
             conn.close()
\ No newline at end of file
@@ -1,80 +1,258 @@
+import hashlib
+import logging
+import os
+import re
 import sqlite3
-# import xml.etree.ElementTree as ET # REMOVE THIS IMPORT
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from itertools import chain
 from lxml import etree # Keep this import and use it for XML building
+from atomic_file import atomic_write
+import asset_mirror # Import asset_mirror for the location of the local images
 import config # Import config for filenames
-import data_processor # Import data_processor for parsing and highlighting
+import data_processor # Import data_processor for highlighting
+import database_manager # Import database_manager for the pre-parsed ingredient rows
+import metrics
+from fragment_cache import FragmentCache
+from recipe_model import Recipe
 
-def export_to_xml(db_file: str, xml_file: str):
+logger = logging.getLogger(__name__)
+
+def _build_recipe_element(conn: sqlite3.Connection, recipe: Recipe,
+                          asset: tuple[str, str | None] | None = None) -> etree._Element:
+    """
+    Builds the <recipe> element of a single stored recipe.
+
+    Args:
+        conn: The SQLite database connection, used to read the pre-parsed ingredients.
+        recipe: The recipe, as read with Recipe.from_row.
+        asset: The (path, thumbnail_path) of the local copies of the image,
+            relative to config.ASSET_DIR, or None if it is not mirrored.
+
+    Returns:
+        The <recipe> element.
+    """
+    recipe_elem = etree.Element("recipe")
+    etree.SubElement(recipe_elem, "id").text = recipe.id
+    etree.SubElement(recipe_elem, "title").text = recipe.title
+    etree.SubElement(recipe_elem, "calories").text = str(recipe.calories if recipe.calories is not None else "N/A")
+    etree.SubElement(recipe_elem, "image_url").text = recipe.thumbnail_url
+    # Local copies of the image, once asset_mirror has downloaded it
+    if asset:
+        etree.SubElement(recipe_elem, "image_path").text = asset[0]
+        if asset[1]:
+            etree.SubElement(recipe_elem, "thumbnail_path").text = asset[1]
+
+    # Only add video_url to XML if it's not empty or None
+    if recipe.video_url:
+        etree.SubElement(recipe_elem, "video_url").text = recipe.video_url
+
+    # Ingredients with separated quantity/unit/item, parsed once at insert time
+    ingredients_elem = etree.SubElement(recipe_elem, "ingredients")
+    for quantity, unit, item in database_manager.get_recipe_ingredients(conn, recipe.id):
+        ingredient_elem = etree.SubElement(ingredients_elem, "ingredient")
+        etree.SubElement(ingredient_elem, "quantity").text = quantity
+        etree.SubElement(ingredient_elem, "unit").text = unit
+        etree.SubElement(ingredient_elem, "item").text = item
+
+    # Instructions with highlighted actions in CDATA
+    instructions_elem = etree.SubElement(recipe_elem, "instructions")
+    # Use data_processor to highlight actions
+    instructions_text = data_processor.highlight_actions(recipe.instructions)
+    # Use lxml.etree.CDATA to wrap instructions text
+    instructions_elem.text = etree.CDATA(instructions_text)
+    return recipe_elem
+
+def _summary_attributes(stats: dict) -> dict[str, str]:
+    """
+    Returns the recipe count, videos and calories of a statistics entry as XML attributes.
+    """
+    attributes = {"recipes": str(stats["recipes"]), "without_video": str(stats["without_video"])}
+    if stats["average_calories"] is not None:
+        for key in ("average_calories", "min_calories", "max_calories"):
+            attributes[key] = str(round(stats[key]))
+    return attributes
+
+def _build_summary_element(conn: sqlite3.Connection) -> etree._Element | None:
+    """
+    Builds the <summary> element of the catalog from the statistics that
+    database_manager keeps up to date on every write, without reading the recipes.
+
+    Args:
+        conn: The SQLite database connection.
+
+    Returns:
+        The <summary> element, with the top config.CATALOG_SUMMARY_TOP
+        categories, areas and ingredients, or None if the catalog is empty or
+        the summary is disabled.
+    """
+    if not config.CATALOG_SUMMARY_TOP:
+        return None
+    stats = database_manager.get_catalog_stats(conn, config.CATALOG_SUMMARY_TOP)
+    if not stats["recipes"]:
+        return None
+    summary_elem = etree.Element("summary", _summary_attributes(stats))
+    for key, tag in (("categories", "category"), ("areas", "area")):
+        for group in stats[key]:
+            etree.SubElement(summary_elem, tag, name=group["name"], **_summary_attributes(group))
+    for ingredient in stats["ingredients"]:
+        etree.SubElement(summary_elem, "ingredient", name=ingredient["name"], recipes=str(ingredient["recipes"]))
+    return summary_elem
+
+def read_summary_element(db_file: str) -> etree._Element | None:
+    """
+    Opens the database and builds the <summary> element of its catalog.
+
+    Raises:
+        sqlite3.Error: If the database cannot be opened.
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        return _build_summary_element(conn)
+    finally:
+        conn.close()
+
+def iter_recipe_elements(db_file: str, chunk_size: int | None = None) -> Iterator[etree._Element]:
+    """
+    Streams the <recipe> elements of all recipes in the database.
+
+    Args:
+        db_file: The path to the SQLite database file.
+        chunk_size: Number of rows fetched from the database at a time.
+            Defaults to config.XML_EXPORT_CHUNK_SIZE.
+
+    Yields:
+        One <recipe> element per recipe, in storage order.
+
+    Raises:
+        sqlite3.Error: If the database cannot be read.
+    """
+    chunk_size = chunk_size or config.XML_EXPORT_CHUNK_SIZE
+    conn = sqlite3.connect(db_file)
+    try:
+        cursor = conn.cursor()
+        if config.ASSET_DIR:
+            # The local copies of the images come with the rows, instead of one query per recipe
+            cursor.execute(
+                f"SELECT {database_manager.RECIPE_COLUMNS}, a.path, a.thumbnail_path FROM recipes "
+                "LEFT JOIN assets a ON a.url = recipes.image_url"
+            )
+        else:
+            cursor.execute(f"SELECT {database_manager.RECIPE_COLUMNS}, NULL, NULL FROM recipes")
+        rows = cursor.fetchmany(chunk_size)
+        while rows:
+            for *row, image_path, thumbnail_path in rows:
+                asset = (image_path, thumbnail_path) if image_path else None
+                yield _build_recipe_element(conn, Recipe.from_row(row), asset)
+            rows = cursor.fetchmany(chunk_size)
+    finally:
+        conn.close()
+
+@metrics.timed("xml_export_seconds")
+def export_to_xml(db_file: str, xml_file: str, chunk_size: int | None = None):
     """
     Exports all recipes from the SQLite database to an XML file.
-    Ingredients are parsed into quantity, unit, and item.
+    Ingredients are read pre-parsed into quantity, unit, and item.
     Instructions have action verbs highlighted and are placed in CDATA sections.
+    The catalog <summary> precedes the recipes.
+
+    Recipes are read from the database in chunks and each <recipe> element is
+    written as soon as it is built, so memory use does not grow with the size
+    of the catalog. The output is identical to pretty-printing the whole tree.
 
     Args:
         db_file: The path to the SQLite database file.
         xml_file: The name of the XML file to create.
+        chunk_size: Number of rows fetched from the database at a time.
+            Defaults to config.XML_EXPORT_CHUNK_SIZE.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(db_file)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM recipes")
-        recipes = cursor.fetchall()
+        recipe_elems = iter_recipe_elements(db_file, chunk_size)
+        first_elem = next(recipe_elems, None)
+
+        with atomic_write(xml_file) as f:
+            f.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+            if first_elem is None:
+                f.write(b"<recipes/>\n")
+            else:
+                # Use lxml's incremental writer so only one <recipe> is held in memory at a time
+                summary_elem = read_summary_element(db_file)
+                with etree.xmlfile(f, encoding='utf-8') as xf:
+                    with xf.element("recipes"):
+                        if summary_elem is not None:
+                            etree.indent(summary_elem, space="  ", level=1)
+                            xf.write("\n  ")
+                            xf.write(summary_elem)
+                        for recipe_elem in chain([first_elem], recipe_elems):
+                            # Indent as pretty_print would for a child of <recipes>
+                            etree.indent(recipe_elem, space="  ", level=1)
+                            xf.write("\n  ")
+                            xf.write(recipe_elem)
+                        xf.write("\n")
+                f.write(b"\n")
+        logger.info(f"Successfully exported recipes to {xml_file}")
     except sqlite3.Error as e:
-        print(f"Error accessing database for XML export: {e}")
-        return
-    finally:
-        if conn:
-            conn.close()
+        logger.error(f"Error accessing database for XML export: {e}")
+    except Exception as e:
+        logger.error(f"Error writing XML file '{xml_file}': {e}")
 
-    # Use lxml.etree to build the XML
-    root = etree.Element("recipes")
+@metrics.timed("xml_build_seconds")
+def build_recipes_tree(db_file: str) -> etree._ElementTree | None:
+    """
+    Builds the <recipes> document in memory, exactly as export_to_xml would
+    write it, without serializing it to disk.
 
-    for recipe in recipes:
-        recipe_elem = etree.SubElement(root, "recipe")
-        etree.SubElement(recipe_elem, "id").text = recipe[0]
-        etree.SubElement(recipe_elem, "title").text = recipe[1]
-        etree.SubElement(recipe_elem, "calories").text = str(recipe[4] if recipe[4] is not None else "N/A")
-        etree.SubElement(recipe_elem, "image_url").text = recipe[5]
-
-        # Only add video_url to XML if it's not empty or None
-        if recipe[7]:
-            etree.SubElement(recipe_elem, "video_url").text = recipe[7]
-
-        # Ingredients with separated quantity/unit/item
-        ingredients_elem = etree.SubElement(recipe_elem, "ingredients")
-        # Split the combined ingredients string from DB back into individual lines
-        for ingredient_line in recipe[2].split(","):
-            ingredient_line = ingredient_line.strip()
-            if ingredient_line:
-                ingredient_elem = etree.SubElement(ingredients_elem, "ingredient")
-                # Use data_processor to parse each ingredient line
-                quantity, unit, item = data_processor.parse_measurement(ingredient_line)
-                etree.SubElement(ingredient_elem, "quantity").text = quantity
-                etree.SubElement(ingredient_elem, "unit").text = unit
-                etree.SubElement(ingredient_elem, "item").text = item
-
-        # Instructions with highlighted actions in CDATA
-        instructions_elem = etree.SubElement(recipe_elem, "instructions")
-        # Use data_processor to highlight actions
-        instructions_text = data_processor.highlight_actions(recipe[3])
-        # Use lxml.etree.CDATA to wrap instructions text
-        instructions_elem.text = etree.CDATA(instructions_text)
-
-
-    # Write to XML file
+    Args:
+        db_file: The path to the SQLite database file.
+
+    Returns:
+        The XML tree, or None if the database cannot be read.
+    """
+    root = etree.Element("recipes")
     try:
-        # Use lxml's etree.tostring for pretty printing and writing to file
-        # The 'pretty_print=True' argument indents the XML for readability.
-        # The 'xml_declaration=True' includes <?xml version="1.0" encoding="utf-8"?>
-        xml_string = etree.tostring(root, encoding='utf-8', pretty_print=True, xml_declaration=True)
-        with open(xml_file, 'wb') as f:
-            f.write(xml_string)
-        print(f"Successfully exported recipes to {xml_file}")
-    except Exception as e:
-        print(f"Error writing XML file '{xml_file}': {e}")
+        root.extend(iter_recipe_elements(db_file))
+        summary_elem = read_summary_element(db_file) if len(root) else None
+        if summary_elem is not None:
+            root.insert(0, summary_elem)
+    except sqlite3.Error as e:
+        logger.error(f"Error accessing database for XML export: {e}")
+        return None
+    return etree.ElementTree(root)
+
+# Compiled stylesheets by path, with the modification time they were compiled at
+_compiled_xslt: dict[str, tuple[float, etree.XSLT]] = {}
+
+def get_compiled_xslt(xslt_file: str) -> etree.XSLT:
+    """
+    Returns the compiled XSLT stylesheet, recompiling it only if the file changed.
 
+    Args:
+        xslt_file: The path to the XSLT stylesheet.
 
+    Returns:
+        The compiled stylesheet.
+
+    Raises:
+        etree.XSLTParseError: If the stylesheet is invalid.
+        etree.XMLSyntaxError: If the stylesheet is not well-formed XML.
+    """
+    mtime = os.path.getmtime(xslt_file)
+    cached = _compiled_xslt.get(xslt_file)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, etree.XSLT(etree.parse(xslt_file)))
+        _compiled_xslt[xslt_file] = cached
+    return cached[1]
+
+def _stylesheet_params(output_html: str) -> dict:
+    """
+    Returns the stylesheet parameters of an HTML file: the relative URL of the
+    mirrored images as seen from the file's directory.
+    """
+    return {"asset_base": etree.XSLT.strparam(asset_mirror.get_asset_href_base(output_html))}
+
+@metrics.timed("html_export_seconds", mode="file")
 def transform_to_html(xml_file: str, xslt_file: str, output_html: str):
     """
     Transforms an XML file into an HTML file using an XSLT stylesheet.
@@ -85,22 +263,436 @@ def transform_to_html(xml_file: str, xslt_file: str, output_html: str):
         output_html: The path to the output HTML file.
     """
     try:
-        # Parse XML and XSLT using lxml.etree
+        # Parse XML using lxml.etree and apply the cached compiled stylesheet
         xml_doc = etree.parse(xml_file)
-        xslt_doc = etree.parse(xslt_file)
-
-        # Create transformer and apply transformation
-        transform = etree.XSLT(xslt_doc)
-        html_result = transform(xml_doc)
+        transform = get_compiled_xslt(xslt_file)
+        with metrics.timer("xslt_transform_seconds"):
+            html_result = transform(xml_doc, **_stylesheet_params(output_html))
 
         # Write output
-        with open(output_html, 'wb') as f:
+        with atomic_write(output_html) as f:
             f.write(html_result)
 
-        print(f"Successfully created HTML page at {output_html}")
+        logger.info(f"Successfully created HTML page at {output_html}")
+    except etree.XSLTParseError as e:
+        logger.error(f"Error parsing XSLT file '{xslt_file}': {e}")
+    except etree.XMLSyntaxError as e:
+        logger.error(f"Error parsing XML file '{xml_file}': {e}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during XML to HTML transformation: {e}")
+
+@metrics.timed("html_export_seconds", mode="in_memory")
+def export_and_transform(db_file: str, xslt_file: str, output_html: str, xml_file: str | None = None):
+    """
+    Transforms the recipes in the database straight into an HTML file, passing
+    the XML tree to the compiled stylesheet in memory instead of writing and
+    re-parsing an XML file.
+
+    Args:
+        db_file: The path to the SQLite database file.
+        xslt_file: The path to the XSLT stylesheet.
+        output_html: The path to the output HTML file.
+        xml_file: If given, the XML is also written to this file.
+    """
+    xml_doc = build_recipes_tree(db_file)
+    if xml_doc is None:
+        return
+    try:
+        if xml_file:
+            with atomic_write(xml_file) as f:
+                f.write(b"<?xml version='1.0' encoding='utf-8'?>\n") # As export_to_xml writes it
+                xml_doc.write(f, encoding='utf-8', pretty_print=True)
+            logger.info(f"Successfully exported recipes to {xml_file}")
+
+        transform = get_compiled_xslt(xslt_file)
+        with metrics.timer("xslt_transform_seconds"):
+            html_result = transform(xml_doc, **_stylesheet_params(output_html))
+        with atomic_write(output_html) as f:
+            f.write(html_result)
+
+        logger.info(f"Successfully created HTML page at {output_html}")
+    except etree.XSLTParseError as e:
+        logger.error(f"Error parsing XSLT file '{xslt_file}': {e}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during XML to HTML transformation: {e}")
+
+# Bump when the way fragments are produced changes, to invalidate all cached fragments
+_FRAGMENT_FORMAT_VERSION = "1"
+_RECIPES_LIST_START = b'<div id="recipesList">'
+
+def _get_render_version(xslt_file: str, output_html: str) -> str:
+    """
+    Hashes everything besides recipe content that affects rendered fragments:
+    the stylesheet, the ingredient parser, the highlighted action verbs and the
+    URL of the mirrored images.
+    """
+    digest = hashlib.sha256(f"{_FRAGMENT_FORMAT_VERSION}:{data_processor.PARSER_VERSION}".encode())
+    with open(xslt_file, 'rb') as f:
+        digest.update(f.read())
+    digest.update("\n".join(sorted(data_processor.get_action_highlighter().verbs)).encode('utf-8'))
+    digest.update(asset_mirror.get_asset_href_base(output_html).encode('utf-8'))
+    return digest.hexdigest()
+
+def _render_html_shell(transform: etree.XSLT, params: dict,
+                       summary_elem: etree._Element | None = None) -> tuple[bytes, bytes]:
+    """
+    Renders a catalog without recipes, with the given summary if any, and
+    splits it into the HTML before and after the recipe list.
+
+    Raises:
+        ValueError: If the stylesheet has no recipe list container.
+    """
+    root = etree.Element("recipes")
+    if summary_elem is not None:
+        root.append(deepcopy(summary_elem))
+    html = bytes(transform(etree.ElementTree(root), **params))
+    split_at = html.find(_RECIPES_LIST_START)
+    if split_at == -1:
+        raise ValueError("the stylesheet does not render a recipe list container")
+    split_at += len(_RECIPES_LIST_START)
+    return html[:split_at], html[split_at:]
+
+def _render_list_layout(transform: etree.XSLT, params: dict,
+                        shell: tuple[bytes, bytes]) -> tuple[tuple[bytes, bytes, bytes], tuple[bytes, bytes, bytes]]:
+    """
+    Finds the whitespace the HTML serializer puts around the recipes of the
+    list, by rendering catalogs of one and of two placeholder recipes. The
+    serializer indents a lone recipe differently from several, so both are kept.
+
+    Returns:
+        The (before, between, after) whitespace of a list of one recipe and of
+        a list of several recipes.
+
+    Raises:
+        ValueError: If the list is not rendered as the recipes separated by whitespace.
+    """
+    prefix, suffix = shell
+    layouts = []
+    for count in (1, 2):
+        root = etree.Element("recipes")
+        for _ in range(count):
+            etree.SubElement(root, "recipe")
+        html = bytes(transform(etree.ElementTree(root), **params))
+        if not (html.startswith(prefix) and html.endswith(suffix)):
+            raise ValueError("the stylesheet output around the recipe list depends on its content")
+        body = html[len(prefix):len(html) - len(suffix)]
+        content = body.strip()
+        layouts.append((body[:len(body) - len(body.lstrip())], content, body[len(body.rstrip()):]))
+    (one_before, recipe, one_after), (before, two_recipes, after) = layouts
+    between = two_recipes[len(recipe):len(two_recipes) - len(recipe)]
+    if not recipe or two_recipes != recipe + between + recipe or between.strip():
+        raise ValueError("the stylesheet does not render the recipe list as a sequence of recipes")
+    return (one_before, b"", one_after), (before, between, after)
+
+def _render_fragments(transform: etree.XSLT, params: dict, shell: tuple[bytes, bytes],
+                      recipe_elem: etree._Element) -> tuple[bytes, bytes]:
+    """
+    Renders the XML and HTML fragments of a single recipe.
+
+    Returns:
+        The (xml, html) fragments: the indented <recipe> element as export_to_xml
+        writes it, and the recipe's HTML as the stylesheet renders it.
+
+    Raises:
+        ValueError: If the recipe's HTML cannot be separated from the page around it.
+    """
+    etree.indent(recipe_elem, space="  ", level=1)
+    xml_fragment = etree.tostring(recipe_elem, encoding='utf-8')
+
+    root = etree.Element("recipes")
+    root.append(recipe_elem)
+    with metrics.timer("xslt_transform_seconds"):
+        html = bytes(transform(etree.ElementTree(root), **params))
+    prefix, suffix = shell
+    if not (html.startswith(prefix) and html.endswith(suffix)):
+        raise ValueError("the stylesheet output around a recipe depends on its content")
+    return xml_fragment, html[len(prefix):len(html) - len(suffix)]
+
+@metrics.timed("html_export_seconds", mode="incremental")
+def export_and_transform_incremental(db_file: str, xslt_file: str, output_html: str,
+                                     xml_file: str | None = None, cache_file: str | None = None):
+    """
+    Regenerates the HTML (and optionally the XML) catalog, re-rendering only
+    recipes whose content changed since the last run.
+
+    Every recipe's rendered XML and HTML fragments are cached in cache_file,
+    keyed by the recipe's content hash from the database, the local copies of
+    its image and a hash of the stylesheet. The outputs are reassembled from the cached fragments and
+    written atomically. If nothing changed and the outputs exist, nothing is
+    written at all.
+
+    Args:
+        db_file: The path to the SQLite database file.
+        xslt_file: The path to the XSLT stylesheet.
+        output_html: The path to the output HTML file.
+        xml_file: If given, the XML is also written to this file.
+        cache_file: The fragment cache database. Defaults to config.FRAGMENT_CACHE_DB.
+    """
+    cache = None
+    conn = None
+    try:
+        cache = FragmentCache(cache_file or config.FRAGMENT_CACHE_DB)
+        conn = sqlite3.connect(db_file)
+        transform = get_compiled_xslt(xslt_file)
+        params = _stylesheet_params(output_html)
+        render_version = _get_render_version(xslt_file, output_html)
+
+        # Render keys of the current catalog, in export order
+        if config.ASSET_DIR:
+            rows = conn.execute(
+                "SELECT r.id, r.content_hash, a.path, a.thumbnail_path FROM recipes r "
+                "LEFT JOIN assets a ON a.url = r.image_url"
+            )
+        else:
+            rows = ((recipe_id, content_hash, None, None)
+                    for recipe_id, content_hash in conn.execute("SELECT id, content_hash FROM recipes"))
+        recipe_keys = []
+        assets = {}
+        for recipe_id, content_hash, image_path, thumbnail_path in rows:
+            recipe_keys.append(
+                (recipe_id, data_processor.hash_content(content_hash, image_path, thumbnail_path, render_version))
+            )
+            if image_path:
+                assets[recipe_id] = (image_path, thumbnail_path)
+        # The summary comes from the precomputed statistics, so it costs no pass over the recipes
+        summary_elem = _build_summary_element(conn) if recipe_keys else None
+        summary_xml = b""
+        if summary_elem is not None:
+            etree.indent(summary_elem, space="  ", level=1)
+            summary_xml = etree.tostring(summary_elem, encoding='utf-8')
+        catalog_key = data_processor.hash_content(*(key for _, key in recipe_keys), summary_xml.decode('utf-8'))
+        outputs = [output_html] + ([xml_file] if xml_file else [])
+        if (cache.get_meta("catalog_key") == catalog_key
+                and cache.get_meta("outputs") == "\n".join(outputs)
+                and all(os.path.exists(path) for path in outputs)):
+            logger.info(f"{output_html} is up to date ({len(recipe_keys)} recipes unchanged).")
+            return
+
+        # Re-render only the recipes whose render key differs from the cached one
+        cached_keys = cache.get_render_keys()
+        shell = _render_html_shell(transform, params)
+        changed = [(recipe_id, key) for recipe_id, key in recipe_keys if cached_keys.get(recipe_id) != key]
+        for start in range(0, len(changed), config.XML_EXPORT_CHUNK_SIZE):
+            fragments = []
+            for recipe_id, key in changed[start:start + config.XML_EXPORT_CHUNK_SIZE]:
+                recipe = database_manager.get_recipe(conn, recipe_id)
+                xml_fragment, html_fragment = _render_fragments(
+                    transform, params, shell, _build_recipe_element(conn, recipe, assets.get(recipe_id))
+                )
+                fragments.append((recipe_id, key, xml_fragment, html_fragment))
+            cache.put_many(fragments)
+        current_ids = {recipe_id for recipe_id, _ in recipe_keys}
+        cache.delete_many([recipe_id for recipe_id in cached_keys if recipe_id not in current_ids])
+
+        # Reassemble the outputs from the cached fragments, laid out as the stylesheet lays out a full catalog
+        prefix, suffix = _render_html_shell(transform, params, summary_elem) if summary_xml else shell
+        with atomic_write(output_html) as f:
+            f.write(prefix)
+            if recipe_keys:
+                single, several = _render_list_layout(transform, params, shell)
+                before, between, after = single if len(recipe_keys) == 1 else several
+                f.write(before)
+                for i, (recipe_id, _) in enumerate(recipe_keys):
+                    if i:
+                        f.write(between)
+                    f.write(cache.get(recipe_id)[1].strip())
+                f.write(after)
+            f.write(suffix)
+        logger.info(f"Successfully created HTML page at {output_html} ({len(changed)} of {len(recipe_keys)} recipes re-rendered)")
+
+        if xml_file:
+            with atomic_write(xml_file) as f:
+                f.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+                if not recipe_keys:
+                    f.write(b"<recipes/>\n")
+                else:
+                    f.write(b"<recipes>")
+                    if summary_xml:
+                        f.write(b"\n  ")
+                        f.write(summary_xml)
+                    for recipe_id, _ in recipe_keys:
+                        f.write(b"\n  ")
+                        f.write(cache.get(recipe_id)[0])
+                    f.write(b"\n</recipes>\n")
+            logger.info(f"Successfully exported recipes to {xml_file}")
+
+        cache.set_meta("catalog_key", catalog_key)
+        cache.set_meta("outputs", "\n".join(outputs))
+    except ValueError as e:
+        logger.warning(f"Cannot render '{xslt_file}' incrementally ({e}); rendering the full catalog instead.")
+        export_and_transform(db_file, xslt_file, output_html, xml_file)
+    except etree.XSLTParseError as e:
+        logger.error(f"Error parsing XSLT file '{xslt_file}': {e}")
+    except sqlite3.Error as e:
+        logger.error(f"Error accessing database for incremental export: {e}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during incremental XML to HTML transformation: {e}")
+    finally:
+        if conn:
+            conn.close()
+        if cache:
+            cache.close()
+
+_PAGE_FILE_PATTERN = re.compile(r"page-(\d{4,})\.html")
+
+# Compiled stylesheet of a render worker process, set once by _init_render_worker
+_worker_transform = None
+
+def _init_render_worker(xslt_file: str):
+    """
+    Compiles the XSLT stylesheet once per render worker process.
+    """
+    global _worker_transform
+    _worker_transform = get_compiled_xslt(xslt_file)
+
+def _render_page(shard_xml: bytes, page: int, page_count: int, output_html: str, asset_base: str) -> str:
+    """
+    Transforms one shard of recipes into an HTML page inside a render worker.
+
+    Returns:
+        The path of the written page.
+    """
+    html_result = _worker_transform(
+        etree.fromstring(shard_xml),
+        page=str(page),
+        page_count=str(page_count),
+        asset_base=etree.XSLT.strparam(asset_base),
+    )
+    with atomic_write(output_html) as f:
+        f.write(html_result)
+    return output_html
+
+def _scan_page_titles(xml_file: str, page_size: int) -> list[list[str]]:
+    """
+    Streams the recipes of an XML file once and returns the recipe titles of
+    every page of page_size recipes, without keeping the recipes in memory.
+    """
+    pages = []
+    titles = []
+    for _, recipe_elem in etree.iterparse(xml_file, events=("end",), tag="recipe"):
+        titles.append(recipe_elem.findtext("title") or "")
+        recipe_elem.clear()
+        while recipe_elem.getprevious() is not None: # Drop the recipes already seen
+            del recipe_elem.getparent()[0]
+        if len(titles) == page_size:
+            pages.append(titles)
+            titles = []
+    if titles:
+        pages.append(titles)
+    return pages
+
+def _iter_recipe_shards(xml_file: str, page_size: int) -> Iterator[bytes]:
+    """
+    Streams the recipes of an XML file and yields them in shards of page_size.
+
+    Yields:
+        Serialized <recipes> documents holding the catalog summary and one shard.
+    """
+    summary_elem = None
+    shard = etree.Element("recipes")
+    count = 0
+    for _, elem in etree.iterparse(xml_file, events=("end",), tag=("summary", "recipe"), strip_cdata=False):
+        if elem.tag == "summary": # Precedes the recipes; every page shows it
+            summary_elem = elem
+            shard.append(deepcopy(summary_elem))
+            continue
+        shard.append(elem) # Moves the element out of the parsed document, freeing it
+        count += 1
+        if count == page_size:
+            yield etree.tostring(shard, encoding='utf-8')
+            shard = etree.Element("recipes")
+            if summary_elem is not None:
+                shard.append(deepcopy(summary_elem))
+            count = 0
+    if count:
+        yield etree.tostring(shard, encoding='utf-8')
+
+def _remove_stale_pages(output_dir: str, page_count: int):
+    """
+    Deletes the page files of an earlier run that had more pages.
+    """
+    for name in os.listdir(output_dir):
+        match = _PAGE_FILE_PATTERN.fullmatch(name)
+        if match and int(match.group(1)) > page_count:
+            os.remove(os.path.join(output_dir, name))
+
+def _write_index_page(output_dir: str, pages: list[tuple[str, list[str]]]):
+    """
+    Writes index.html linking to every page with the range of recipe titles it holds.
+    """
+    html = etree.Element("html", lang="en")
+    head = etree.SubElement(html, "head")
+    etree.SubElement(head, "meta", charset="UTF-8")
+    etree.SubElement(head, "title").text = "Recipe Collection"
+    body = etree.SubElement(html, "body")
+    etree.SubElement(body, "h1").text = "Recipe Enrichment"
+    recipe_count = sum(len(titles) for _, titles in pages)
+    etree.SubElement(body, "p").text = f"{recipe_count} recipes on {len(pages)} pages."
+    page_list = etree.SubElement(body, "ol")
+    for page_file, titles in pages:
+        link = etree.SubElement(etree.SubElement(page_list, "li"), "a", href=page_file)
+        link.text = f"{titles[0]} – {titles[-1]}" if len(titles) > 1 else titles[0]
+    with atomic_write(os.path.join(output_dir, "index.html")) as f:
+        f.write(etree.tostring(html, method="html", encoding='utf-8', doctype="<!DOCTYPE html>", pretty_print=True))
+
+@metrics.timed("html_export_seconds", mode="paginated")
+def render_html_pages(xml_file: str, xslt_file: str, output_dir: str,
+                      page_size: int | None = None, workers: int | None = None) -> list[str]:
+    """
+    Transforms an XML file into a paginated set of HTML pages plus an index page.
+
+    A first pass over the XML file collects the page titles and count. The
+    recipes are then streamed in shards of page_size to a pool of worker
+    processes, each of which compiles the stylesheet once, with only a few
+    shards per worker in flight at a time. Pages are written as
+    output_dir/page-0001.html, page-0002.html, ... with links between them,
+    and output_dir/index.html lists all pages. Pages left over from an
+    earlier run with more pages are deleted.
+
+    Args:
+        xml_file: The path to the input XML file.
+        xslt_file: The path to the XSLT stylesheet.
+        output_dir: The directory to write the pages to (created if missing).
+        page_size: Recipes per page. Defaults to config.HTML_PAGE_SIZE.
+        workers: Number of worker processes. Defaults to config.RENDER_WORKERS,
+            or the number of CPUs if that is not set.
+
+    Returns:
+        The paths of the written recipe pages. Returns an empty list on failure.
+    """
+    page_size = page_size or config.HTML_PAGE_SIZE or 100
+    workers = workers or config.RENDER_WORKERS or os.cpu_count()
+    try:
+        get_compiled_xslt(xslt_file) # Fail fast on an invalid stylesheet
+        # The navigation needs the page count and the index the titles before any page is rendered
+        pages = [
+            (f"page-{number:04d}.html", titles)
+            for number, titles in enumerate(_scan_page_titles(xml_file, page_size), start=1)
+        ]
+        os.makedirs(output_dir, exist_ok=True)
+
+        written = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                                 initargs=(xslt_file,)) as executor:
+            asset_base = asset_mirror.get_asset_href_base(os.path.join(output_dir, "index.html"))
+            in_flight = deque()
+            shards = zip(pages, _iter_recipe_shards(xml_file, page_size))
+            for number, ((page_file, _), shard_xml) in enumerate(shards, start=1):
+                if len(in_flight) >= 2 * workers: # Bound the serialized shards held in memory
+                    written.append(in_flight.popleft().result())
+                in_flight.append(executor.submit(
+                    _render_page, shard_xml, number, len(pages), os.path.join(output_dir, page_file), asset_base
+                ))
+            written.extend(future.result() for future in in_flight)
+
+        _remove_stale_pages(output_dir, len(pages))
+        _write_index_page(output_dir, pages)
+        logger.info(f"Successfully created {len(written)} HTML pages in {output_dir}")
+        return written
     except etree.XSLTParseError as e:
-        print(f"Error parsing XSLT file '{xslt_file}': {e}")
+        logger.error(f"Error parsing XSLT file '{xslt_file}': {e}")
     except etree.XMLSyntaxError as e:
-        print(f"Error parsing XML file '{xml_file}': {e}")
+        logger.error(f"Error parsing XML file '{xml_file}': {e}")
     except Exception as e:
-        print(f"An unexpected error occurred during XML to HTML transformation: {e}")
\ No newline at end of file
+        logger.error(f"An unexpected error occurred during paginated HTML rendering: {e}")
+    return []
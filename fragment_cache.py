@@ -0,0 +1,86 @@
+import logging
+import sqlite3
+from sqlite3 import Error
+
+logger = logging.getLogger(__name__)
+
+class FragmentCache:
+    """
+    A persistent SQLite store of rendered per-recipe XML and HTML fragments.
+
+    Each fragment is stored with the render key it was produced for (a hash of
+    the recipe content and of everything that affects rendering), so a
+    fragment is reused only while its recipe and the stylesheet are unchanged.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self._conn = sqlite3.connect(db_file)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS fragments (
+                recipe_id TEXT PRIMARY KEY,
+                render_key TEXT NOT NULL,
+                xml BLOB NOT NULL,
+                html BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._conn.commit()
+
+    def get_render_keys(self) -> dict[str, str]:
+        """
+        Returns the render key of every cached recipe fragment.
+        """
+        return dict(self._conn.execute("SELECT recipe_id, render_key FROM fragments"))
+
+    def get(self, recipe_id: str) -> tuple[bytes, bytes] | None:
+        """
+        Returns the cached (xml, html) fragments of a recipe, or None if not cached.
+        """
+        return self._conn.execute("SELECT xml, html FROM fragments WHERE recipe_id = ?", (recipe_id,)).fetchone()
+
+    def put_many(self, fragments: list[tuple[str, str, bytes, bytes]]):
+        """
+        Stores freshly rendered fragments.
+
+        Args:
+            fragments: Tuples of (recipe_id, render_key, xml, html).
+        """
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO fragments(recipe_id, render_key, xml, html) VALUES(?,?,?,?)",
+                    fragments
+                )
+        except Error as e:
+            logger.error(f"Error writing to fragment cache '{self.db_file}': {e}")
+
+    def delete_many(self, recipe_ids: list[str]):
+        """
+        Removes the fragments of recipes that are no longer in the catalog.
+        """
+        with self._conn:
+            self._conn.executemany("DELETE FROM fragments WHERE recipe_id = ?", [(recipe_id,) for recipe_id in recipe_ids])
+
+    def get_meta(self, name: str) -> str | None:
+        """
+        Returns a stored metadata value, or None if it is not set.
+        """
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str):
+        """
+        Stores a metadata value.
+        """
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta(name, value) VALUES(?,?)", (name, value))
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        self._conn.close()
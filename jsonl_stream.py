@@ -0,0 +1,235 @@
+import gzip
+import io
+import json
+import logging
+import os
+import zlib
+from collections.abc import Iterator
+
+try:
+    import zstandard # Optional, only needed for .zst output
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+_READ_SIZE = 64 * 1024
+_TRUNCATION_ERRORS = (EOFError, zlib.error) + ((zstandard.ZstdError,) if zstandard else ())
+
+def jsonl_filename(prefix: str, compression: str | None = None) -> str:
+    """
+    Builds the name of a JSON Lines file with the extension of its compression.
+
+    Args:
+        prefix: The file name without extension.
+        compression: None, "gzip" or "zstd".
+
+    Returns:
+        The file name, e.g. "recipes.jsonl.gz".
+    """
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(f"Unsupported JSON Lines compression: {compression!r}")
+    return f"{prefix}.jsonl{COMPRESSION_EXTENSIONS[compression]}"
+
+def _compression_of(filename: str) -> str | None:
+    if filename.endswith(".gz"):
+        return "gzip"
+    if filename.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"Reading or writing '{filename}' requires the 'zstandard' package.")
+        return "zstd"
+    return None
+
+def _open_text(filename: str, mode: str, compression: str | None = None) -> io.TextIOBase:
+    """
+    Opens a plain, gzip or zstd JSON Lines file for writing ("w") or appending
+    ("a") in text mode. Appending to a compressed file starts a new gzip member
+    or zstd frame.
+    """
+    if compression == "gzip":
+        return gzip.open(filename, mode + "t", encoding="utf-8")
+    if compression == "zstd":
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(filename, mode + "b")), encoding="utf-8")
+    return open(filename, mode, encoding="utf-8")
+
+def _iter_decompressed(filename: str, compression: str | None) -> Iterator[bytes]:
+    """
+    Yields the decompressed content of a file in chunks. Unlike gzip.open, data
+    before a truncated or corrupt block is still returned.
+    """
+    with open(filename, "rb") as raw:
+        if compression == "zstd":
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            while chunk := reader.read(_READ_SIZE):
+                yield chunk
+            return
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16) if compression == "gzip" else None
+        while chunk := raw.read(_READ_SIZE):
+            if decompressor is None:
+                yield chunk
+                continue
+            while chunk:
+                yield decompressor.decompress(chunk)
+                if not decompressor.eof:
+                    break
+                chunk = decompressor.unused_data # Start of the next gzip member
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+def read_jsonl(filename: str) -> Iterator[dict]:
+    """
+    Streams the records of a (possibly compressed) JSON Lines file. A truncated
+    last line or compressed block, left by an interrupted write, is skipped.
+
+    Args:
+        filename: The name of the JSON Lines file.
+
+    Yields:
+        The records in the order they were written.
+    """
+    if not os.path.exists(filename):
+        return
+    pending = b""
+    try:
+        for chunk in _iter_decompressed(filename, _compression_of(filename)):
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping incomplete record in '{filename}'")
+    except _TRUNCATION_ERRORS:
+        logger.warning(f"Skipping truncated end of '{filename}'")
+        return
+    if pending.strip():
+        logger.warning(f"Skipping incomplete record in '{filename}'")
+
+def read_recipes(filename: str) -> Iterator[tuple[str, dict]]:
+    """
+    Streams the recipes of a file written by JsonlWriter, skipping the header
+    and footer records.
+
+    Args:
+        filename: The name of the JSON Lines file.
+
+    Yields:
+        Tuples of (category, recipe) with the raw MealDB recipe dictionaries.
+    """
+    for record in read_jsonl(filename):
+        if record.get("type") == "recipe":
+            yield record["category"], record["recipe"]
+
+class JsonlWriter:
+    """
+    Streams recipes to a JSON Lines file, one compact record per line, as they
+    are fetched. Only per-category counters are kept in memory.
+
+    The file starts with a {"type": "header", "metadata": ...} record, holds one
+    {"type": "recipe", "category": ..., "recipe": ...} record per recipe and
+    ends with a {"type": "footer", ...} record holding the totals. Records are
+    flushed after every `write_recipes` call, so the file can be tailed while
+    a crawl is running.
+    """
+
+    def __init__(self, filename: str, metadata: dict | None = None, resume: bool = False,
+                 recorded_ids: set[str] | None = None):
+        """
+        Opens the file for writing.
+
+        Args:
+            filename: The output file. A ".gz" or ".zst" extension selects compression.
+            metadata: The header record's metadata, written when starting a new file.
+            resume: Continue an existing file instead of starting a new one. Its
+                    intact records are kept and counted; a truncated tail is dropped.
+            recorded_ids: When resuming, the IDs of the recipes the crawl checkpoint
+                          recorded. Recipe records written after the last checkpoint
+                          are dropped, as the resumed crawl writes them again.
+        """
+        self.filename = filename
+        self.compression = _compression_of(filename)
+        self.recipe_count = 0
+        self.category_counts = {}
+        if resume and os.path.exists(filename):
+            self._recover(recorded_ids)
+            self._file = _open_text(filename, "a", self.compression)
+        else:
+            self._file = _open_text(filename, "w", self.compression)
+            self._write({"type": "header", "metadata": metadata or {}})
+            self.flush()
+
+    def _recover(self, recorded_ids: set[str] | None):
+        """
+        Rewrites the file without a truncated tail, and without the recipes not
+        in `recorded_ids` if given, so new records can be appended after the
+        intact ones, and restores the counters.
+        """
+        temp_filename = f"{self.filename}.tmp"
+        dropped = 0
+        with _open_text(temp_filename, "w", self.compression) as out:
+            for record in read_jsonl(self.filename):
+                if record.get("type") == "footer":
+                    continue # Rewritten by close()
+                if record.get("type") == "recipe":
+                    if recorded_ids is not None and record["recipe"].get("idMeal") not in recorded_ids:
+                        dropped += 1
+                        continue
+                    self._count(record["category"])
+                out.write(json.dumps(record, ensure_ascii=False))
+                out.write("\n")
+        os.replace(temp_filename, self.filename)
+        if dropped:
+            logger.info(f"Dropped {dropped} recipes written to '{self.filename}' after the last checkpoint")
+
+    def _count(self, category: str):
+        self.recipe_count += 1
+        self.category_counts[category] = self.category_counts.get(category, 0) + 1
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+
+    def write_recipes(self, recipes: list[tuple[str, dict]]):
+        """
+        Appends recipes and flushes them to disk.
+
+        Args:
+            recipes: Tuples of (category, recipe).
+        """
+        for category, recipe in recipes:
+            self._write({"type": "recipe", "category": category, "recipe": recipe})
+            self._count(category)
+        self.flush()
+
+    def flush(self):
+        """
+        Flushes buffered records through the compressor and to disk.
+        """
+        self._file.flush() # gzip and zstd end the current block, so readers can decode it
+        try:
+            os.fsync(self._file.fileno())
+        except (OSError, AttributeError, io.UnsupportedOperation):
+            pass
+
+    def close(self, summary: dict | None = None):
+        """
+        Writes the footer record and closes the file.
+
+        Args:
+            summary: Extra fields for the footer record.
+        """
+        self._write({
+            "type": "footer",
+            "total_recipes": self.recipe_count,
+            "recipes_per_category": self.category_counts,
+            **(summary or {})
+        })
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close() # Leave out the footer, the file can still be resumed
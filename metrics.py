@@ -0,0 +1,245 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from atomic_file import atomic_write
+
+# Upper bounds of the histogram buckets, in seconds for timers
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_counters: dict[tuple, float] = {}
+_gauges: dict[tuple, float] = {}
+_histograms: dict[tuple, dict] = {}
+_collectors: list[Callable[[], None]] = []
+_started_at = time.time()
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+
+def increment(name: str, value: float = 1, **labels):
+    """
+    Adds to a counter, e.g. increment("http_requests_total", endpoint="lookup.php").
+
+    Args:
+        name: The counter name.
+        value: The amount to add.
+        **labels: Labels that distinguish series of the same counter.
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def set_gauge(name: str, value: float, **labels):
+    """
+    Sets a gauge to its current value.
+
+    Args:
+        name: The gauge name.
+        value: The current value.
+        **labels: Labels that distinguish series of the same gauge.
+    """
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+def observe(name: str, value: float, **labels):
+    """
+    Records a value in a histogram, keeping its count, sum, min, max and bucket counts.
+
+    Args:
+        name: The histogram name.
+        value: The observed value.
+        **labels: Labels that distinguish series of the same histogram.
+    """
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                "count": 0, "sum": 0.0, "min": value, "max": value, "buckets": [0] * (len(DEFAULT_BUCKETS) + 1)
+            }
+        histogram["count"] += 1
+        histogram["sum"] += value
+        histogram["min"] = min(histogram["min"], value)
+        histogram["max"] = max(histogram["max"], value)
+        histogram["buckets"][bisect_left(DEFAULT_BUCKETS, value)] += 1
+
+@contextmanager
+def timer(name: str, **labels) -> Iterator[None]:
+    """
+    Times the enclosed block and records its duration in seconds in a histogram.
+
+    Args:
+        name: The histogram name, by convention ending in "_seconds".
+        **labels: Labels that distinguish series of the same histogram.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+def timed(name: str, **labels) -> Callable:
+    """
+    Decorator that records the duration of every call of a function, like timer().
+
+    Args:
+        name: The histogram name, by convention ending in "_seconds".
+        **labels: Labels that distinguish series of the same histogram.
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def register_collector(collector: Callable[[], None]):
+    """
+    Registers a function that is called before every snapshot, so modules can
+    publish values they track themselves (such as cache statistics) as gauges.
+    """
+    with _lock:
+        _collectors.append(collector)
+
+def reset():
+    """
+    Clears all recorded metrics and restarts the run clock.
+    """
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+        _started_at = time.time()
+
+def snapshot() -> dict:
+    """
+    Returns all recorded metrics as a JSON-serializable dictionary.
+
+    Returns:
+        A dictionary with the run's start time and duration, and the counters,
+        gauges and histograms grouped by name. Every series is a dictionary
+        with its labels and its value (or histogram statistics).
+    """
+    for collector in list(_collectors):
+        collector()
+    report = {
+        "started_at": datetime.fromtimestamp(_started_at).isoformat(),
+        "duration_seconds": round(time.time() - _started_at, 3),
+        "counters": {},
+        "gauges": {},
+        "histograms": {},
+    }
+    with _lock:
+        for section, series in (("counters", _counters), ("gauges", _gauges)):
+            for (name, labels), value in sorted(series.items()):
+                report[section].setdefault(name, []).append({"labels": dict(labels), "value": value})
+        for (name, labels), histogram in sorted(_histograms.items()):
+            report["histograms"].setdefault(name, []).append({
+                "labels": dict(labels),
+                "count": histogram["count"],
+                "sum": histogram["sum"],
+                "min": histogram["min"],
+                "max": histogram["max"],
+                "mean": histogram["sum"] / histogram["count"],
+                "buckets": dict(zip([*map(str, DEFAULT_BUCKETS), "+Inf"], histogram["buckets"])),
+            })
+    return report
+
+def _atomic_write_text(path: str, text: str):
+    with atomic_write(path) as f:
+        f.write(text.encode("utf-8"))
+
+def write_json_report(path: str, extra: dict | None = None):
+    """
+    Writes the current metrics as a JSON run report.
+
+    Args:
+        path: The report file.
+        extra: Additional top-level fields, e.g. the run's options.
+    """
+    _atomic_write_text(path, json.dumps({**(extra or {}), **snapshot()}, indent=2))
+
+def _format_labels(labels: dict, **extra) -> str:
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{label}="{value}"' for label, value in zip(labels, escaped)) + "}"
+
+def write_prometheus_textfile(path: str, prefix: str = "recipes_"):
+    """
+    Writes the current metrics in the Prometheus text exposition format, for
+    the node_exporter textfile collector. The file is replaced atomically.
+
+    Args:
+        path: The .prom file.
+        prefix: Prepended to every metric name.
+    """
+    report = snapshot()
+    lines = [
+        f"# TYPE {prefix}run_duration_seconds gauge",
+        f"{prefix}run_duration_seconds {report['duration_seconds']}",
+    ]
+    for kind, section in (("counter", "counters"), ("gauge", "gauges")):
+        for name, series in report[section].items():
+            lines.append(f"# TYPE {prefix}{name} {kind}")
+            lines.extend(f"{prefix}{name}{_format_labels(s['labels'])} {s['value']}" for s in series)
+    for name, series in report["histograms"].items():
+        lines.append(f"# TYPE {prefix}{name} histogram")
+        for s in series:
+            cumulative = 0
+            for bound, count in s["buckets"].items():
+                cumulative += count
+                lines.append(f"{prefix}{name}_bucket{_format_labels(s['labels'], le=bound)} {cumulative}")
+            lines.append(f"{prefix}{name}_sum{_format_labels(s['labels'])} {s['sum']}")
+            lines.append(f"{prefix}{name}_count{_format_labels(s['labels'])} {s['count']}")
+    _atomic_write_text(path, "\n".join(lines) + "\n")
+
+_CONSOLE_HANDLER_NAME = "recipes-console" # Tells the handler configure_logging installed from the others
+
+class JsonLogFormatter(logging.Formatter):
+    """
+    Formats log records as single-line JSON objects, including any fields
+    passed through the `extra` argument of the logging call.
+    """
+
+    _STANDARD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in self._STANDARD_FIELDS)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging(level: str = "INFO", log_format: str = "text"):
+    """
+    Sends the log records of all modules to stderr. Calling it again replaces
+    the handler it installed; other handlers on the root logger are kept.
+
+    Args:
+        level: The minimum level to show, e.g. "DEBUG", "INFO" or "WARNING".
+        log_format: "text" for human-readable lines, "json" for one JSON object per line.
+    """
+    handler = logging.StreamHandler()
+    if log_format == "json":
+        handler.setFormatter(JsonLogFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S"))
+    handler.name = _CONSOLE_HANDLER_NAME
+    root = logging.getLogger()
+    root.handlers[:] = [h for h in root.handlers if h.name != _CONSOLE_HANDLER_NAME] + [handler]
+    root.setLevel(level.upper())
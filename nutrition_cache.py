@@ -0,0 +1,131 @@
+import logging
+import sqlite3
+import threading
+import time
+from sqlite3 import Error
+
+logger = logging.getLogger(__name__)
+
+class NutritionCache:
+    """
+    A persistent SQLite cache of calories per normalized ingredient line.
+
+    Entries expire after `ttl` seconds. Lines the API had no data for expire
+    after `negative_ttl` seconds instead, if given, so they can be retried
+    sooner. Once the cache holds more than `max_entries` rows the least
+    recently used ones are evicted. Hit and miss counters are kept for the
+    lifetime of the object.
+    """
+
+    def __init__(self, db_file: str, ttl: float, max_entries: int, negative_ttl: float | None = None):
+        self.db_file = db_file
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS nutrition_cache (
+                ingredient TEXT PRIMARY KEY,
+                calories REAL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_cache_last_used ON nutrition_cache(last_used)")
+        self._conn.commit()
+
+    def get_many(self, ingredients: list[str]) -> dict[str, float | None]:
+        """
+        Looks up several normalized ingredient lines at once.
+
+        Args:
+            ingredients: Normalized ingredient lines.
+
+        Returns:
+            A dictionary with an entry for every fresh cached line. Its value is
+            the cached calories, or None if the API had no data for it.
+        """
+        if not ingredients:
+            return {}
+        now = time.time()
+        found = {}
+        with self._lock:
+            for start in range(0, len(ingredients), 500): # Stay below SQLite's bound-parameter limit
+                chunk = ingredients[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT ingredient, calories FROM nutrition_cache "
+                    f"WHERE ingredient IN ({placeholders}) "
+                    f"AND fetched_at >= CASE WHEN calories IS NULL THEN ? ELSE ? END",
+                    (*chunk, now - self.negative_ttl, now - self.ttl),
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE nutrition_cache SET last_used = ? WHERE ingredient = ?",
+                    [(now, ingredient) for ingredient in found],
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(ingredients) - len(found)
+        return found
+
+    def put_many(self, calories: dict[str, float | None]):
+        """
+        Stores freshly fetched calories and evicts the least recently used
+        entries if the cache grew past its size cap.
+
+        Args:
+            calories: A dictionary mapping normalized ingredient lines to calories (or None).
+        """
+        if not calories:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO nutrition_cache(ingredient, calories, fetched_at, last_used) VALUES(?,?,?,?)",
+                    [(ingredient, value, now, now) for ingredient, value in calories.items()],
+                )
+                self._conn.execute("""
+                    DELETE FROM nutrition_cache WHERE ingredient IN (
+                        SELECT ingredient FROM nutrition_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+                self._conn.commit()
+            except Error as e:
+                logger.error(f"Error writing to nutrition cache '{self.db_file}': {e}")
+
+    def purge_expired(self) -> int:
+        """
+        Deletes all entries older than their TTL.
+
+        Returns:
+            The number of deleted entries.
+        """
+        with self._lock:
+            now = time.time()
+            cursor = self._conn.execute(
+                "DELETE FROM nutrition_cache WHERE fetched_at < CASE WHEN calories IS NULL THEN ? ELSE ? END",
+                (now - self.negative_ttl, now - self.ttl),
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters and the current number of cached entries.
+        """
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM nutrition_cache").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": size}
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,247 @@
+import csv
+import difflib
+import logging
+import os
+import re
+import sqlite3
+import unicodedata
+from sqlite3 import Error
+
+logger = logging.getLogger(__name__)
+
+# Grams per unit, keyed by the full unit names data_processor.UNIT_MAPPING produces
+MASS_UNIT_GRAMS = {"gram": 1.0, "kilogram": 1000.0, "ounce": 28.35, "pound": 453.6}
+# Milliliters per unit; converted to grams with the food's density (1 g/ml if unknown)
+VOLUME_UNIT_ML = {
+    "milliliter": 1.0, "liter": 1000.0, "teaspoon": 4.93, "tablespoon": 14.79, "cup": 236.6,
+    "pinch": 0.31, "dash": 0.62, "bottle": 500.0,
+}
+# Grams per countable unit; None means one piece of the food itself
+COUNT_UNIT_GRAMS = {
+    "clove": 5.0, "slice": 30.0, "can": 400.0, "packet": 100.0, "sprig": 1.0, "stalk": 40.0,
+    "head": 500.0, "sheet": 5.0, "piece": None,
+}
+DEFAULT_PORTION_GRAMS = 100.0 # Per counted item when the food has no piece size, as CalorieNinjas assumes
+UNMEASURED_GRAMS = 5.0 # Lines without quantity or unit, e.g. "salt" or "to taste black pepper"
+
+_QUANTITY_PART_PATTERN = re.compile(r"\d+/\d+|\d+(?:\.\d+)?|[¼½¾⅐-⅞]")
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+def parse_quantity(quantity: str) -> float | None:
+    """
+    Converts a quantity string as produced by parse_measurement into a number.
+
+    Args:
+        quantity: E.g. "2", "2.5", "1/2", "1 1/2", "½" or "1½".
+
+    Returns:
+        The quantity, or None if the string holds no number.
+    """
+    parts = _QUANTITY_PART_PATTERN.findall(quantity)
+    if not parts:
+        return None
+    total = 0.0
+    for part in parts:
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            total += int(numerator) / int(denominator) if int(denominator) else 0.0
+        elif part.isdigit() or "." in part:
+            total += float(part)
+        else:
+            total += unicodedata.numeric(part)
+    return total
+
+def _singular(word: str) -> str:
+    """
+    Reduces a plural food word to the singular form used in the table ("tomatoes" -> "tomato").
+    """
+    if len(word) > 4 and word.endswith(("oes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def _words(text: str) -> list[str]:
+    return [_singular(word) for word in _WORD_PATTERN.findall(text.lower())]
+
+class NutritionTable:
+    """
+    An offline table of calories per 100 g, stored in SQLite and held in memory
+    for matching.
+
+    Ingredient items are matched to table entries by their longest run of
+    words that names a food (preferring the last one, so "chicken stock"
+    matches "chicken stock" rather than "chicken"), after correcting
+    misspelled words to the closest known food word.
+    """
+
+    def __init__(self, db_file: str, fuzzy_cutoff: float = 0.85):
+        self.db_file = db_file
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS foods (
+                name TEXT PRIMARY KEY,
+                kcal_per_100g REAL NOT NULL,
+                grams_per_piece REAL,
+                density_g_per_ml REAL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        """
+        Reads the table into memory and builds the word vocabulary used for matching.
+        """
+        self._foods = {
+            name: (kcal, grams_per_piece, density)
+            for name, kcal, grams_per_piece, density in self._conn.execute(
+                "SELECT name, kcal_per_100g, grams_per_piece, density_g_per_ml FROM foods"
+            )
+        }
+        self._longest_name = max((len(name.split()) for name in self._foods), default=0)
+        self._vocabulary = sorted({word for name in self._foods for word in name.split()})
+        self._matches: dict[str, str | None] = {}
+
+    def __len__(self) -> int:
+        return len(self._foods)
+
+    def import_csv(self, csv_file: str) -> int:
+        """
+        Loads food entries from a CSV file with the columns name, kcal_per_100g
+        and optionally grams_per_piece and density_g_per_ml, replacing entries
+        with the same name.
+
+        Args:
+            csv_file: The path to the CSV file.
+
+        Returns:
+            The number of imported entries.
+        """
+        def number(value: str | None) -> float | None:
+            return float(value) if value not in (None, "") else None
+
+        with open(csv_file, newline="", encoding="utf-8") as f:
+            rows = [
+                (" ".join(_words(row["name"])), float(row["kcal_per_100g"]),
+                 number(row.get("grams_per_piece")), number(row.get("density_g_per_ml")))
+                for row in csv.DictReader(f)
+            ]
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO foods(name, kcal_per_100g, grams_per_piece, density_g_per_ml) "
+                    "VALUES(?,?,?,?)",
+                    rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta(name, value) VALUES('csv_mtime', ?)", (str(os.path.getmtime(csv_file)),)
+                )
+        except Error as e:
+            logger.error(f"Error importing nutrition table '{csv_file}': {e}")
+            return 0
+        self._load()
+        logger.info(f"Imported {len(rows)} foods from {csv_file} into {self.db_file}")
+        return len(rows)
+
+    def import_csv_if_changed(self, csv_file: str) -> int:
+        """
+        Imports a CSV file unless the same version of it was imported before.
+
+        Returns:
+            The number of imported entries (0 if nothing changed).
+        """
+        if not os.path.exists(csv_file):
+            return 0
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'csv_mtime'").fetchone()
+        if self._foods and row and float(row[0]) >= os.path.getmtime(csv_file):
+            return 0
+        return self.import_csv(csv_file)
+
+    def _match_words(self, words: list[str]) -> str | None:
+        for length in range(min(len(words), self._longest_name), 0, -1):
+            for start in range(len(words) - length, -1, -1): # Rightmost first: the head noun comes last
+                name = " ".join(words[start:start + length])
+                if name in self._foods:
+                    return name
+        return None
+
+    def match(self, item: str) -> str | None:
+        """
+        Finds the table entry for an ingredient item, e.g. "chopped tomatoes" -> "chopped tomato".
+
+        Args:
+            item: The item part of a measurement, without quantity and unit.
+
+        Returns:
+            The name of the matched food, or None if nothing matches.
+        """
+        if item in self._matches:
+            return self._matches[item]
+        words = _words(item)
+        name = self._match_words(words)
+        if name is None and words and self.fuzzy_cutoff < 1:
+            corrected = [
+                next(iter(difflib.get_close_matches(word, self._vocabulary, 1, self.fuzzy_cutoff)), word)
+                for word in words
+            ]
+            name = self._match_words(corrected)
+        self._matches[item] = name
+        return name
+
+    def grams(self, quantity: float | None, unit: str, grams_per_piece: float | None,
+              density: float | None) -> float:
+        """
+        Converts a quantity in a unit to grams of a food.
+        """
+        if unit in MASS_UNIT_GRAMS:
+            return (quantity or 1) * MASS_UNIT_GRAMS[unit]
+        if unit in VOLUME_UNIT_ML:
+            return (quantity or 1) * VOLUME_UNIT_ML[unit] * (density or 1.0)
+        if unit in COUNT_UNIT_GRAMS:
+            return (quantity or 1) * (COUNT_UNIT_GRAMS[unit] or grams_per_piece or DEFAULT_PORTION_GRAMS)
+        if quantity is None:
+            return grams_per_piece or UNMEASURED_GRAMS # One piece ("egg"), or a seasoning amount ("salt")
+        return quantity * (grams_per_piece or DEFAULT_PORTION_GRAMS) # A number of pieces ("2 eggs")
+
+    def estimate(self, quantity: str, unit: str, item: str) -> float | None:
+        """
+        Estimates the calories of one parsed measurement.
+
+        Args:
+            quantity: The quantity string, e.g. "1 1/2".
+            unit: The full unit name, e.g. "cup", or "" if there is none.
+            item: The food, e.g. "plain flour".
+
+        Returns:
+            The estimated calories, or None if the item is not in the table.
+        """
+        name = self.match(item)
+        if name is None:
+            return None
+        kcal, grams_per_piece, density = self._foods[name]
+        return kcal * self.grams(parse_quantity(quantity), unit, grams_per_piece, density) / 100
+
+    def estimate_many(self, quantities: tuple[str, ...], units: tuple[str, ...],
+                      items: tuple[str, ...]) -> list[float | None]:
+        """
+        Estimates the calories of many parsed measurements, given as the
+        aligned columns returned by data_processor.parse_measurements.
+
+        Returns:
+            The estimated calories of every line, or None where the item is not in the table.
+        """
+        return list(map(self.estimate, quantities, units, items))
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        self._conn.close()
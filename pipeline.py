@@ -0,0 +1,174 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+import config
+import api_service
+import data_processor
+import metrics
+
+logger = logging.getLogger(__name__)
+
+_DONE = object() # Tells a stage worker that its input is exhausted
+
+def _run_workers(name: str, target: Callable, workers: int, outbox: queue.Queue, downstream_workers: int):
+    """
+    Starts `workers` daemon threads running `target`, and posts one end marker
+    per downstream worker to `outbox` once all of them have finished.
+    """
+    threads = [threading.Thread(target=target, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    def close():
+        for thread in threads:
+            thread.join()
+        for _ in range(downstream_workers):
+            outbox.put(_DONE)
+
+    threading.Thread(target=close, name=f"{name}-close", daemon=True).start()
+
+def crawl(categories: list[str], select_recipe_ids: Callable[[str, list[dict] | None], list[str]],
+          stored_hashes: dict[str, str]) -> Iterator[tuple[str, str, dict | None]]:
+    """
+    Fetches and enriches the recipes of several categories as a pipeline of
+    concurrent stages connected by bounded queues:
+
+    1. listing: fetches the category listings (config.PIPELINE_LISTING_WORKERS)
+    2. details: fetches the full recipes with api_service.fetch_recipe_details_many,
+       config.PIPELINE_DETAIL_WORKERS requests at a time
+    3. enrichment: looks up the calories of new or changed ingredients in
+       batches of config.PIPELINE_ENRICH_BATCH_SIZE (config.PIPELINE_ENRICH_WORKERS)
+
+    Every queue holds at most config.PIPELINE_QUEUE_SIZE items, so a slow
+    stage throttles the ones before it, and the listing stage waits once it
+    is config.PIPELINE_REORDER_WINDOW recipes ahead of the oldest one still
+    in flight. The caller consumes the results as the final, single-threaded
+    writer stage; it alone touches the database. An exception raised by the
+    listing stage is re-raised to the caller after the recipes listed before
+    it.
+
+    Args:
+        categories: The category names to crawl, in output order.
+        select_recipe_ids: Called from the listing stage with each category and
+                           its listing, or None if the listing could not be
+                           fetched; returns the IDs of the recipes to fetch.
+        stored_hashes: The ingredient hashes of stored recipes, so unchanged
+                       recipes skip the nutrition lookup.
+
+    Yields:
+        Tuples of (category, recipe_id, recipe_details) in listing order.
+        recipe_details is the fetched Recipe, or None if it could not be fetched.
+    """
+    id_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+    detail_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+    enriched_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+    detail_workers = config.PIPELINE_DETAIL_WORKERS
+    enrich_workers = config.PIPELINE_ENRICH_WORKERS
+    busy = {"listing": 0.0, "details": 0.0, "enrichment": 0.0}
+    busy_lock = threading.Lock()
+    # Bounds the results waiting to be reordered behind a slow recipe
+    reorder_window = threading.Semaphore(config.PIPELINE_REORDER_WINDOW)
+    listing_errors = []
+
+    def record_busy(stage: str, started: float):
+        seconds = time.perf_counter() - started
+        metrics.increment("pipeline_busy_seconds_total", seconds, stage=stage)
+        with busy_lock:
+            busy[stage] += seconds
+
+    def list_categories():
+        # Listings are fetched concurrently but numbered in category order
+        seq = 0
+        with ThreadPoolExecutor(max_workers=config.PIPELINE_LISTING_WORKERS) as executor:
+            started = time.perf_counter()
+            listings = executor.map(lambda category: api_service.fetch_recipes_by_category(category, None), categories)
+            for category, recipes in zip(categories, listings):
+                record_busy("listing", started)
+                for recipe_id in select_recipe_ids(category, recipes):
+                    reorder_window.acquire()
+                    id_queue.put((seq, category, recipe_id))
+                    seq += 1
+                started = time.perf_counter()
+
+    def fetch_details():
+        # The IDs are handed to a bounded pool of requests, whose results come back in the same order
+        handed = deque()
+
+        def recipe_ids():
+            while (item := id_queue.get()) is not _DONE:
+                handed.append((*item, time.perf_counter()))
+                yield item[2]
+
+        last_result = 0.0
+        for recipe_details in api_service.fetch_recipe_details_many(recipe_ids(), detail_workers):
+            seq, category, recipe_id, handed_at = handed.popleft()
+            # Busy from when the recipe was requested, or the previous result arrived, until now
+            record_busy("details", max(handed_at, last_result))
+            last_result = time.perf_counter()
+            detail_queue.put((seq, category, recipe_id, recipe_details))
+
+    def enrich():
+        finished = False
+        while not finished:
+            # Wait for one recipe, then take whatever else is ready to fill the batch
+            batch = [detail_queue.get()]
+            while batch[-1] is not _DONE and len(batch) < config.PIPELINE_ENRICH_BATCH_SIZE:
+                try:
+                    batch.append(detail_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _DONE:
+                batch.pop()
+                finished = True
+
+            started = time.perf_counter()
+            changed_ingredients = []
+            for _, _, recipe_id, recipe_details in batch:
+                if recipe_details:
+                    ingredients_str = data_processor.parse_ingredients(recipe_details)
+                    if stored_hashes.get(recipe_id) != data_processor.hash_ingredients(ingredients_str):
+                        changed_ingredients.append(ingredients_str)
+            try:
+                data_processor.prefetch_calories(changed_ingredients)
+            except Exception as e:
+                logger.error(f"Error looking up nutrition data: {e}") # Looked up again when the recipes are stored
+            record_busy("enrichment", started)
+            for item in batch:
+                enriched_queue.put(item)
+
+    def run_listing():
+        try:
+            list_categories()
+        except BaseException as e:
+            listing_errors.append(e) # Re-raised by the writer once the recipes listed so far are out
+        finally:
+            id_queue.put(_DONE)
+
+    threading.Thread(target=run_listing, name="listing", daemon=True).start()
+    _run_workers("details", fetch_details, 1, detail_queue, enrich_workers)
+    _run_workers("enrichment", enrich, enrich_workers, enriched_queue, 1)
+
+    # Hand the results to the writer in listing order, whatever order the workers finish in
+    started = time.perf_counter()
+    pending = {}
+    next_seq = 0
+    while (item := enriched_queue.get()) is not _DONE:
+        pending[item[0]] = item
+        while next_seq in pending:
+            _, category, recipe_id, recipe_details = pending.pop(next_seq)
+            next_seq += 1
+            reorder_window.release()
+            yield category, recipe_id, recipe_details
+    if listing_errors:
+        raise listing_errors[0]
+
+    elapsed = time.perf_counter() - started
+    metrics.observe("pipeline_seconds", elapsed)
+    logger.info(
+        f"Pipeline finished in {elapsed:.1f}s; busy time summed over workers: "
+        + ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in busy.items())
+    )
@@ -0,0 +1,415 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+import config
+import database_manager
+import metrics
+
+logger = logging.getLogger(__name__)
+
+class ReadOnlyConnectionPool:
+    """
+    A pool of read-only SQLite connections shared by the request threads.
+
+    Connections are opened on demand, up to `size`, and handed out one per
+    request. Each connection keeps its own cache of prepared statements, so
+    the fixed queries of the service are compiled once per connection.
+    """
+
+    def __init__(self, db_file: str, size: int):
+        self._uri = Path(db_file).resolve().as_uri() + "?mode=ro"
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False, cached_statements=256)
+        conn.execute(f"PRAGMA cache_size=-{int(config.SQLITE_CACHE_SIZE_KB)}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of the with-block, waiting if all are in use.
+        """
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+class ResponseCache:
+    """
+    A thread-safe LRU cache of encoded responses, keyed by request path.
+
+    The whole cache belongs to one store version; it is cleared as soon as a
+    newer version is seen, so responses never outlive the data they were built from.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.version = None
+        self._entries: OrderedDict[str, tuple[int, bytes, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: int) -> tuple[int, bytes, str] | None:
+        with self._lock:
+            if version != self.version:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, version: int, entry: tuple[int, bytes, str]):
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.version = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class QueryError(Exception):
+    """
+    A request that cannot be answered, carrying its HTTP status.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _recipe_summaries(rows: list[tuple[str, str]]) -> list[dict]:
+    return [{"id": recipe_id, "title": title} for recipe_id, title in rows]
+
+def _int_param(params: dict, name: str, default: int, maximum: int) -> int:
+    try:
+        value = int(params.get(name, [default])[0])
+    except ValueError:
+        raise QueryError(400, f"'{name}' must be an integer")
+    return max(0, min(value, maximum))
+
+def get_recipe(conn: sqlite3.Connection, recipe_id: str) -> dict:
+    """
+    Returns a recipe with its parsed ingredients, as served by /recipes/<id>.
+    """
+    recipe = database_manager.get_recipe(conn, recipe_id)
+    if recipe is None:
+        raise QueryError(404, f"No recipe with id '{recipe_id}'")
+    return {
+        "id": recipe.id,
+        "title": recipe.title,
+        "category": recipe.category,
+        "area": recipe.area,
+        "ingredients": [
+            {"quantity": quantity, "unit": unit, "item": item}
+            for quantity, unit, item in database_manager.get_recipe_ingredients(conn, recipe.id)
+        ],
+        "instructions": recipe.instructions,
+        "calories": recipe.calories,
+        "image_url": recipe.thumbnail_url,
+        "video_url": recipe.video_url,
+        "tags": [tag for tag in recipe.tags.split(",") if tag],
+    }
+
+def list_recipes(conn: sqlite3.Connection, params: dict) -> dict:
+    """
+    Returns the recipes matching one filter, as served by
+    /recipes?category=..., /recipes?tag=... and /recipes?ingredient=....
+    """
+    if "category" in params:
+        rows = database_manager.find_recipes_by_category(conn, params["category"][0])
+    elif "tag" in params:
+        rows = database_manager.find_recipes_by_tag(conn, params["tag"][0])
+    elif "ingredient" in params:
+        rows = database_manager.find_recipes_by_ingredient(conn, params["ingredient"][0])
+    else:
+        raise QueryError(400, "Filter recipes by 'category', 'tag' or 'ingredient'")
+    return {"count": len(rows), "recipes": _recipe_summaries(rows)}
+
+def search(conn: sqlite3.Connection, params: dict) -> dict:
+    """
+    Returns the full-text search results served by /search?q=...&limit=...&offset=....
+    """
+    query = params.get("q", [""])[0]
+    if not query.strip():
+        raise QueryError(400, "Missing search text 'q'")
+    limit = _int_param(params, "limit", 20, config.QUERY_SERVICE_MAX_RESULTS)
+    offset = _int_param(params, "offset", 0, 1_000_000)
+    rows = database_manager.search_recipes(conn, query, limit, offset)
+    return {
+        "query": query,
+        "results": [{"id": recipe_id, "title": title, "snippet": snippet} for recipe_id, title, snippet in rows],
+    }
+
+def stats(conn: sqlite3.Connection, params: dict) -> dict:
+    """
+    Returns the precomputed catalog statistics served by /stats?top=....
+    """
+    top = _int_param(params, "top", 10, config.QUERY_SERVICE_MAX_RESULTS)
+    return database_manager.get_catalog_stats(conn, top)
+
+class QueryService:
+    """
+    Answers the JSON queries of the HTTP service from a read-only view of the recipe store.
+
+    Encoded responses are kept in an LRU cache together with their ETag. The
+    store version written by database_manager is re-read at most every
+    `version_check_interval` seconds; when an ingest run has written since,
+    the cache is dropped and responses carry a new ETag and Last-Modified.
+    """
+
+    def __init__(self, db_file: str, pool_size: int | None = None, cache_size: int | None = None,
+                 version_check_interval: float | None = None):
+        self.db_file = db_file
+        self.pool = ReadOnlyConnectionPool(db_file, pool_size or config.QUERY_SERVICE_WORKERS)
+        self.cache = ResponseCache(cache_size if cache_size is not None else config.QUERY_SERVICE_CACHE_SIZE)
+        self.version_check_interval = (
+            config.QUERY_SERVICE_VERSION_CHECK_INTERVAL if version_check_interval is None else version_check_interval
+        )
+        self._version = (0, 0.0)
+        self._version_checked = float("-inf")
+        self._version_lock = threading.Lock()
+
+    def store_version(self) -> tuple[int, float]:
+        """
+        Returns the (version, modified_at) of the store, re-reading it when the last check is too old.
+        """
+        now = time.monotonic()
+        if now - self._version_checked < self.version_check_interval:
+            return self._version
+        with self._version_lock:
+            if now - self._version_checked >= self.version_check_interval:
+                with self.pool.connection() as conn:
+                    version = database_manager.get_store_version(conn)
+                if version is None: # A database written before the store version table existed
+                    modified_at = os.path.getmtime(self.db_file)
+                    version = (int(modified_at * 1000), modified_at)
+                if version != self._version:
+                    logger.info(f"Store version is now {version[0]}; dropping {len(self.cache)} cached responses")
+                self._version = tuple(version)
+                self._version_checked = now
+        return self._version
+
+    def _route(self, conn: sqlite3.Connection, path: str, params: dict) -> dict:
+        if path == "/search":
+            return search(conn, params)
+        if path == "/stats":
+            return stats(conn, params)
+        if path == "/recipes":
+            return list_recipes(conn, params)
+        if path.startswith("/recipes/") and path.count("/") == 2:
+            return get_recipe(conn, unquote(path[len("/recipes/"):]))
+        raise QueryError(404, f"Unknown path '{path}'")
+
+    def handle(self, target: str) -> tuple[int, bytes, str, float]:
+        """
+        Answers a GET request.
+
+        Args:
+            target: The request target, e.g. "/recipes?tag=Curry".
+
+        Returns:
+            A tuple of (status, JSON body, ETag, last modified time).
+        """
+        version, modified_at = self.store_version()
+        entry = self.cache.get(target, version)
+        if entry is not None:
+            metrics.increment("query_cache_hits_total")
+            return (*entry, modified_at)
+        metrics.increment("query_cache_misses_total")
+
+        url = urlparse(target)
+        endpoint = (
+            url.path[1:] if url.path in ("/search", "/stats") else "recipe" if url.path.count("/") == 2 else "recipes"
+        )
+        with metrics.timer("query_seconds", endpoint=endpoint):
+            try:
+                with self.pool.connection() as conn:
+                    status, body = 200, self._route(conn, url.path, parse_qs(url.query))
+            except QueryError as e:
+                status, body = e.status, {"error": str(e)}
+        payload = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = f'"{version}-{hashlib.sha1(payload).hexdigest()[:16]}"'
+        if status in (200, 404):
+            self.cache.put(target, version, (status, payload, etag))
+        return status, payload, etag, modified_at
+
+    def close(self):
+        self.pool.close()
+
+def _not_modified(headers, etag: str, modified_at: float) -> bool:
+    """
+    Evaluates the conditional request headers; If-None-Match wins over If-Modified-Since.
+    """
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match:
+        return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            return int(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class _PooledHTTPServer(HTTPServer):
+    """
+    An HTTPServer that serves each connection on a fixed pool of worker threads.
+
+    A keep-alive connection holds its worker until the client closes it or it
+    stays idle for config.QUERY_SERVICE_IDLE_TIMEOUT seconds.
+    """
+
+    def __init__(self, address: tuple[str, int], handler, workers: int):
+        super().__init__(address, handler)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query")
+        self._open_requests = set()
+        self._open_requests_lock = threading.Lock()
+
+    def _serve(self, request, client_address):
+        with self._open_requests_lock:
+            self._open_requests.add(request)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._open_requests_lock:
+                self._open_requests.discard(request)
+            self.shutdown_request(request)
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._serve, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        # Wake the workers waiting on idle keep-alive connections, so they finish
+        with self._open_requests_lock:
+            for request in self._open_requests:
+                try:
+                    request.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+def create_server(service: QueryService, host: str | None = None, port: int | None = None,
+                  workers: int | None = None) -> HTTPServer:
+    """
+    Creates the HTTP server for a QueryService; call serve_forever() on it to start serving.
+
+    Args:
+        service: The service answering the queries.
+        host: The address to listen on. Defaults to config.QUERY_SERVICE_HOST.
+        port: The port to listen on (0 picks a free one). Defaults to config.QUERY_SERVICE_PORT.
+        workers: Connections served at once. Defaults to config.QUERY_SERVICE_WORKERS.
+
+    Returns:
+        The bound, not yet serving, HTTP server.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # Keep-alive, so clients reuse connections
+        disable_nagle_algorithm = True # Headers and body are separate writes
+        server_version = "RecipeQueryService/1.0"
+        timeout = config.QUERY_SERVICE_IDLE_TIMEOUT
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _send(self, head_only: bool):
+            status, payload, etag, modified_at = service.handle(self.path)
+            not_modified = status == 200 and _not_modified(self.headers, etag, modified_at)
+            metrics.increment("query_requests_total", status=304 if not_modified else status)
+            self.send_response(304 if not_modified else status)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(modified_at, usegmt=True))
+            self.send_header("Cache-Control", "no-cache") # Clients may store responses but must revalidate
+            if not_modified:
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(payload)
+
+        def do_GET(self):
+            self._send(head_only=False)
+
+        def do_HEAD(self):
+            self._send(head_only=True)
+
+    return _PooledHTTPServer(
+        (host or config.QUERY_SERVICE_HOST, config.QUERY_SERVICE_PORT if port is None else port),
+        Handler,
+        workers or config.QUERY_SERVICE_WORKERS
+    )
+
+def main(argv: list[str] | None = None):
+    """
+    Serves the recipe database as a read-only JSON API until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Serve the recipe database as a read-only JSON API.")
+    parser.add_argument("--db", default=config.DATABASE_NAME, help="The recipe database to serve.")
+    parser.add_argument("--host", default=config.QUERY_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=config.QUERY_SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=config.QUERY_SERVICE_WORKERS,
+                        help="Connections served at once (one worker thread and database connection each).")
+    parser.add_argument("--log-level", default=config.LOG_LEVEL)
+    parser.add_argument("--log-format", choices=("text", "json"), default=config.LOG_FORMAT)
+    args = parser.parse_args(argv)
+
+    metrics.configure_logging(args.log_level, args.log_format)
+    if not os.path.exists(args.db):
+        logger.error(f"Database '{args.db}' does not exist; run script.py first.")
+        return
+    service = QueryService(args.db, args.workers)
+    server = create_server(service, args.host, args.port, args.workers)
+    logger.info(f"Serving {args.db} on http://{args.host}:{server.server_port}/ with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+if __name__ == "__main__":
+    main()
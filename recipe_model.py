@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+
+MAX_INGREDIENTS = 20 # TheMealDB API provides up to 20 ingredients
+
+# MealDB fields held in Recipe attributes; other non-empty fields are kept in Recipe.extra
+_MODELED_KEYS = frozenset([
+    "idMeal", "strMeal", "strCategory", "strArea", "strInstructions", "strMealThumb", "strTags", "strYoutube",
+    *(f"strIngredient{i}" for i in range(1, MAX_INGREDIENTS + 1)),
+    *(f"strMeasure{i}" for i in range(1, MAX_INGREDIENTS + 1)),
+])
+
+@dataclass(slots=True)
+class Recipe:
+    """
+    A recipe as passed between the pipeline stages, built once from the
+    MealDB JSON when it is fetched.
+
+    Ingredients are held as two parallel tuples with one entry per actual
+    ingredient line, instead of the 20 numbered ingredient and measure keys
+    (mostly empty) of a MealDB dictionary.
+    """
+    id: str
+    title: str
+    instructions: str
+    category: str = ""
+    area: str = ""
+    tags: str = "" # TheMealDB's comma-separated strTags
+    thumbnail_url: str = ""
+    video_url: str = ""
+    ingredients: tuple[str, ...] = ()
+    measures: tuple[str, ...] = () # Aligned with ingredients; "" where a line has no measure
+    calories: float | None = None # Only known for recipes read back from the database
+    extra: tuple[tuple[str, str], ...] = () # Other non-empty MealDB fields, e.g. strSource
+
+    @classmethod
+    def from_mealdb(cls, data: dict) -> "Recipe":
+        """
+        Builds a recipe from a lookup.php entry of TheMealDB API.
+
+        Args:
+            data: The MealDB recipe dictionary.
+
+        Returns:
+            The recipe. Ingredient lines without an ingredient are dropped, and
+            ingredients and measures are stripped.
+        """
+        ingredients = []
+        measures = []
+        for i in range(1, MAX_INGREDIENTS + 1):
+            ingredient = (data.get(f"strIngredient{i}") or "").strip()
+            if ingredient:
+                ingredients.append(ingredient)
+                measures.append((data.get(f"strMeasure{i}") or "").strip())
+        return cls(
+            id=data["idMeal"],
+            title=data["strMeal"],
+            instructions=data["strInstructions"],
+            category=data.get("strCategory") or "",
+            area=data.get("strArea") or "",
+            tags=data.get("strTags") or "",
+            thumbnail_url=data.get("strMealThumb") or "",
+            video_url=data.get("strYoutube") or "",
+            ingredients=tuple(ingredients),
+            measures=tuple(measures),
+            extra=tuple((key, value) for key, value in data.items() if key not in _MODELED_KEYS and value),
+        )
+
+    def to_mealdb(self) -> dict:
+        """
+        Returns the recipe as a MealDB lookup.php dictionary.
+
+        Fields that were empty or null when the recipe was built come back as
+        "" (or null for strTags), as TheMealDB returns them.
+        """
+        data = {
+            "idMeal": self.id,
+            "strMeal": self.title,
+            "strCategory": self.category,
+            "strArea": self.area,
+            "strInstructions": self.instructions,
+            "strMealThumb": self.thumbnail_url,
+            "strTags": self.tags or None,
+            "strYoutube": self.video_url,
+        }
+        for i in range(MAX_INGREDIENTS):
+            data[f"strIngredient{i + 1}"] = self.ingredients[i] if i < len(self.ingredients) else ""
+        for i in range(MAX_INGREDIENTS):
+            data[f"strMeasure{i + 1}"] = self.measures[i] if i < len(self.measures) else ""
+        data.update(self.extra)
+        return data
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Recipe":
+        """
+        Builds a recipe from a row of the 'recipes' table.
+
+        The stored ingredients string becomes one ingredient per line, with
+        the measure kept in the line. The stored tags start with the area and
+        category, if any, followed by the TheMealDB tags.
+
+        Args:
+            row: A (id, title, ingredients, instructions, calories, image_url,
+                thumbnail_url, video_url, tags, area, category) row, as
+                selected with database_manager.RECIPE_COLUMNS.
+
+        Returns:
+            The recipe.
+        """
+        recipe_id, title, ingredients_str, instructions, calories, image_url, _, video_url, tags_str, area, category = row
+        tag_parts = (tags_str or "").split(",")
+        for name in (area, category):
+            if name and tag_parts[:1] == [name]:
+                del tag_parts[0]
+        ingredients = tuple(line.strip() for line in (ingredients_str or "").split(", ") if line.strip())
+        return cls(
+            id=recipe_id,
+            title=title,
+            instructions=instructions,
+            category=category or "",
+            area=area or "",
+            tags=",".join(tag_parts),
+            thumbnail_url=image_url or "",
+            video_url=video_url or "",
+            ingredients=ingredients,
+            measures=("",) * len(ingredients),
+            calories=calories,
+        )
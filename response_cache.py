@@ -0,0 +1,117 @@
+import logging
+import sqlite3
+import threading
+import time
+from sqlite3 import Error
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+class CachedResponse(NamedTuple):
+    """
+    A stored HTTP response body with the validators needed to revalidate it.
+    """
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    def age(self) -> float:
+        """
+        Returns the seconds since the response was fetched or last revalidated.
+        """
+        return time.time() - self.fetched_at
+
+class ResponseCache:
+    """
+    A persistent SQLite cache of successful HTTP GET responses, keyed by URL.
+
+    Entries never expire on their own: the caller decides from their age
+    whether to use them directly, revalidate them with their ETag and
+    Last-Modified validators, or refetch them. Hit and miss counters are kept
+    for the lifetime of the object.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, url: str) -> CachedResponse | None:
+        """
+        Returns the stored response for a URL, or None if it was never stored.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return CachedResponse(*row) if row else None
+
+    def put(self, url: str, body: bytes, etag: str | None, last_modified: str | None):
+        """
+        Stores a freshly fetched response, replacing any earlier one for the URL.
+        """
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses(url, body, etag, last_modified, fetched_at) VALUES(?,?,?,?,?)",
+                    (url, body, etag, last_modified, time.time()),
+                )
+                self._conn.commit()
+            except Error as e:
+                logger.error(f"Error writing to response cache '{self.db_file}': {e}")
+
+    def touch(self, url: str):
+        """
+        Marks a stored response as fresh again after the server confirmed it is unchanged.
+        """
+        with self._lock:
+            try:
+                self._conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+                self._conn.commit()
+            except Error as e:
+                logger.error(f"Error writing to response cache '{self.db_file}': {e}")
+
+    def purge_older_than(self, max_age: float) -> int:
+        """
+        Deletes all responses fetched more than `max_age` seconds ago.
+
+        Returns:
+            The number of deleted responses.
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - max_age,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters and the current number of cached responses.
+        """
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": size}
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._conn.close()
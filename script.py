@@ -1,97 +1,618 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
 import sys
+import threading
 from datetime import datetime
+from itertools import islice
+from pathlib import Path
 
-# Import modules from your project structure
+# Import modules from your project structure. The stage modules (and with them
+# requests and lxml) are imported by the subcommands that need them, so e.g.
+# `render` or `search` start without loading the HTTP client.
 import config
-import api_service
-import database_manager
-import data_processor
-import export_transformer
+import metrics
 
-def main():
+logger = logging.getLogger("script")
+
+def _limit(value: str) -> int | None:
     """
-    Main function to orchestrate the fetching, processing, storing, and exporting of recipe data.
+    Parses a count option that also accepts "all" for no limit.
     """
-    print("Starting recipe data extraction process...")
+    return None if value.lower() == "all" else int(value)
 
-    # Initialize data structure for JSON export
-    all_recipes = {
-        "metadata": {
-            "source": "TheMealDB API",
-            "extracted_on": datetime.now().isoformat(),
-            "categories_limit": config.CATEGORIES_LIMIT,
-            "recipes_per_category": config.RECIPES_PER_CATEGORY,
-            "total_recipes": 0
-        },
-        "categories": {}
-    }
+def _add_config_option(parser: argparse.ArgumentParser, *flags: str, name: str, help: str, **kwargs):
+    """
+    Adds an option that overrides the config.py setting `name` when it is
+    given. Its value is stored under the setting's name and applied by
+    apply_config_overrides.
+    """
+    if kwargs.get("action") != "store_const":
+        help = f"{help} (default: {getattr(config, name)!r})"
+    parser.add_argument(*flags, dest=name, default=argparse.SUPPRESS, help=help, **kwargs)
+
+def _add_common_options(parser: argparse.ArgumentParser):
+    _add_config_option(parser, "--db", name="DATABASE_NAME", help="The recipe database")
+    _add_config_option(parser, "--log-level", name="LOG_LEVEL",
+                       help="Minimum level of log messages to show: DEBUG, INFO, WARNING or ERROR")
+    _add_config_option(parser, "--log-format", name="LOG_FORMAT", choices=("text", "json"),
+                       help="Write log messages as text lines or as one JSON object per line")
+    _add_config_option(parser, "--metrics-file", name="METRICS_REPORT_FILE",
+                       help="Write a JSON report of the run's timings and counters to this file")
+    _add_config_option(parser, "--prometheus-file", name="METRICS_PROMETHEUS_FILE",
+                       help="Also write the metrics to this file in the Prometheus textfile format")
+
+def _add_cache_only_option(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--cache-only", action="store_true", default=argparse.SUPPRESS,
+        help=f"Answer TheMealDB requests from {config.HTTP_CACHE_DB} only, without network access."
+    )
+
+def _add_fetch_options(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--incremental", action="store_true", default=argparse.SUPPRESS,
+        help="Only fetch recipes whose IDs are not yet in the database."
+    )
+    parser.add_argument(
+        "--resume", action="store_true", default=argparse.SUPPRESS,
+        help="Continue the last interrupted crawl from its checkpoint."
+    )
+    _add_cache_only_option(parser)
+    _add_config_option(parser, "--mealdb-url", name="MEALDB_API_BASE_URL", help="Base URL of TheMealDB API")
+    _add_config_option(parser, "--categories", name="CATEGORIES_LIMIT", type=_limit,
+                       help="Number of categories to fetch, or 'all'")
+    _add_config_option(parser, "--per-category", name="RECIPES_PER_CATEGORY", type=_limit,
+                       help="Recipes to fetch per category, or 'all'")
+    _add_config_option(parser, "--detail-workers", name="PIPELINE_DETAIL_WORKERS", type=int,
+                       help="Recipe detail requests in flight at once")
+    _add_config_option(parser, "--compression", name="JSON_OUTPUT_COMPRESSION", choices=("gzip", "zstd"),
+                       help="Compress the JSON Lines output")
+
+def _add_asset_options(parser: argparse.ArgumentParser):
+    _add_config_option(parser, "--asset-dir", name="ASSET_DIR", help="Directory of the mirrored recipe images")
+    _add_config_option(parser, "--no-assets", name="ASSET_DIR", action="store_const", const=None,
+                       help="Link the remote recipe images instead of the mirrored copies.")
+
+def _add_render_options(parser: argparse.ArgumentParser):
+    _add_config_option(parser, "--page-size", name="HTML_PAGE_SIZE", type=int,
+                       help="Render the catalog as pages of this many recipes (default: a single HTML file)")
+    parser.add_argument(
+        "--skip-xml", action="store_true", default=argparse.SUPPRESS,
+        help=f"Do not write {config.XML_OUTPUT_FILENAME}; render HTML straight from the database. "
+             "Not possible with --page-size, which renders the pages from the XML file."
+    )
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Parses the command line options of the script.
+
+    Without a subcommand the whole chain runs: fetch, mirror images, export
+    and render. Options named after a config.py setting override it for
+    this run.
+
+    Args:
+        argv: The arguments to parse. Defaults to sys.argv[1:].
+
+    Returns:
+        The parsed options, with the subcommand to run in `command`.
+    """
+    parser = argparse.ArgumentParser(description="Fetch, store, export and transform TheMealDB recipes.")
+    _add_common_options(parser)
+    _add_fetch_options(parser)
+    _add_render_options(parser)
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+
+    run = subparsers.add_parser("run", help="Run the whole chain (the default): fetch, mirror images, export and render.")
+    _add_common_options(run)
+    _add_fetch_options(run)
+    _add_render_options(run)
+
+    fetch = subparsers.add_parser("fetch", help="Crawl TheMealDB into the database and the JSON Lines output.")
+    _add_common_options(fetch)
+    _add_fetch_options(fetch)
+
+    enrich = subparsers.add_parser("enrich", help="Recalculate the calories of stored recipes and mirror their images.")
+    _add_common_options(enrich)
+    enrich.add_argument("--missing-only", action="store_true", help="Only recalculate recipes without calories.")
+    enrich.add_argument("--skip-calories", action="store_true", help="Do not recalculate calories.")
+    enrich.add_argument("--skip-images", action="store_true", help="Do not mirror images.")
+    _add_cache_only_option(enrich)
+    _add_asset_options(enrich)
+    _add_config_option(enrich, "--image-workers", name="ASSET_DOWNLOAD_WORKERS", type=int,
+                       help="Image downloads in flight at once")
+
+    export_xml = subparsers.add_parser("export-xml", help="Export the database to XML.")
+    _add_common_options(export_xml)
+    _add_config_option(export_xml, "-o", "--output", name="XML_OUTPUT_FILENAME", help="The XML file to write")
+    _add_config_option(export_xml, "--chunk-size", name="XML_EXPORT_CHUNK_SIZE", type=int,
+                       help="Recipes read from the database at a time")
+    _add_asset_options(export_xml)
+
+    render = subparsers.add_parser("render", help="Render the HTML catalog from the database or an XML file.")
+    _add_common_options(render)
+    _add_render_options(render)
+    render.add_argument("--from-xml", action="store_true",
+                        help="Transform the existing XML file instead of reading the database.")
+    _add_config_option(render, "--xml", name="XML_OUTPUT_FILENAME", help="The XML file to write or read")
+    _add_config_option(render, "--xslt", name="XSLT_FILENAME", help="The XSLT stylesheet")
+    _add_config_option(render, "-o", "--output", name="HTML_OUTPUT_FILENAME", help="The HTML file to write")
+    _add_config_option(render, "--output-dir", name="HTML_OUTPUT_DIR", help="The directory of the paginated output")
+    _add_config_option(render, "--render-workers", name="RENDER_WORKERS", type=int,
+                       help="Render processes for paginated output")
+    _add_config_option(render, "--no-fragment-cache", name="FRAGMENT_CACHE_DB", action="store_const", const=None,
+                       help="Re-render every recipe instead of only the changed ones.")
+    _add_asset_options(render)
+
+    list_parser = subparsers.add_parser("list", help="List the stored recipes, optionally filtered.")
+    _add_common_options(list_parser)
+    recipe_filter = list_parser.add_mutually_exclusive_group()
+    recipe_filter.add_argument("--category", help="Only recipes in this category.")
+    recipe_filter.add_argument("--tag", help="Only recipes with this tag.")
+    recipe_filter.add_argument("--ingredient", help="Only recipes using this ingredient.")
+    list_parser.add_argument("--limit", type=int, help="Show at most this many recipes.")
+    list_parser.add_argument("--json", action="store_true", help="Print JSON instead of text lines.")
+
+    search = subparsers.add_parser("search", help="Full-text search over titles, ingredients and instructions.")
+    _add_common_options(search)
+    search.add_argument("query", help="The search text, e.g. 'garlic chicken'.")
+    search.add_argument("--limit", type=int, default=20, help="Show at most this many results (default: 20).")
+    search.add_argument("--json", action="store_true", help="Print JSON instead of text lines.")
+
+    stats = subparsers.add_parser("stats", help="Print the catalog statistics per category, area, tag and ingredient.")
+    _add_common_options(stats)
+    stats.add_argument("--top", type=int, default=10, help="List this many entries per group (default: 10).")
+    stats.add_argument("--rebuild", action="store_true",
+                       help="Recompute the statistics from the stored recipes before printing them.")
+    stats.add_argument("--json", action="store_true", help="Print JSON instead of text lines.")
+
+    args = parser.parse_args(argv)
+    args.command = args.command or "run"
+    for flag in ("incremental", "resume", "cache_only", "skip_xml"):
+        setattr(args, flag, getattr(args, flag, False))
+    if args.skip_xml and getattr(args, "HTML_PAGE_SIZE", config.HTML_PAGE_SIZE):
+        parser.error("--skip-xml cannot be used with paginated output (--page-size or HTML_PAGE_SIZE), "
+                     "which renders the pages from the XML file")
+    return args
 
-    # Database setup
+def apply_config_overrides(args: argparse.Namespace):
+    """
+    Applies the config.py settings given on the command line.
+
+    Args:
+        args: The parsed command line options.
+    """
+    for name, value in vars(args).items():
+        if name.isupper():
+            setattr(config, name, value)
+    if args.cache_only:
+        # Work offline: TheMealDB from the response cache, calories without CalorieNinjas
+        config.HTTP_CACHE_ONLY = True
+        config.NUTRITION_API_FALLBACK = False
+
+def write_run_report(args: argparse.Namespace):
+    """
+    Writes the metrics collected during the run to the configured report files.
+
+    Args:
+        args: The parsed command line options.
+    """
+    if config.METRICS_REPORT_FILE:
+        metrics.write_json_report(config.METRICS_REPORT_FILE, {"options": vars(args)})
+        logger.info(f"Run metrics saved to {config.METRICS_REPORT_FILE}")
+    if config.METRICS_PROMETHEUS_FILE:
+        metrics.write_prometheus_textfile(config.METRICS_PROMETHEUS_FILE)
+
+def open_database() -> sqlite3.Connection:
+    """
+    Opens config.DATABASE_NAME for writing, creating its tables if needed.
+    Exits the process if the database cannot be opened.
+
+    Returns:
+        The database connection.
+    """
+    import database_manager
     conn = database_manager.create_connection(config.DATABASE_NAME)
     if conn is None:
-        print("Error! Cannot create the database connection. Exiting.")
+        logger.error("Error! Cannot create the database connection. Exiting.")
         sys.exit(1) # Exit if database connection fails
-
     database_manager.create_table(conn)
+    return conn
+
+def open_database_read_only() -> sqlite3.Connection:
+    """
+    Opens config.DATABASE_NAME read-only. Exits the process if it does not exist.
+
+    Returns:
+        The database connection.
+    """
+    if not os.path.exists(config.DATABASE_NAME):
+        logger.error(f"Database '{config.DATABASE_NAME}' does not exist; run `script.py fetch` first.")
+        sys.exit(1)
+    return sqlite3.connect(Path(config.DATABASE_NAME).resolve().as_uri() + "?mode=ro", uri=True)
+
+def close_clients():
+    """
+    Closes the caches and pooled HTTP connections opened by the stages.
+    """
+    import data_processor
+    data_processor.close_nutrition_cache()
+    data_processor.close_nutrition_table()
+    api_service = sys.modules.get("api_service") # Only loaded by stages that went to the network
+    if api_service:
+        api_service.close_response_cache()
+        api_service.close_session()
+
+def fetch_recipes(args: argparse.Namespace, conn: sqlite3.Connection) -> bool:
+    """
+    Crawls TheMealDB: lists the categories, fetches and enriches their
+    recipes, stores them in the database and streams them to the JSON Lines
+    output, checkpointing the crawl as it goes.
+
+    Args:
+        args: The parsed command line options.
+        conn: The database connection.
+
+    Returns:
+        False if no categories could be fetched, True otherwise.
+    """
+    import api_service
+    import data_processor
+    import database_manager
+    import jsonl_stream
+    import pipeline
+
+    logger.info("Starting recipe data extraction process..." + (" (incremental)" if args.incremental else ""))
+
+    # Continue the last interrupted run, or start a new one
+    run = database_manager.get_unfinished_crawl_run(conn) if args.resume else None
+    if run:
+        run_id, extracted_on, output_json_filename = run
+        completed_categories, completed_ids = database_manager.get_crawl_checkpoint(conn, run_id)
+        logger.info(f"Resuming crawl started on {extracted_on}: {len(completed_categories)} categories "
+                    f"and {len(completed_ids)} recipes already done.")
+    else:
+        if args.resume:
+            logger.warning("No interrupted crawl to resume; starting a new one.")
+        extracted_on = datetime.now().isoformat()
+        output_json_filename = jsonl_stream.jsonl_filename(
+            f"{config.JSON_OUTPUT_FILENAME_PREFIX}{datetime.now().strftime('%Y%m%d')}", config.JSON_OUTPUT_COMPRESSION
+        )
+        run_id = database_manager.start_crawl_run(conn, extracted_on, output_json_filename)
+        completed_categories, completed_ids = set(), set()
+    # Fetched recipes are streamed to the JSON Lines output as they arrive
+    json_writer = jsonl_stream.JsonlWriter(
+        output_json_filename,
+        metadata={
+            "source": "TheMealDB API",
+            "extracted_on": extracted_on,
+            "categories_limit": config.CATEGORIES_LIMIT,
+            "recipes_per_category": config.RECIPES_PER_CATEGORY,
+            "incremental": args.incremental
+        },
+        resume=bool(run),
+        recorded_ids=completed_ids
+    )
 
     # Get categories
     categories = api_service.fetch_categories(config.CATEGORIES_LIMIT)
     if not categories:
-        print("No categories fetched. Aborting recipe collection.")
-        conn.close()
-        sys.exit(0)
-    print(f"Selected {len(categories)} categories: {', '.join(categories)}")
+        logger.warning("No categories fetched. Aborting recipe collection.")
+        json_writer.close()
+        return False
+    logger.info(f"Selected {len(categories)} categories: {', '.join(categories)}")
+    pending_categories = [category for category in categories if category not in completed_categories]
 
-    # Process each category
-    for category in categories:
-        print(f"\nProcessing category: {category}")
-        all_recipes["categories"][category] = []
+    # The listing stage picks the recipes to fetch from each category listing as it arrives
+    known_ids = database_manager.get_recipe_ids(conn) - completed_ids if args.incremental else set()
+    if args.incremental:
+        logger.info(f"Skipping the {len(known_ids)} recipes already stored.")
+    remaining_by_category = {}
+    failed_categories = set()
+    remaining_lock = threading.Lock()
 
-        # Get recipes in this category
-        recipes = api_service.fetch_recipes_by_category(category, config.RECIPES_PER_CATEGORY)
+    def select_recipe_ids(category: str, recipes: list[dict] | None) -> list[str]:
+        if recipes is None:
+            # The listing request failed, unlike an empty listing: keep the category out of the checkpoint
+            with remaining_lock:
+                failed_categories.add(category)
+            return []
+        if args.incremental:
+            # Diff the full listing against the stored IDs and keep only unseen recipes
+            recipes = [recipe for recipe in recipes if recipe['idMeal'] not in known_ids]
+        recipes = recipes[:config.RECIPES_PER_CATEGORY]
         if not recipes:
-            print(f"  No recipes found for category: {category}")
-            continue
-
-        # Process each recipe in the category
-        for recipe in recipes:
-            recipe_id = recipe['idMeal']
-            print(f"  Fetching details for: {recipe['strMeal']} (ID: {recipe_id})")
+            logger.warning(f"No recipes found for category: {category}")
+        remaining = [recipe['idMeal'] for recipe in recipes if recipe['idMeal'] not in completed_ids]
+        with remaining_lock:
+            remaining_by_category[category] = set(remaining)
+        return remaining
 
-            # Get full recipe details
-            recipe_details = api_service.fetch_recipe_details(recipe_id)
+    # List, fetch and enrich the recipes in concurrent pipeline stages while this thread,
+    # the only one using the database connection, stores them in chunks and checkpoints after each one
+    logger.info(f"Fetching recipes of {len(pending_categories)} categories...")
+    results = pipeline.crawl(pending_categories, select_recipe_ids, database_manager.get_ingredient_hashes(conn))
+    processed = 0
+    while chunk := list(islice(results, config.CHECKPOINT_INTERVAL)):
+        fetched = []
+        for category, recipe_id, recipe_details in chunk:
             if recipe_details:
-                # Add to JSON structure
-                all_recipes["categories"][category].append(recipe_details)
-                all_recipes["metadata"]["total_recipes"] += 1
-
-                # Insert into database
-                database_manager.insert_recipe(conn, recipe_details)
+                fetched.append((category, recipe_details))
             else:
-                print(f"  Could not fetch details for recipe ID: {recipe_id}")
+                logger.warning(f"Could not fetch details for recipe ID: {recipe_id}")
+            with remaining_lock:
+                if not recipe_details:
+                    failed_categories.add(category)
+                remaining_by_category[category].discard(recipe_id)
+
+        # Insert into database in batched transactions, then write out and checkpoint the chunk
+        database_manager.insert_recipes(conn, [recipe_details for _, recipe_details in fetched])
+        json_writer.write_recipes([(category, recipe_details.to_mealdb()) for category, recipe_details in fetched])
+        with remaining_lock:
+            finished_categories = [
+                category for category, remaining in remaining_by_category.items()
+                if not remaining and category not in failed_categories and category not in completed_categories
+            ]
+        database_manager.record_crawl_checkpoint(
+            conn, run_id, [(category, recipe_details.id) for category, recipe_details in fetched],
+            finished_categories
+        )
+        completed_categories.update(finished_categories)
+        processed += len(chunk)
+        logger.info(f"Checkpoint: {processed} recipes processed.")
 
-    # Save the collected data to JSON
-    output_json_filename = f"{config.JSON_OUTPUT_FILENAME_PREFIX}{datetime.now().strftime('%Y%m%d')}.json"
-    data_processor.save_to_json(all_recipes, output_json_filename)
+    if failed_categories:
+        logger.warning(f"Categories not fully fetched: {', '.join(sorted(failed_categories))}")
 
-    # Close database connection
-    conn.close()
-    print("Database connection closed.")
+    # Finish the JSON Lines output with a footer holding the totals, including recipes stored before a resume
+    json_writer.close({"categories": categories, "completed_on": datetime.now().isoformat()})
+    logger.info(f"Data saved to {output_json_filename}")
+    database_manager.finish_crawl_run(conn, run_id)
 
-    print(
-        f"\n--- Data Collection Completed ---"
-        f"\nSaved {all_recipes['metadata']['total_recipes']} recipes "
-        f"(2 each from {len(categories)} categories) to JSON and database."
+    nutrition_cache = data_processor.get_nutrition_cache()
+    if nutrition_cache:
+        stats = nutrition_cache.stats()
+        logger.info(f"Nutrition cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries.")
+    response_cache = api_service.get_response_cache()
+    if response_cache:
+        stats = response_cache.stats()
+        logger.info(f"HTTP response cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries.")
+
+    logger.info("--- Data Collection Completed ---")
+    logger.info(
+        f"Saved {json_writer.recipe_count} recipes "
+        f"from {len(categories)} categories to JSON and database."
     )
+    return True
+
+def render_catalog(args: argparse.Namespace) -> str:
+    """
+    Exports the database and renders the HTML catalog: as pages if
+    config.HTML_PAGE_SIZE is set, incrementally if config.FRAGMENT_CACHE_DB
+    is set, and in a single pass otherwise.
+
+    Args:
+        args: The parsed command line options.
+
+    Returns:
+        The path of the HTML file to open.
+    """
+    import export_transformer
+
+    logger.info("--- Starting Export and Transformation ---")
+    from_xml = getattr(args, "from_xml", False)
+    html_entry_point = config.HTML_OUTPUT_FILENAME
+    if config.HTML_PAGE_SIZE:
+        # Paginated rendering shards the XML file across worker processes
+        if not from_xml:
+            export_transformer.export_to_xml(config.DATABASE_NAME, config.XML_OUTPUT_FILENAME)
+        export_transformer.render_html_pages(
+            config.XML_OUTPUT_FILENAME, config.XSLT_FILENAME, config.HTML_OUTPUT_DIR, config.HTML_PAGE_SIZE
+        )
+        html_entry_point = os.path.join(config.HTML_OUTPUT_DIR, "index.html")
+    elif from_xml:
+        export_transformer.transform_to_html(config.XML_OUTPUT_FILENAME, config.XSLT_FILENAME, config.HTML_OUTPUT_FILENAME)
+    elif config.FRAGMENT_CACHE_DB:
+        # Only recipes that changed since the last run are re-rendered
+        export_transformer.export_and_transform_incremental(
+            config.DATABASE_NAME, config.XSLT_FILENAME, config.HTML_OUTPUT_FILENAME,
+            xml_file=None if args.skip_xml else config.XML_OUTPUT_FILENAME
+        )
+    else:
+        export_transformer.export_and_transform(
+            config.DATABASE_NAME, config.XSLT_FILENAME, config.HTML_OUTPUT_FILENAME,
+            xml_file=None if args.skip_xml else config.XML_OUTPUT_FILENAME
+        )
+    logger.info("--- Export and Transformation Completed ---")
+    return html_entry_point
+
+def command_run(args: argparse.Namespace):
+    """
+    Fetches, processes, stores, mirrors, exports and renders the recipe data.
+    """
+    import asset_mirror
+
+    conn = open_database()
+    try:
+        fetched = fetch_recipes(args, conn)
+        if fetched:
+            # Download the images not mirrored yet, so the export references local copies
+            asset_mirror.mirror_images(conn)
+    finally:
+        # Close database connection, caches and pooled HTTP connections
+        conn.close()
+        close_clients()
+    logger.info("Database connection closed.")
+    if not fetched:
+        write_run_report(args)
+        sys.exit(0)
+
+    html_entry_point = render_catalog(args)
+    logger.info("Process finished successfully!")
+    logger.info(f"You can view the generated recipe catalog by opening '{html_entry_point}' in your web browser.")
+    write_run_report(args)
+
+def command_fetch(args: argparse.Namespace):
+    """
+    Crawls TheMealDB into the database and the JSON Lines output.
+    """
+    conn = open_database()
+    try:
+        fetch_recipes(args, conn)
+    finally:
+        conn.close()
+        close_clients()
+    write_run_report(args)
+
+def command_enrich(args: argparse.Namespace):
+    """
+    Recalculates the calories of the stored recipes, e.g. after
+    nutrition_table.csv was extended, and mirrors the images not mirrored yet.
+    """
+    import asset_mirror
+    import database_manager
+
+    conn = open_database()
+    try:
+        if not args.skip_calories:
+            database_manager.recalculate_calories(conn, args.missing_only)
+        if not args.skip_images:
+            asset_mirror.mirror_images(conn)
+    finally:
+        conn.close()
+        close_clients()
+    write_run_report(args)
+
+def command_export_xml(args: argparse.Namespace):
+    """
+    Exports the database to config.XML_OUTPUT_FILENAME.
+    """
+    import export_transformer
 
-    # --- Export and Transformation Steps ---
-    print("\n--- Starting Export and Transformation ---")
+    open_database_read_only().close() # Fail early instead of exporting an empty new database
     export_transformer.export_to_xml(config.DATABASE_NAME, config.XML_OUTPUT_FILENAME)
-    export_transformer.transform_to_html(config.XML_OUTPUT_FILENAME, config.XSLT_FILENAME, config.HTML_OUTPUT_FILENAME)
-    print("--- Export and Transformation Completed ---")
+    write_run_report(args)
+
+def command_render(args: argparse.Namespace):
+    """
+    Renders the HTML catalog from what is already stored, without fetching anything.
+    """
+    if args.from_xml:
+        if not os.path.exists(config.XML_OUTPUT_FILENAME):
+            logger.error(f"XML file '{config.XML_OUTPUT_FILENAME}' does not exist; run `script.py export-xml` first.")
+            sys.exit(1)
+    else:
+        open_database_read_only().close()
+    html_entry_point = render_catalog(args)
+    logger.info(f"You can view the generated recipe catalog by opening '{html_entry_point}' in your web browser.")
+    write_run_report(args)
+
+def _print_results(results: list[dict], as_json: bool):
+    """
+    Prints query results as JSON or as one tab-separated line per result.
+    """
+    if as_json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    for result in results:
+        print("\t".join(str(value) for value in result.values()))
+
+def command_list(args: argparse.Namespace):
+    """
+    Prints the stored recipes, optionally filtered by category, tag or ingredient.
+    """
+    import database_manager
+
+    conn = open_database_read_only()
+    try:
+        if args.category:
+            rows = database_manager.find_recipes_by_category(conn, args.category)
+        elif args.tag:
+            rows = database_manager.find_recipes_by_tag(conn, args.tag)
+        elif args.ingredient:
+            rows = database_manager.find_recipes_by_ingredient(conn, args.ingredient)
+        else:
+            rows = conn.execute("SELECT id, title FROM recipes ORDER BY title").fetchall()
+    finally:
+        conn.close()
+    _print_results([{"id": recipe_id, "title": title} for recipe_id, title in rows[:args.limit]], args.json)
+
+def command_search(args: argparse.Namespace):
+    """
+    Prints the full-text search results for a query.
+    """
+    import database_manager
+
+    conn = open_database_read_only()
+    try:
+        rows = database_manager.search_recipes(conn, args.query, args.limit)
+    finally:
+        conn.close()
+    _print_results([
+        {"id": recipe_id, "title": title, "snippet": snippet} for recipe_id, title, snippet in rows
+    ], args.json)
+
+def _format_calories(stats: dict) -> str:
+    """
+    Returns the calorie figures of a statistics entry as text.
+    """
+    if stats["average_calories"] is None:
+        return "calories unknown"
+    return f"{stats['average_calories']:g} kcal on average ({stats['min_calories']:g}-{stats['max_calories']:g})"
 
-    print("\nProcess finished successfully!")
-    print(f"You can view the generated recipe catalog by opening '{config.HTML_OUTPUT_FILENAME}' in your web browser.")
+def command_stats(args: argparse.Namespace):
+    """
+    Prints the precomputed catalog statistics.
+    """
+    import database_manager
+
+    if args.rebuild:
+        conn = open_database()
+        with conn:
+            database_manager.rebuild_stats(conn)
+    else:
+        conn = open_database_read_only()
+    try:
+        stats = database_manager.get_catalog_stats(conn, args.top)
+    finally:
+        conn.close()
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return
+    print(f"{stats['recipes']} recipes, {stats['without_video']} without a video; {_format_calories(stats)}")
+    for key in ("categories", "areas", "tags"):
+        print(f"\n{key.capitalize()}:")
+        for group in stats[key]:
+            print(f"  {group['name']}\t{group['recipes']} recipes\t{_format_calories(group)}")
+    print("\nIngredients:")
+    for ingredient in stats["ingredients"]:
+        print(f"  {ingredient['name']}\t{ingredient['recipes']} recipes")
+
+COMMANDS = {
+    "run": command_run,
+    "fetch": command_fetch,
+    "enrich": command_enrich,
+    "export-xml": command_export_xml,
+    "render": command_render,
+    "list": command_list,
+    "search": command_search,
+    "stats": command_stats,
+}
+
+def main(argv: list[str] | None = None):
+    """
+    Main function to orchestrate the fetching, processing, storing, and
+    exporting of recipe data, or to run a single one of these stages.
+
+    Args:
+        argv: Command line arguments. Defaults to sys.argv[1:].
+    """
+    args = parse_args(argv)
+    apply_config_overrides(args)
+    metrics.configure_logging(config.LOG_LEVEL, config.LOG_FORMAT)
+    metrics.reset()
+    COMMANDS[args.command](args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
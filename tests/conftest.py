@@ -0,0 +1,59 @@
+import os
+import sys
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+import api_service
+import config
+import data_processor
+import metrics
+from stub_server import StubServer, SyntheticCatalog
+
+def _reset_run_state():
+    """
+    Clears the in-process caches and connections a previous test left behind.
+    """
+    data_processor.close_nutrition_cache()
+    data_processor.close_nutrition_table()
+    api_service.close_response_cache()
+    api_service.close_session()
+    data_processor.reset_caches()
+    metrics.reset()
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Points config.py's generated files at a temporary directory, which is
+    also the working directory of the test.
+    """
+    for name in ("DATABASE_NAME", "XML_OUTPUT_FILENAME", "HTML_OUTPUT_FILENAME", "NUTRITION_CACHE_DB",
+                 "NUTRITION_TABLE_DB", "FRAGMENT_CACHE_DB", "HTTP_CACHE_DB", "ASSET_DIR"):
+        if getattr(config, name):
+            monkeypatch.setattr(config, name, str(tmp_path / os.path.basename(getattr(config, name))))
+    monkeypatch.setattr(config, "JSON_OUTPUT_FILENAME_PREFIX", str(tmp_path / "recipes_"))
+    monkeypatch.setattr(config, "HTML_OUTPUT_DIR", str(tmp_path / "recipes_html"))
+    monkeypatch.setattr(config, "NUTRITION_TABLE_CSV", os.path.join(REPO_ROOT, "nutrition_table.csv"))
+    monkeypatch.setattr(config, "XSLT_FILENAME", os.path.join(REPO_ROOT, config.XSLT_FILENAME))
+    monkeypatch.setattr(data_processor, "_nutrition_rate_limiter", data_processor.TokenBucket(float("inf"), 1))
+    monkeypatch.chdir(tmp_path)
+    _reset_run_state()
+    yield tmp_path
+    _reset_run_state()
+
+@pytest.fixture
+def catalog():
+    return SyntheticCatalog(categories=3, recipes_per_category=8, ingredients_per_recipe=5)
+
+@pytest.fixture
+def stub_server(catalog, workdir, monkeypatch):
+    """
+    Starts a StubServer on `catalog` and points config.py at it, with
+    retries disabled so failed requests fail fast.
+    """
+    with StubServer(catalog) as server:
+        monkeypatch.setattr(config, "MEALDB_API_BASE_URL", server.mealdb_url)
+        monkeypatch.setattr(config, "CALORIENINJAS_API_URL", server.nutrition_url)
+        monkeypatch.setattr(config, "HTTP_MAX_RETRIES", 0)
+        yield server
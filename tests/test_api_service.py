@@ -0,0 +1,84 @@
+import threading
+import time
+import pytest
+import requests
+import api_service
+import config
+import metrics
+
+def _all_ids(catalog) -> list[str]:
+    return [recipe_id for category in catalog.categories for recipe_id in catalog.recipe_ids(category)]
+
+def _retries() -> dict[str, float]:
+    return {
+        series["labels"]["endpoint"]: series["value"]
+        for series in metrics.snapshot()["counters"].get("http_retries_total", [])
+    }
+
+def test_details_come_back_in_input_order(stub_server, catalog):
+    recipe_ids = _all_ids(catalog)[::-1]
+    # Earlier recipes answer slower, so the requests finish in reverse order
+    delays = {recipe_id: 0.002 * (len(recipe_ids) - i) for i, recipe_id in enumerate(recipe_ids)}
+    stub_server.fault = lambda endpoint, query: time.sleep(delays.get(query.get("i", [""])[0], 0))
+    recipes = list(api_service.fetch_recipe_details_many(recipe_ids, max_in_flight=4))
+    assert [recipe.id for recipe in recipes] == recipe_ids
+
+def test_requests_in_flight_are_bounded(stub_server, catalog):
+    lock = threading.Lock()
+    in_flight = [0, 0] # Current, highest
+
+    def count_in_flight(endpoint, query):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+
+    stub_server.fault = count_in_flight
+    recipes = list(api_service.fetch_recipe_details_many(_all_ids(catalog), max_in_flight=3))
+    assert all(recipes)
+    assert 1 < in_flight[1] <= 3
+
+def test_missing_recipe_is_none(stub_server, catalog):
+    recipe_ids = _all_ids(catalog)[:3]
+    stub_server.fault = lambda endpoint, query: (404, None) if query.get("i") == [recipe_ids[1]] else None
+    recipes = list(api_service.fetch_recipe_details_many([*recipe_ids, "no-such-recipe"]))
+    assert [recipe and recipe.id for recipe in recipes] == [recipe_ids[0], None, recipe_ids[2], None]
+
+def test_timed_out_request_is_none(stub_server, catalog, monkeypatch):
+    monkeypatch.setattr(config, "HTTP_TIMEOUT", 0.2)
+    slow, fast = _all_ids(catalog)[:2]
+    stub_server.fault = lambda endpoint, query: time.sleep(1) if query.get("i") == [slow] else None
+    recipes = list(api_service.fetch_recipe_details_many([slow, fast]))
+    assert recipes[0] is None
+    assert recipes[1].id == fast
+
+def test_failed_requests_are_retried(stub_server, catalog, monkeypatch):
+    monkeypatch.setattr(config, "HTTP_MAX_RETRIES", 2)
+    monkeypatch.setattr(config, "HTTP_BACKOFF_FACTOR", 0)
+    recipe_ids = _all_ids(catalog)[:4]
+    failures = {recipe_id: 2 for recipe_id in recipe_ids}
+    lock = threading.Lock()
+
+    def fail_twice(endpoint, query):
+        with lock:
+            recipe_id = query.get("i", [""])[0]
+            if failures.get(recipe_id):
+                failures[recipe_id] -= 1
+                return 503, None
+
+    stub_server.fault = fail_twice
+    recipes = list(api_service.fetch_recipe_details_many(recipe_ids))
+    assert [recipe.id for recipe in recipes] == recipe_ids
+    assert stub_server.requests["lookup.php"] == 3 * len(recipe_ids)
+    assert _retries() == {"lookup.php": 2 * len(recipe_ids)}
+
+def test_retries_outside_the_apis_share_one_label(stub_server, monkeypatch):
+    monkeypatch.setattr(config, "HTTP_MAX_RETRIES", 2)
+    monkeypatch.setattr(config, "HTTP_BACKOFF_FACTOR", 0)
+    stub_server.fault = lambda endpoint, query: (503, None)
+    for name in ("a.jpg", "b.jpg"):
+        with pytest.raises(requests.exceptions.RetryError):
+            api_service.get_session().get(f"{stub_server.base_url}/media/meals/{name}", timeout=config.HTTP_TIMEOUT)
+    assert _retries() == {"other": 4}
@@ -0,0 +1,51 @@
+import time
+import pytest
+import config
+import data_processor
+
+@pytest.fixture
+def api_only(stub_server, monkeypatch):
+    """
+    Sends every nutrition lookup to the stub API, recording the queried lines.
+    """
+    monkeypatch.setattr(config, "NUTRITION_TABLE_DB", None)
+    monkeypatch.setattr(config, "NUTRITION_CACHE_DB", None)
+    queries = []
+    stub_server.fault = lambda endpoint, query: queries.append(query["query"][0]) if endpoint == "nutrition" else None
+    return queries
+
+def test_token_bucket_allows_a_burst_then_paces_calls():
+    bucket = data_processor.TokenBucket(rate=50, capacity=4)
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.05
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - started == pytest.approx(5 / 50, abs=0.05)
+
+def test_token_bucket_refills_only_up_to_its_capacity():
+    bucket = data_processor.TokenBucket(rate=20, capacity=2)
+    time.sleep(0.2) # Long enough for 4 tokens, but the bucket holds 2
+    started = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.04
+
+def test_equivalent_lines_are_looked_up_once(api_only):
+    calories = data_processor.lookup_calories(
+        ["2 tbsp olive oil", "2 Tbs  Olive Oil", "2 tablespoons olive oil", "1 cup rice", "1 cup rice"]
+    )
+    assert set(calories) == {"2 tablespoon olive oil", "1 cup rice"}
+    assert len(api_only) == 1
+    assert api_only[0].split(", ") == ["2 tbsp olive oil", "1 cup rice"]
+
+    assert data_processor.lookup_calories(["2 tablespoons olive oil", "1 cup rice"]) == calories
+    assert len(api_only) == 1 # Answered from the run cache
+
+def test_lookups_are_packed_into_batches(api_only, monkeypatch):
+    monkeypatch.setattr(config, "CALORIENINJAS_BATCH_SIZE", 2)
+    lines = [f"{i} g food{i}" for i in range(5)]
+    calories = data_processor.lookup_calories(lines)
+    assert len(calories) == 5
+    assert [query.split(", ") for query in api_only] == [lines[0:2], lines[2:4], lines[4:5]]
@@ -0,0 +1,61 @@
+import dataclasses
+import pytest
+import config
+import database_manager
+import export_transformer
+import script
+from recipe_model import Recipe
+
+def _read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+@pytest.fixture
+def crawled(stub_server, monkeypatch):
+    """
+    Crawls the stub catalog into the database and mirrors its images.
+    """
+    monkeypatch.setattr(config, "CATEGORIES_LIMIT", None)
+    monkeypatch.setattr(config, "RECIPES_PER_CATEGORY", None)
+    script.main(["--metrics-file", "", "--log-level", "WARNING"])
+    return config.DATABASE_NAME
+
+def _assert_exports_match(db_file, workdir):
+    export_transformer.export_to_xml(db_file, str(workdir / "streamed.xml"))
+    export_transformer.export_and_transform(
+        db_file, config.XSLT_FILENAME, str(workdir / "in_memory.html"), str(workdir / "in_memory.xml")
+    )
+    export_transformer.export_and_transform_incremental(
+        db_file, config.XSLT_FILENAME, str(workdir / "incremental.html"), str(workdir / "incremental.xml")
+    )
+    streamed = _read(workdir / "streamed.xml")
+    assert _read(workdir / "in_memory.xml") == streamed
+    assert _read(workdir / "incremental.xml") == streamed
+    assert _read(workdir / "incremental.html") == _read(workdir / "in_memory.html")
+    return streamed
+
+def test_streamed_in_memory_and_incremental_xml_match(crawled, workdir, catalog):
+    xml = _assert_exports_match(crawled, workdir)
+    assert xml.count(b"<recipe>") == catalog.size
+    assert xml.count(b"<image_path>") == catalog.size
+
+def test_incremental_export_follows_changes(crawled, workdir):
+    before = _assert_exports_match(crawled, workdir)
+    conn = database_manager.create_connection(crawled)
+    recipe_id = conn.execute("SELECT id FROM recipes LIMIT 1").fetchone()[0]
+    recipe = database_manager.get_recipe(conn, recipe_id)
+    database_manager.insert_recipe(conn, dataclasses.replace(recipe, title="Renamed", category="Dessert"))
+    conn.close()
+    after = _assert_exports_match(crawled, workdir)
+    assert after != before
+    assert b"<title>Renamed</title>" in after
+
+@pytest.mark.parametrize("count", [1, 2])
+def test_incremental_html_of_small_catalogs_matches(stub_server, catalog, workdir, caplog, count):
+    conn = database_manager.create_connection(config.DATABASE_NAME)
+    database_manager.create_table(conn)
+    recipe_ids = catalog.recipe_ids(catalog.categories[0])[:count]
+    database_manager.insert_recipes(conn, [Recipe.from_mealdb(catalog.recipe(recipe_id)) for recipe_id in recipe_ids])
+    conn.close()
+    _assert_exports_match(config.DATABASE_NAME, workdir)
+    assert "rendering the full catalog instead" not in caplog.text
@@ -0,0 +1,33 @@
+import pytest
+import config
+import data_processor
+from data_processor import ActionHighlighter
+
+@pytest.fixture
+def highlighter():
+    return ActionHighlighter(["stir", "fry", "stir-fry", "heat", "pre-heat", "bake"])
+
+@pytest.mark.parametrize("text, expected", [
+    ("Bake, then stir.", "<action>Bake</action>, then <action>stir</action>."),
+    ("BAKE it", "<action>BAKE</action> it"),
+    ("stirring and baked", "stirring and baked"),
+    ("Stir-fry the beef", "<action>Stir-fry</action> the beef"),
+    ("pre-heat the oven", "<action>pre-heat</action> the oven"),
+    ("re-heat it", "re-<action>heat</action> it"),
+    ("a heat-proof bowl", "a <action>heat</action>-proof bowl"),
+    # Overlapping verbs: the longest hyphenated verb wins over its parts
+    ("stir-fry-pan", "<action>stir-fry</action>-pan"),
+    ("fry-stir-fry", "<action>fry</action>-<action>stir-fry</action>"),
+])
+def test_highlight(highlighter, text, expected):
+    assert highlighter.highlight(text) == expected
+
+def test_highlight_many_matches_highlight(highlighter):
+    texts = ["Stir-fry the beef", "re-heat it", ""]
+    assert highlighter.highlight_many(texts) == [highlighter.highlight(text) for text in texts]
+
+def test_shared_highlighter_follows_the_configured_verbs(monkeypatch):
+    monkeypatch.setattr(config, "ACTION_VERBS", ["knead"])
+    data_processor.reset_caches()
+    assert data_processor.highlight_actions("Knead, then stir.") == "<action>Knead</action>, then stir."
+    data_processor.reset_caches()
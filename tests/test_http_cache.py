@@ -0,0 +1,56 @@
+import pytest
+import api_service
+import config
+
+@pytest.fixture
+def revalidate_always(monkeypatch):
+    """
+    Makes every cached response due for revalidation.
+    """
+    monkeypatch.setattr(config, "HTTP_CACHE_TTLS", {})
+    monkeypatch.setattr(config, "HTTP_CACHE_DEFAULT_TTL", 0)
+
+def test_fresh_response_is_served_without_a_request(stub_server, catalog):
+    assert api_service.fetch_categories(None) == catalog.categories
+    assert api_service.fetch_categories(None) == catalog.categories
+    assert stub_server.requests["list.php"] == 1
+
+def test_cache_persists_across_runs(stub_server, catalog):
+    api_service.fetch_categories(None)
+    api_service.close_response_cache()
+    api_service.close_session()
+    assert api_service.fetch_categories(None) == catalog.categories
+    assert stub_server.requests["list.php"] == 1
+
+def test_outdated_response_is_revalidated(stub_server, catalog, revalidate_always):
+    api_service.fetch_categories(None)
+    assert api_service.fetch_categories(None) == catalog.categories
+    assert stub_server.requests["list.php"] == 2
+    assert stub_server.not_modified["list.php"] == 1
+
+def test_changed_response_replaces_the_cached_one(stub_server, catalog, revalidate_always):
+    api_service.fetch_categories(None)
+    catalog.categories = catalog.categories[:2]
+    assert api_service.fetch_categories(None) == catalog.categories
+    assert stub_server.not_modified["list.php"] == 0
+
+def test_stale_response_is_served_when_the_server_fails(stub_server, catalog, revalidate_always):
+    expected = catalog.categories
+    api_service.fetch_categories(None)
+    stub_server.fault = lambda endpoint, query: (500, None)
+    assert api_service.fetch_categories(None) == expected
+
+def test_failed_request_without_cached_response_raises(stub_server):
+    stub_server.fault = lambda endpoint, query: (500, None)
+    with pytest.raises(api_service.requests.exceptions.RequestException):
+        api_service._get_json("list.php?c=list")
+
+def test_cache_only_mode_never_sends_requests(stub_server, catalog, revalidate_always, monkeypatch):
+    api_service.fetch_categories(None)
+    stub_server.requests.clear()
+    monkeypatch.setattr(config, "HTTP_CACHE_ONLY", True)
+    assert api_service.fetch_categories(None) == catalog.categories
+    with pytest.raises(api_service.CacheOnlyMiss):
+        api_service._get_json(f"filter.php?c={catalog.categories[0]}")
+    assert api_service.fetch_recipes_by_category(catalog.categories[0], None) is None
+    assert not stub_server.requests
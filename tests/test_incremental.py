@@ -0,0 +1,70 @@
+import sqlite3
+import pytest
+import config
+import data_processor
+import database_manager
+import script
+from recipe_model import Recipe
+
+def _fetch(*flags):
+    script.main(["fetch", "--metrics-file", "", "--log-level", "WARNING", *flags])
+
+def _stored_ids() -> set[str]:
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    try:
+        return {row[0] for row in conn.execute("SELECT id FROM recipes")}
+    finally:
+        conn.close()
+
+@pytest.fixture
+def looked_up(stub_server):
+    """
+    Records the recipe IDs and nutrition queries sent to the stub server.
+    """
+    requests = {"lookup.php": [], "nutrition": []}
+
+    def record(endpoint, query):
+        if endpoint in requests:
+            requests[endpoint].append(query.get("i", query.get("query"))[0])
+
+    stub_server.fault = record
+    return requests
+
+def test_incremental_fetch_skips_stored_recipes(looked_up, catalog, monkeypatch):
+    monkeypatch.setattr(config, "CATEGORIES_LIMIT", None)
+    monkeypatch.setattr(config, "RECIPES_PER_CATEGORY", 3)
+    _fetch()
+    first = _stored_ids()
+    assert len(first) == 3 * len(catalog.categories)
+
+    looked_up["lookup.php"].clear()
+    monkeypatch.setattr(config, "RECIPES_PER_CATEGORY", 2)
+    _fetch("--incremental")
+    second = _stored_ids() - first
+    assert second == {
+        recipe_id for category in catalog.categories for recipe_id in catalog.recipe_ids(category)[3:5]
+    }
+    assert sorted(looked_up["lookup.php"]) == sorted(second)
+
+def test_unchanged_ingredients_reuse_the_stored_calories(looked_up, catalog, workdir, monkeypatch):
+    monkeypatch.setattr(config, "NUTRITION_TABLE_DB", None)
+    monkeypatch.setattr(config, "NUTRITION_CACHE_DB", None)
+    recipe = Recipe.from_mealdb(catalog.recipe(catalog.recipe_ids(catalog.categories[0])[0]))
+    conn = database_manager.create_connection(config.DATABASE_NAME)
+    database_manager.create_table(conn)
+    database_manager.insert_recipes(conn, [recipe])
+    assert looked_up["nutrition"]
+    calories = database_manager.get_recipe(conn, recipe.id).calories
+
+    # A new run has no calories in memory, so only the stored hash can avoid the lookup
+    data_processor.reset_caches()
+    looked_up["nutrition"].clear()
+    database_manager.insert_recipes(conn, [Recipe.from_mealdb({**catalog.recipe(recipe.id), "strMeal": "Renamed"})])
+    assert looked_up["nutrition"] == []
+    stored = database_manager.get_recipe(conn, recipe.id)
+    assert (stored.title, stored.calories) == ("Renamed", calories)
+
+    data_processor.reset_caches()
+    database_manager.insert_recipes(conn, [Recipe.from_mealdb({**catalog.recipe(recipe.id), "strIngredient1": "durian"})])
+    assert looked_up["nutrition"]
+    conn.close()
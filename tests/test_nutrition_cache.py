@@ -0,0 +1,65 @@
+import pytest
+import nutrition_cache
+from nutrition_cache import NutritionCache
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(nutrition_cache, "time", clock)
+    return clock
+
+@pytest.fixture
+def open_cache(workdir, clock):
+    caches = []
+
+    def open_cache(ttl=100, max_entries=10, negative_ttl=None):
+        caches.append(NutritionCache(str(workdir / "nutrition_cache.db"), ttl, max_entries, negative_ttl))
+        return caches[-1]
+
+    yield open_cache
+    for cache in caches:
+        cache.close()
+
+def test_entries_expire_after_the_ttl(open_cache, clock):
+    cache = open_cache(ttl=100)
+    cache.put_many({"1 cup rice": 200.0, "1 pinch unobtainium": None})
+    clock.now += 99
+    assert cache.get_many(["1 cup rice", "1 pinch unobtainium"]) == {"1 cup rice": 200.0, "1 pinch unobtainium": None}
+    clock.now += 2
+    assert cache.get_many(["1 cup rice", "1 pinch unobtainium"]) == {}
+    assert cache.purge_expired() == 2
+
+def test_unknown_foods_expire_after_the_negative_ttl(open_cache, clock):
+    cache = open_cache(ttl=100, negative_ttl=10)
+    cache.put_many({"1 cup rice": 200.0, "1 pinch unobtainium": None})
+    clock.now += 11
+    assert cache.get_many(["1 cup rice", "1 pinch unobtainium"]) == {"1 cup rice": 200.0}
+
+def test_least_recently_used_entries_are_evicted(open_cache, clock):
+    cache = open_cache(max_entries=3)
+    for food in ("a", "b", "c"):
+        cache.put_many({food: 1.0})
+        clock.now += 1
+    cache.get_many(["a"])
+    clock.now += 1
+    cache.put_many({"d": 1.0})
+    assert set(cache.get_many(["a", "b", "c", "d"])) == {"a", "c", "d"}
+    assert cache.stats()["entries"] == 3
+
+def test_hits_and_misses_are_counted(open_cache):
+    cache = open_cache()
+    cache.put_many({"a": 1.0, "b": None})
+    cache.get_many(["a", "b", "c"])
+    cache.get_many(["a"])
+    assert cache.stats() == {"hits": 3, "misses": 1, "entries": 2}
+
+def test_entries_persist_across_instances(open_cache):
+    open_cache().put_many({"a": 1.0})
+    assert open_cache().get_many(["a"]) == {"a": 1.0}
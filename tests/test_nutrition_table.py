@@ -0,0 +1,75 @@
+import pytest
+from nutrition_table import NutritionTable, VOLUME_UNIT_ML
+
+FOODS_CSV = """name,kcal_per_100g,grams_per_piece,density_g_per_ml
+plain flour,364,,0.53
+chicken,239,,
+chicken stock,15,,1.0
+egg,143,50,
+tomato,18,120,
+sugar,387,,0.85
+"""
+
+@pytest.fixture
+def csv_file(workdir):
+    path = workdir / "foods.csv"
+    path.write_text(FOODS_CSV, encoding="utf-8")
+    return str(path)
+
+@pytest.fixture
+def open_table(workdir, csv_file):
+    tables = []
+
+    def open_table(fuzzy_cutoff=0.85):
+        tables.append(NutritionTable(str(workdir / "nutrition_table.db"), fuzzy_cutoff))
+        tables[-1].import_csv_if_changed(csv_file)
+        return tables[-1]
+
+    yield open_table
+    for table in tables:
+        table.close()
+
+@pytest.mark.parametrize("item, expected", [
+    ("plain flour", "plain flour"),
+    ("Plain Flour, sifted", "plain flour"),
+    ("chopped tomatoes", "tomato"),
+    ("chicken stock", "chicken stock"), # The longest name wins over "chicken"
+    ("chicken breast", "chicken"),
+    ("chiken", "chicken"), # Misspelling corrected to the closest food word
+    ("tomatos", "tomato"),
+    ("unobtainium", None),
+])
+def test_match(open_table, item, expected):
+    assert open_table().match(item) == expected
+
+def test_fuzzy_matching_can_be_disabled(open_table):
+    table = open_table(fuzzy_cutoff=1)
+    assert table.match("chiken") is None
+    assert table.match("chicken") == "chicken"
+
+@pytest.mark.parametrize("quantity, unit, item, expected", [
+    ("200", "gram", "plain flour", 364 * 2),
+    ("1", "kilogram", "sugar", 387 * 10),
+    ("1", "cup", "plain flour", 364 * VOLUME_UNIT_ML["cup"] * 0.53 / 100),
+    ("1½", "cup", "chiken stock", 15 * 1.5 * VOLUME_UNIT_ML["cup"] / 100),
+    ("2", "tablespoon", "chicken", 239 * 2 * VOLUME_UNIT_ML["tablespoon"] / 100), # No density: 1 g/ml
+    ("2", "", "eggs", 143 * 2 * 50 / 100), # Pieces of the food's piece size
+    ("", "", "egg", 143 * 50 / 100),
+    ("3", "", "chicken", 239 * 3), # Pieces without a piece size count as 100 g
+    ("", "", "sugar", 387 * 5 / 100), # A seasoning amount
+    ("1", "can", "chopped tomatoes", 18 * 4),
+    ("1", "cup", "unobtainium", None),
+])
+def test_estimate(open_table, quantity, unit, item, expected):
+    assert open_table().estimate(quantity, unit, item) == pytest.approx(expected)
+
+def test_estimate_many_matches_estimate(open_table):
+    table = open_table()
+    columns = (("200", "1", ""), ("gram", "cup", ""), ("plain flour", "sugar", "unobtainium"))
+    assert table.estimate_many(*columns) == [table.estimate(*line) for line in zip(*columns)]
+
+def test_csv_is_imported_only_when_changed(open_table, csv_file):
+    table = open_table()
+    assert len(table) == 6
+    assert table.import_csv_if_changed(csv_file) == 0
+    assert len(open_table()) == 6 # Read back from the database
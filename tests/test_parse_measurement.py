@@ -0,0 +1,25 @@
+import pytest
+import data_processor
+
+@pytest.mark.parametrize("line, expected", [
+    ("1½ cups flour", ("1½", "cup", "flour")),
+    ("1 ½ cups flour", ("1 ½", "cup", "flour")),
+    ("1 1/2 cups rice", ("1 1/2", "cup", "rice")),
+    ("200ml milk", ("200", "milliliter", "milk")),
+    ("200 ml milk", ("200", "milliliter", "milk")),
+    ("2cup sugar", ("2", "cup", "sugar")),
+    ("1/2 tsp salt", ("1/2", "teaspoon", "salt")),
+    ("  3 Large eggs ", ("3", "", "Large eggs")),
+    ("to taste", ("", "", "to taste")),
+    ("salt to taste", ("", "", "salt to taste")),
+    ("", ("", "", "")),
+])
+def test_parse_measurement(line, expected):
+    assert data_processor.parse_measurement(line) == expected
+
+def test_batch_parser_matches_the_single_line_parser():
+    lines = ["1½ cups flour", "200ml milk", "to taste", "1½ cups flour"]
+    parsed = data_processor.parse_measurements(lines)
+    assert list(zip(parsed.quantities, parsed.units, parsed.items)) == [
+        data_processor.parse_measurement(line) for line in lines
+    ]
@@ -0,0 +1,60 @@
+import sqlite3
+import pytest
+import config
+import pipeline
+import script
+
+def _crawl(catalog, select_recipe_ids=None):
+    select_recipe_ids = select_recipe_ids or (lambda category, recipes: [recipe["idMeal"] for recipe in recipes])
+    return list(pipeline.crawl(catalog.categories, select_recipe_ids, {}))
+
+def test_crawl_yields_every_recipe_in_listing_order(stub_server, catalog):
+    results = _crawl(catalog)
+    assert [(category, recipe_id) for category, recipe_id, _ in results] == [
+        (category, recipe_id) for category in catalog.categories for recipe_id in catalog.recipe_ids(category)
+    ]
+    assert all(recipe.id == recipe_id for _, recipe_id, recipe in results)
+    assert stub_server.requests["filter.php"] == len(catalog.categories)
+    assert stub_server.requests["lookup.php"] == catalog.size
+
+def test_crawl_keeps_order_with_a_small_reorder_window(stub_server, catalog, monkeypatch):
+    monkeypatch.setattr(config, "PIPELINE_REORDER_WINDOW", 2)
+    results = _crawl(catalog)
+    assert [recipe_id for _, recipe_id, _ in results] == [
+        recipe_id for category in catalog.categories for recipe_id in catalog.recipe_ids(category)
+    ]
+
+def test_failed_listing_is_passed_as_none(stub_server, catalog):
+    failing = catalog.categories[1]
+    stub_server.fault = lambda endpoint, query: (500, None) if query.get("c") == [failing] else None
+    listings = {}
+
+    def select_recipe_ids(category, recipes):
+        listings[category] = recipes
+        return [recipe["idMeal"] for recipe in recipes or []]
+
+    results = _crawl(catalog, select_recipe_ids)
+    assert listings[failing] is None
+    assert {category for category, _, _ in results} == set(catalog.categories) - {failing}
+
+def test_listing_error_reaches_the_consumer(stub_server, catalog):
+    def select_recipe_ids(category, recipes):
+        if category == catalog.categories[-1]:
+            raise RuntimeError("listing failed")
+        return [recipe["idMeal"] for recipe in recipes]
+
+    results = []
+    with pytest.raises(RuntimeError, match="listing failed"):
+        for item in pipeline.crawl(catalog.categories, select_recipe_ids, {}):
+            results.append(item)
+    assert len(results) == catalog.size - catalog.recipes_per_category
+
+def test_crawl_stores_every_recipe(stub_server, catalog, monkeypatch):
+    monkeypatch.setattr(config, "CATEGORIES_LIMIT", None)
+    monkeypatch.setattr(config, "RECIPES_PER_CATEGORY", None)
+    script.main(["--metrics-file", "", "--log-level", "WARNING", "--skip-xml"])
+    conn = sqlite3.connect(config.DATABASE_NAME)
+    stored = {row[0] for row in conn.execute("SELECT id FROM recipes")}
+    conn.close()
+    assert stored == {recipe_id for category in catalog.categories for recipe_id in catalog.recipe_ids(category)}
+    assert stub_server.requests["lookup.php"] == catalog.size
@@ -0,0 +1,80 @@
+import http.client
+import json
+import threading
+import pytest
+import config
+import database_manager
+import query_service
+from recipe_model import Recipe
+
+def _recipe(recipe_id: str, title: str) -> Recipe:
+    return Recipe(recipe_id, title, "Simmer gently.", "Chicken", ingredients=("chicken",), measures=("1",))
+
+@pytest.fixture
+def store(stub_server, workdir):
+    conn = database_manager.create_connection(config.DATABASE_NAME)
+    database_manager.create_table(conn)
+    database_manager.insert_recipes(conn, [_recipe("1", "Chicken Curry")])
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def service(store):
+    service = query_service.QueryService(config.DATABASE_NAME, pool_size=2, version_check_interval=0)
+    yield service
+    service.close()
+
+@pytest.fixture
+def get(service):
+    server = query_service.create_server(service, "127.0.0.1", 0, workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = http.client.HTTPConnection(*server.server_address, timeout=5)
+
+    def get(path: str, **headers) -> http.client.HTTPResponse:
+        client.request("GET", path, headers={name.replace("_", "-"): value for name, value in headers.items()})
+        response = client.getresponse()
+        response.body = response.read()
+        return response
+
+    yield get
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+def test_matching_etag_is_not_modified(get):
+    first = get("/recipes?category=Chicken")
+    assert first.status == 200
+    assert json.loads(first.body)["count"] == 1
+    etag = first.getheader("ETag")
+
+    revalidated = get("/recipes?category=Chicken", If_None_Match=etag)
+    assert (revalidated.status, revalidated.body, revalidated.getheader("ETag")) == (304, b"", etag)
+    assert get("/recipes?category=Chicken", If_None_Match='"stale"').status == 200
+    assert get("/recipes?category=Chicken", If_Modified_Since=first.getheader("Last-Modified")).status == 304
+
+def test_errors_are_never_not_modified(get):
+    missing = get("/recipes")
+    assert missing.status == 400
+    assert get("/recipes", If_None_Match=missing.getheader("ETag")).status == 400
+
+def test_store_writes_drop_the_cached_responses(service, store, get):
+    etag = get("/recipes?category=Chicken").getheader("ETag")
+    assert len(service.cache) == 1
+    assert get("/recipes?category=Chicken", If_None_Match=etag).status == 304
+
+    database_manager.insert_recipes(store, [_recipe("2", "Chicken Pie")])
+    changed = get("/recipes?category=Chicken", If_None_Match=etag)
+    assert changed.status == 200
+    assert changed.getheader("ETag") != etag
+    assert json.loads(changed.body)["count"] == 2
+    assert len(service.cache) == 1
+
+def test_version_is_rechecked_only_after_the_interval(store):
+    service = query_service.QueryService(config.DATABASE_NAME, pool_size=1, version_check_interval=3600)
+    try:
+        _, body, etag, _ = service.handle("/recipes/1")
+        database_manager.insert_recipes(store, [_recipe("1", "Renamed")])
+        assert service.handle("/recipes/1")[:3] == (200, body, etag)
+    finally:
+        service.close()
@@ -0,0 +1,42 @@
+import pytest
+import database_manager
+from recipe_model import Recipe
+
+RECIPES = [
+    Recipe("1", "Lemon Tart", "Bake the pastry case.", "Dessert", ingredients=("lemon", "butter"), measures=("2", "")),
+    Recipe("2", "Roast Chicken", "Squeeze a lemon over the chicken.", "Chicken", ingredients=("chicken",), measures=("1",)),
+    Recipe("3", "Chicken Curry", "Simmer for 20 minutes.", "Chicken", ingredients=("chicken", "lemon"), measures=("1", "1")),
+    Recipe("4", "Fudge", "Heat until <115°C> & stir.", "Dessert", ingredients=("sugar",), measures=("1 cup",)),
+]
+
+@pytest.fixture
+def conn(stub_server):
+    conn = database_manager.create_connection(":memory:")
+    database_manager.create_table(conn)
+    database_manager.insert_recipes(conn, RECIPES)
+    yield conn
+    conn.close()
+
+def _ids(rows) -> list[str]:
+    return [recipe_id for recipe_id, _, _ in rows]
+
+def test_title_matches_rank_above_ingredients_and_instructions(conn):
+    # "lemon": title of 1, ingredient of 1 and 3, instructions of 2
+    assert _ids(database_manager.search_recipes(conn, "lemon")) == ["1", "3", "2"]
+
+def test_fts_syntax_is_supported(conn):
+    assert set(_ids(database_manager.search_recipes(conn, "chicken NOT curry"))) == {"2"}
+    assert set(_ids(database_manager.search_recipes(conn, "simm*"))) == {"3"}
+
+@pytest.mark.parametrize("query", ['chicken "curry', "curry)", "curry:"])
+def test_invalid_fts_syntax_falls_back_to_literal_words(conn, query):
+    assert _ids(database_manager.search_recipes(conn, query)) == ["3"]
+
+def test_paging(conn):
+    assert _ids(database_manager.search_recipes(conn, "lemon", limit=2, offset=1)) == ["3", "2"]
+    assert database_manager.search_recipes(conn, "   ") == []
+
+def test_snippets_are_escaped_html(conn):
+    [(_, title, snippet)] = database_manager.search_recipes(conn, "stir")
+    assert title == "Fudge"
+    assert "&lt;115°C&gt; &amp; <b>stir</b>" in snippet
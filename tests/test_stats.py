@@ -0,0 +1,57 @@
+import dataclasses
+import pytest
+import database_manager
+from recipe_model import Recipe
+
+def _catalog_recipes(catalog) -> list[Recipe]:
+    return [
+        Recipe.from_mealdb(catalog.recipe(recipe_id))
+        for category in catalog.categories for recipe_id in catalog.recipe_ids(category)
+    ]
+
+def _stats(conn) -> tuple[list, list]:
+    recipe_stats = [
+        tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+        for row in conn.execute("SELECT * FROM recipe_stats ORDER BY dimension, name")
+    ]
+    return recipe_stats, conn.execute("SELECT * FROM ingredient_stats ORDER BY item").fetchall()
+
+def _assert_stats_match_rebuild(conn):
+    incremental = _stats(conn)
+    with conn:
+        database_manager.rebuild_stats(conn)
+    assert incremental == _stats(conn)
+
+@pytest.fixture
+def conn(workdir):
+    conn = database_manager.create_connection(":memory:")
+    database_manager.create_table(conn)
+    yield conn
+    conn.close()
+
+def test_incremental_stats_match_rebuild_after_inserts(stub_server, catalog, conn):
+    database_manager.insert_recipes(conn, _catalog_recipes(catalog), batch_size=7)
+    _assert_stats_match_rebuild(conn)
+
+def test_incremental_stats_match_rebuild_after_updates(stub_server, catalog, conn):
+    recipes = _catalog_recipes(catalog)
+    database_manager.insert_recipes(conn, recipes)
+    updated = [
+        dataclasses.replace(recipes[0], category="Dessert", area="", tags="Spicy,Quick"),
+        dataclasses.replace(recipes[1], video_url="", ingredients=recipes[1].ingredients[:2],
+                            measures=recipes[1].measures[:2]),
+        dataclasses.replace(recipes[2], area="Thai", ingredients=("rice", "basil"), measures=("1 cup", "")),
+    ]
+    database_manager.insert_recipes(conn, updated)
+    database_manager.insert_recipe(conn, dataclasses.replace(recipes[3], category=recipes[0].category))
+    _assert_stats_match_rebuild(conn)
+    database_manager.recalculate_calories(conn)
+    _assert_stats_match_rebuild(conn)
+
+def test_recipe_without_area_keeps_its_category(stub_server, catalog, conn):
+    recipe = dataclasses.replace(_catalog_recipes(catalog)[0], area="", tags="Spicy")
+    database_manager.insert_recipes(conn, [recipe])
+    stored = database_manager.get_recipe(conn, recipe.id)
+    assert (stored.category, stored.area, stored.tags) == (recipe.category, "", "Spicy")
+    groups = set(conn.execute("SELECT dimension, name FROM recipe_groups WHERE recipe_id = ?", (recipe.id,)))
+    assert groups == {("all", ""), ("category", recipe.category), ("tag", "Spicy")}